@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+from .suite import (
+    Benchmark,
+    BenchmarkSuite,
+    compare,
+    load,
+    save,
+)
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+run the benchmark suite
+
+    python -m apollo.benchmark --save baseline.json
+    python -m apollo.benchmark --baseline baseline.json --threshold 0.5
+
+exit status is 1 when any case regresses beyond the threshold
+"""
+
+import sys
+import argparse
+from apollo.benchmark.suite import compare, load, save
+from apollo.benchmark.cases import suite
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m apollo.benchmark')
+    parser.add_argument('-k', '--pattern', default=None,
+                        help='glob pattern on case names')
+    parser.add_argument('--list', action='store_true',
+                        help='list case names and exit')
+    parser.add_argument('--save', default=None,
+                        help='write results as json to this path')
+    parser.add_argument('--baseline', default=None,
+                        help='json baseline to compare against')
+    parser.add_argument('--threshold', type=float, default=0.5,
+                        help='relative slowdown flagged as regression, '
+                             'see compare')
+    parser.add_argument('--statistic', default='min',
+                        choices=['min', 'median'],
+                        help='per call time compared against the baseline')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for benchmark in suite.select(args.pattern):
+            print(benchmark.name)
+        return 0
+
+    def report(name, result):
+        print(f"{name} | {result['median']:.6g} s "
+              f"(min {result['min']:.6g})", flush=True)
+
+    results = suite.run(args.pattern, report)
+    if args.save:
+        save(results, args.save)
+    if not args.baseline:
+        return 0
+
+    rows = compare(results, load(args.baseline), args.threshold,
+                   args.statistic)
+    print()
+    for row in rows:
+        ratio = '-' if row['ratio'] is None else f"{row['ratio']:.3f}"
+        print(f"{row['status']:>11} | {ratio:>7} | {row['name']}")
+    return int(any(row['status'] == 'regression' for row in rows))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import decimal
+import datetime as dt
+import numpy as np
+from apollo.benchmark.suite import BenchmarkSuite
+from apollo.product.payoff.basic_functions import Ramp, Step
+from apollo.product.barrier import KnockOutBarrier, KnockInBarrier, Observer
+from apollo.product.payoff import (
+    VanillaCallPayoff,
+    VanillaPutPayoff,
+    ConstantPayoff,
+    DeltaOnePayoff,
+)
+from apollo.product.template.snowball import SnowballProduct, SnowBallSimulate
+from apollo.product.template.pde import SnowballPDE
+from apollo.product.template.spec import ContractSpec
+from apollo.simulation import MultiAsset, PathGenerator
+from apollo.utils import precision_8
+
+suite = BenchmarkSuite()
+
+NUM_OF_PRICE = 10 ** 5
+PAYOFF = {
+    'VanillaCall': lambda: VanillaCallPayoff(strike=1.0, weight=1.0),
+    'VanillaPut': lambda: VanillaPutPayoff(strike=1.0, weight=1.0),
+    'Constant': lambda: ConstantPayoff(rate=0.2),
+    'DeltaOne': lambda: DeltaOnePayoff(strike=1.0, weight=1.0),
+}
+
+
+def snowball_parameters(num_of_month: int) -> dict:
+    """
+    snowball test contract with monthly knock-out and daily knock-in
+    observation over num_of_month months from 2020-01-01
+    """
+    strike_date = dt.date(2020, 1, 1)
+    ko_date = []
+    for i in range(1, num_of_month + 1):
+        year, month = divmod(i, 12)
+        ko_date.append(dt.date(2020 + year, month + 1, 1)
+                       - dt.timedelta(days=1))
+    maturity = ko_date[-1]
+    ki_date = [strike_date + dt.timedelta(days=i)
+               for i in range((maturity - strike_date).days + 1)]
+    return {
+        'UpperBarrier': 1.2,
+        'ObservationDate': [d.isoformat() for d in ko_date],
+        'KnockOutRebate': [0.2] * num_of_month,
+        'KIBarrier': 0.7,
+        'Strike': 1.0,
+        'StrikeDate': strike_date.isoformat(),
+        'MaturityBonusCoupon': 0.05,
+        'Maturity': maturity.isoformat(),
+        'KIObservationDate': [d.isoformat() for d in ki_date],
+    }
+
+
+def _price(size):
+    return np.random.RandomState(0).lognormal(0, 0.2, size)
+
+
+@suite.add('compare.scalar',
+           method=['float', 'decimal', 'numpy', 'precision_8'])
+def compare_scalar(method):
+    num = 0.6
+    if method == 'float':
+        return lambda: num > 0.5
+    if method == 'decimal':
+        num = decimal.Decimal(num)
+        return lambda: num > 0.5
+    if method == 'numpy':
+        return lambda: np.greater(num, 0.5)
+    return lambda: precision_8.greater(num, 0.5)
+
+
+@suite.add('compare.array',
+           method=['greater', 'greater_equal', 'less', 'less_equal', 'equal'])
+def compare_array(method):
+    price = _price(NUM_OF_PRICE)
+    func = getattr(precision_8, method)
+    return lambda: func(price, 1.0)
+
+
+@suite.add('barrier.observe', direction=['upper', 'lower'])
+def barrier_observe(direction):
+    date = dt.date(2020, 1, 31)
+    barrier = KnockOutBarrier(position=1.0, observe_dates=[date],
+                              direction=direction)
+    price = _price(NUM_OF_PRICE)
+    return lambda: barrier.observe(date, price)
+
+
+@suite.add('payoff.array', payoff=list(PAYOFF))
+def payoff_array(payoff):
+    inst = PAYOFF[payoff]()
+    price = _price(NUM_OF_PRICE)
+    return lambda: inst.payoff(price)
+
+
+@suite.add('payoff.scalar', payoff=list(PAYOFF))
+def payoff_scalar(payoff):
+    inst = PAYOFF[payoff]()
+    return lambda: inst.payoff(1.1)
+
+
+@suite.add('function.piecewise', num_of_function=[1, 4, 16])
+def function_piecewise(num_of_function):
+    function = sum(
+        Ramp(slope=1.0, origin=1.0 + 0.05 * i, sign=1).to_piecewise()
+        + Step(level=0.1, origin=0.9 - 0.05 * i, sign=-1, inclusive=True)
+        .to_piecewise()
+        for i in range(num_of_function))
+    price = _price(NUM_OF_PRICE)
+    return lambda: function.formula(price)
+
+
+@suite.add('observer.iterate', num_of_month=[12, 36])
+def observer_iterate(num_of_month):
+    param = snowball_parameters(num_of_month)
+    observer = Observer()
+    observer.register_barrier('KO', KnockOutBarrier(
+        position=param['UpperBarrier'],
+        observe_dates=[dt.date.fromisoformat(d)
+                       for d in param['ObservationDate']]))
+    observer.register_barrier('KI', KnockInBarrier(
+        position=param['KIBarrier'], direction='lower',
+        observe_dates=[dt.date.fromisoformat(d)
+                       for d in param['KIObservationDate']]))
+
+    def func():
+        for _ in observer:
+            pass
+    return func
+
+
+@suite.add('contract.construct', source=['parse', 'dict', 'spec'],
+           num_of_month=[12, 36])
+def contract_construct(source, num_of_month):
+    param = snowball_parameters(num_of_month)
+    if source == 'parse':
+        return lambda: SnowBallSimulate(
+            SnowballProduct, ContractSpec.from_parameters(param))
+    if source == 'dict':
+        return lambda: SnowBallSimulate(SnowballProduct, param)
+    spec = ContractSpec.from_parameters(param)
+    return lambda: SnowBallSimulate(SnowballProduct, spec)
+
+
+@suite.add('simulate', engine=['array', 'matrix', 'fused'],
+           num_of_path=[10 ** 4, 10 ** 5], num_of_month=[12, 36])
+def simulate(engine, num_of_path, num_of_month):
+    inst = SnowBallSimulate(SnowballProduct,
+                            snowball_parameters(num_of_month))
+    return lambda: inst.simulate(PathGenerator(), num_of_path, engine=engine)
+
+
+@suite.add('simulate.ki_monitoring', engine=['array', 'matrix'],
+           ki_monitoring=['sample', 'weight'], num_of_path=[10 ** 5])
+def simulate_ki_monitoring(engine, ki_monitoring, num_of_path):
+    inst = SnowBallSimulate(SnowballProduct, snowball_parameters(12),
+                            ki_monitoring=ki_monitoring,
+                            continuity_correction=True)
+    return lambda: inst.simulate(PathGenerator(), num_of_path, engine=engine)
+
+
+@suite.add('simulate.dtype', engine=['array', 'matrix'],
+           dtype=['float64', 'float32'], num_of_path=[10 ** 5])
+def simulate_dtype(engine, dtype, num_of_path):
+    inst = SnowBallSimulate(SnowballProduct, snowball_parameters(12),
+                            dtype=dtype)
+    return lambda: inst.simulate(PathGenerator(), num_of_path, engine=engine)
+
+
+@suite.add('simulate.multi_asset', engine=['array', 'matrix'],
+           num_of_asset=[1, 2, 5], num_of_path=[10 ** 5])
+def simulate_multi_asset(engine, num_of_asset, num_of_path):
+    correlation = np.full((num_of_asset, num_of_asset), 0.6)
+    np.fill_diagonal(correlation, 1)
+    inst = SnowBallSimulate(SnowballProduct, snowball_parameters(12),
+                            assets=MultiAsset([0.3] * num_of_asset,
+                                              correlation))
+    return lambda: inst.simulate(PathGenerator(), num_of_path, engine=engine)
+
+
+@suite.add('simulate', engine=['object'],
+           num_of_path=[10 ** 4], num_of_month=[12])
+def simulate_object(engine, num_of_path, num_of_month):
+    return simulate(engine, num_of_path, num_of_month)
+
+
+@suite.add('pde', num_of_space=[200, 400], num_of_month=[12, 36])
+def pde(num_of_space, num_of_month):
+    inst = SnowballPDE(snowball_parameters(num_of_month),
+                       num_of_space=num_of_space)
+    return inst.solve
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import json
+import time
+import timeit
+import fnmatch
+import platform
+import itertools
+import statistics
+import numpy as np
+from typing import Callable, Dict, List, Optional
+
+
+class Benchmark:
+    """
+    one timed case
+    make builds the timed callable from params, so setup is not timed
+    calls per timing are calibrated with timeit.Timer.autorange unless
+    given, so every timing lasts at least 0.2 seconds
+    """
+
+    def __init__(self,
+                 name: str,
+                 make: Callable[..., Callable[[], object]],
+                 params: Optional[Dict] = None,
+                 number: Optional[int] = None,
+                 repeat: int = 7):
+        """
+        parameters
+        ----------
+        name: case name, params are appended as name[key=value,...]
+        make: function of params returning the callable to time
+        params: keyword arguments of make
+        number: calls per timing, per call time = timing / number,
+            None calibrates it with timeit.Timer.autorange
+        repeat: number of timings
+        """
+        self.params = params or {}
+        self.name = name if not self.params else \
+            name + '[' + ','.join(f'{k}={v}'
+                                  for k, v in self.params.items()) + ']'
+        self.make = make
+        self.number = number
+        self.repeat = repeat
+
+    def run(self) -> Dict:
+        """
+        time the case
+
+        returns
+        -------
+        dict of per call seconds: median, min and max over repeats
+        """
+        func = self.make(**self.params)
+        func()
+        timer = timeit.Timer(func)
+        number = self.number or timer.autorange()[0]
+        timing = [t / number for t in timer.repeat(self.repeat, number)]
+        return {
+            'median': statistics.median(timing),
+            'min': min(timing),
+            'max': max(timing),
+            'number': number,
+            'repeat': self.repeat,
+        }
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {self.name}>'
+
+
+class BenchmarkSuite:
+    """
+    collection of benchmarks with machine-readable baselines
+    results are saved as json and compared case by case, see compare
+    """
+
+    def __init__(self):
+        self.benchmarks: List[Benchmark] = []
+
+    def add(self, name: str, number: Optional[int] = None, repeat: int = 7,
+            **grid):
+        """
+        decorator registering make for every combination of the grid
+
+        parameters
+        ----------
+        name: case name
+        number: calls per timing, None calibrates it, see Benchmark
+        repeat: number of timings
+        **grid: list of values per parameter of make
+        """
+        def decorator(make):
+            keys = list(grid)
+            for values in itertools.product(*grid.values()):
+                self.benchmarks.append(Benchmark(
+                    name, make, dict(zip(keys, values)), number, repeat))
+            return make
+        return decorator
+
+    def select(self, pattern: Optional[str] = None) -> List[Benchmark]:
+        """benchmarks whose name matches the glob pattern"""
+        if not pattern:
+            return list(self.benchmarks)
+        return [b for b in self.benchmarks
+                if fnmatch.fnmatchcase(b.name, pattern)]
+
+    def run(self, pattern: Optional[str] = None,
+            callback: Optional[Callable[[str, Dict], None]] = None) -> Dict:
+        """
+        run the selected benchmarks
+
+        parameters
+        ----------
+        pattern: glob pattern on case names, None runs all
+        callback: called with name and result after each case
+
+        returns
+        -------
+        dict with machine info under 'meta' and per case results
+            under 'results'
+        """
+        results = {}
+        for benchmark in self.select(pattern):
+            results[benchmark.name] = benchmark.run()
+            if callback is not None:
+                callback(benchmark.name, results[benchmark.name])
+        return {'meta': machine_info(), 'results': results}
+
+    def __len__(self):
+        return len(self.benchmarks)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} benchmarks={len(self)}>'
+
+
+def machine_info() -> Dict:
+    return {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'node': platform.node(),
+    }
+
+
+def save(results: Dict, path: str):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def load(path: str) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results: Dict, baseline: Dict, threshold: float = 0.5,
+            statistic: str = 'min') -> List[Dict]:
+    """
+    compare results against a baseline on the per call time
+    a case changes only when its repeats do not overlap the baseline ones,
+    i.e. a regression is slower in every repeat than the baseline in any,
+    and the statistic moves beyond threshold, two identical runs of the
+    suite differed by up to 45% on the min of repeats
+
+    parameters
+    ----------
+    results: output of BenchmarkSuite.run
+    baseline: earlier output of BenchmarkSuite.run, see load
+    threshold: relative slowdown flagged as regression,
+        a speedup of the same factor is flagged as improvement
+    statistic: 'min' or 'median' over repeats, min is the least noisy
+
+    returns
+    -------
+    one row per case with name, baseline, current, ratio and status
+        status is one of 'regression', 'improvement', 'ok', 'new'
+    """
+    rows = []
+    base = baseline['results']
+    for name, result in results['results'].items():
+        if name not in base:
+            rows.append({'name': name, 'baseline': None,
+                         'current': result[statistic], 'ratio': None,
+                         'status': 'new'})
+            continue
+        ratio = result[statistic] / base[name][statistic]
+        if ratio > 1 + threshold and result['min'] > base[name]['max']:
+            status = 'regression'
+        elif ratio < 1 / (1 + threshold) \
+                and result['max'] < base[name]['min']:
+            status = 'improvement'
+        else:
+            status = 'ok'
+        rows.append({'name': name, 'baseline': base[name][statistic],
+                     'current': result[statistic], 'ratio': ratio,
+                     'status': status})
+    return rows
+
+
+if __name__ == '__main__':
+    pass
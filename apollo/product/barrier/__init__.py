@@ -8,6 +8,9 @@ from .knock_barrier import (
     KnockOutBarrier,
     KnockInBarrier,
 )
+from .calendar import (
+    ObservationCalendar,
+)
 from .observer import (
     Observer,
 )
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import datetime as dt
+import numpy as np
+from typing import Callable, Dict, List, Optional
+from apollo.product.barrier.base_barrier import Barrier
+
+
+class ObservationCalendar:
+    """
+    observation schedule of a set of barriers compiled once
+    holds the sorted dates and their ordinals, which barrier observes on
+    which date, the barrier positions and the year fraction of each step,
+    so engines loop over integer indices with no date arithmetic or
+    membership tests, see Observer.calendar
+    """
+
+    def __init__(self,
+                 dates: List[dt.date],
+                 names: List[str],
+                 mask: np.ndarray,
+                 positions: np.ndarray,
+                 steps: List[Dict[str, Callable]],
+                 start: Optional[dt.date] = None):
+        """
+        parameters
+        ----------
+        dates: sorted observation dates
+        names: barrier names
+        mask: array of shape (len(names), len(dates)), barrier observes
+            on date
+        positions: array of shape (len(names), len(dates)), barrier
+            position on date, nan where it does not observe
+        steps: observe function of each barrier observing on each date
+        start: date the first step starts from, default to the first date
+        """
+        self.dates = dates
+        self.names = names
+        self.mask = mask
+        self.positions = positions
+        self.steps = steps
+        self.start = start or (dates[0] if dates else None)
+        self.ordinals = np.array([date.toordinal() for date in dates],
+                                 dtype=np.int64)
+        self._index = {date: i for i, date in enumerate(dates)}
+        # steps before start have zero length
+        days = np.maximum(self.ordinals - self.start.toordinal(), 0) \
+            if dates else self.ordinals
+        self.year_fraction = np.diff(days, prepend=0) / 365
+
+    @classmethod
+    def compile(cls, barriers: Dict[str, Barrier],
+                start: Optional[dt.date] = None) -> 'ObservationCalendar':
+        """
+        calendar of the union of the observe dates of barriers
+
+        parameters
+        ----------
+        barriers: barriers by name
+        start: date the first step starts from, default to the first date
+        """
+        names = list(barriers)
+        dates = set()
+        for barrier in barriers.values():
+            dates.update(barrier.observe_dates)
+        dates = sorted(dates)
+        mask = np.zeros((len(names), len(dates)), dtype=bool)
+        positions = np.full((len(names), len(dates)), np.nan)
+        steps = [{} for _ in dates]
+        index = {date: i for i, date in enumerate(dates)}
+        for row, (name, barrier) in enumerate(barriers.items()):
+            for date in set(barrier.observe_dates):
+                mask[row, index[date]] = True
+            for i in np.flatnonzero(mask[row]):
+                steps[i][name] = barrier.observe_func(dates[i])
+            if hasattr(barrier, 'positions'):
+                positions[row] = barrier.positions(dates)
+        return cls(dates, names, mask, positions, steps, start)
+
+    def index(self, date: dt.date) -> int:
+        """schedule index of date, -1 if not observed"""
+        return self._index.get(date, -1)
+
+    def observes(self, name: str) -> np.ndarray:
+        """boolean mask of the dates barrier name observes on"""
+        return self.mask[self.names.index(name)]
+
+    def position(self, name: str) -> np.ndarray:
+        """position of barrier name on each date, nan where not observed"""
+        return self.positions[self.names.index(name)]
+
+    def from_date(self, date: dt.date) -> 'ObservationCalendar':
+        """calendar of the dates on or after date, starting from date"""
+        beg = int(np.searchsorted(self.ordinals, date.toordinal()))
+        return self._slice(slice(beg, None), date)
+
+    def _slice(self, key: slice, start: dt.date) -> 'ObservationCalendar':
+        return self.__class__(self.dates[key], self.names, self.mask[:, key],
+                              self.positions[:, key], self.steps[key], start)
+
+    def __getitem__(self, key: slice) -> 'ObservationCalendar':
+        """calendar of a slice of the dates, same step lengths"""
+        assert isinstance(key, slice) and key.step in (None, 1), \
+            f'calendar only slices contiguous dates, got {key}'
+        beg = range(len(self))[key].start
+        start = self.start if beg == 0 \
+            else max(self.start, self.dates[beg - 1])
+        return self._slice(key, start)
+
+    def __iter__(self):
+        return iter(zip(self.dates, self.steps))
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} dates={len(self)} ' \
+               f'barriers={self.names}>'
+
+
+if __name__ == '__main__':
+    pass
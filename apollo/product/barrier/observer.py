@@ -2,47 +2,71 @@
 """doc string"""
 
 import datetime as dt
-from typing import List, Tuple, Dict, NoReturn, Callable
+from typing import List, Tuple, Dict, NoReturn, Callable, Optional
 from apollo.product.barrier.base_barrier import Barrier
+from apollo.product.barrier.calendar import ObservationCalendar
+from apollo.utils import Profiler, null_profiler
 
 
 class _ObserverIterator:
 
-    def __init__(self, schedule, barriers):
-        self.schedule = schedule
-        self.barriers = barriers
+    def __init__(self, calendar, profiler=null_profiler):
+        self.calendar = calendar
+        self.profiler = profiler
         self.loop_idx = 0
 
     def __next__(self) -> Tuple[dt.date, Dict[str, Callable]]:
-        if self.loop_idx >= len(self.schedule):
+        if self.loop_idx >= len(self.calendar):
             raise StopIteration
-        observe_date = self.schedule[self.loop_idx]
-        barriers = {name: barrier.observe_func(observe_date)
-                    for name, barrier in self.barriers.items()
-                    if observe_date in barrier.observe_dates}
+        with self.profiler.phase('observer'):
+            observe_date = self.calendar.dates[self.loop_idx]
+            barriers = self.calendar.steps[self.loop_idx]
         self.loop_idx += 1
         return observe_date, barriers
 
 
 class Observer:
 
-    def __init__(self):
+    def __init__(self, profiler: Profiler = null_profiler):
+        """
+        parameters
+        ----------
+        profiler: records the time spent building each observation step
+        """
         self.barriers = {}
+        self.profiler = profiler
+        self._calendar: Dict[Optional[dt.date], ObservationCalendar] = {}
 
     def register_barrier(self, name: str, barrier: Barrier) -> NoReturn:
         self.barriers[name] = barrier
+        self._calendar.clear()
+
+    def calendar(self, start: Optional[dt.date] = None
+                 ) -> ObservationCalendar:
+        """
+        registered barriers compiled into an ObservationCalendar, cached
+        until a barrier is registered
+
+        parameters
+        ----------
+        start: date the first step starts from, default to the first date
+        """
+        if start not in self._calendar:
+            self._calendar[start] = ObservationCalendar.compile(
+                self.barriers, start)
+        return self._calendar[start]
 
     @property
     def schedule(self) -> List[dt.date]:
-        observe_dates = set()
-        for barrier in self.barriers.values():
-            observe_dates.update(barrier.observe_dates)
-        return sorted(observe_dates)
+        # dates do not depend on start, any compiled calendar will do
+        for calendar in self._calendar.values():
+            return calendar.dates
+        return self.calendar().dates
 
     def __iter__(self) -> _ObserverIterator:
         return _ObserverIterator(
-            schedule=self.schedule,
-            barriers=self.barriers,
+            calendar=self.calendar(),
+            profiler=self.profiler,
         )
 
 
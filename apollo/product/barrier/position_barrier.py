@@ -3,10 +3,13 @@
 
 import datetime as dt
 import numpy as np
-from typing import List, Union, Callable
+from typing import Callable, List, Optional, Union
 from apollo.product.barrier.base_barrier import Barrier
 from apollo.utils import Numerical, LazyProperty, precision_8
 
+# Broadie-Glasserman continuity correction, -zeta(1/2) / sqrt(2 * pi)
+BG_BETA = 0.5826
+
 
 class PositionBarrier(Barrier):
     """
@@ -59,16 +62,165 @@ class PositionBarrier(Barrier):
             return self.precision.less_equal \
                 if self.inclusive else self.precision.less
 
-    def observe(self, date: dt.date, price: Union[Numerical, np.array]
-                ) -> Union[bool, np.array]:
+    def observe(self, date: dt.date, price: Union[Numerical, np.array],
+                out: Optional[np.ndarray] = None) -> Union[bool, np.array]:
+        position = self._position_on_date(date)
+        return self._compare_func(price, position, out=out)
+
+    def observe_smooth(self, date: dt.date, price: Union[Numerical, np.array],
+                       width: Numerical) -> Union[Numerical, np.array]:
+        """
+        smoothed trigger probability, a logistic function of the log distance
+        between price and barrier position, used by pathwise sensitivities
+
+        parameters
+        ----------
+        date: observe date
+        price: asset price or performance
+        width: smoothing width in log-price, 0 falls back to observe
+
+        returns
+        -------
+        trigger probability between 0 and 1
+        """
+        if width <= 0:
+            return self.observe(date, price).astype(float)
         position = self._position_on_date(date)
-        return self._compare_func(price, position)
+        distance = np.log(np.divide(price, position))
+        if self.direction == 'lower':
+            distance = - distance
+        return 0.5 * (1 + np.tanh(0.5 * distance / width))
+
+    def smooth_derivative(self, date: dt.date,
+                          price: Union[Numerical, np.array],
+                          width: Numerical) -> Union[Numerical, np.array]:
+        """
+        derivative of observe_smooth in price, used by pathwise sensitivities
+
+        parameters
+        ----------
+        date: observe date
+        price: asset price or performance
+        width: smoothing width in log-price, 0 gives 0 as observe is flat
+            almost everywhere
+
+        returns
+        -------
+        change of the trigger probability per unit price
+        """
+        if width <= 0:
+            return np.zeros_like(price, dtype=float)
+        probability = self.observe_smooth(date, price, width)
+        derivative = probability * (1 - probability) / (width * price)
+        return - derivative if self.direction == 'lower' else derivative
+
+    def crossing_probability(self, beg_date: dt.date, end_date: dt.date,
+                             beg_price: Union[Numerical, np.array],
+                             end_price: Union[Numerical, np.array],
+                             vol: Numerical,
+                             continuity_correction: bool = False
+                             ) -> Union[None, Numerical, np.array]:
+        """
+        probability that a lognormal path pinned at beg_price and end_price
+        hits the barrier strictly between beg_date and end_date
+        the Brownian bridge gives exp(-2 * a * b / (vol ** 2 * t)) with a, b
+        the log distances of both ends to the barrier, which assumes
+        the barrier is observed continuously over the interval
+
+        parameters
+        ----------
+        beg_date: start of the interval
+        end_date: end of the interval
+        beg_price: asset price or performance on beg_date
+        end_price: asset price or performance on end_date
+        vol: volatility
+        continuity_correction: move the barrier away by
+            exp(BG_BETA * vol * sqrt(dt)), dt the mean spacing of the observe
+            dates in the interval, so that the continuous probability
+            matches discrete observation (Broadie-Glasserman)
+
+        returns
+        -------
+        hit probability, None if no observe date falls in the interval
+        """
+        dates = [date for date in self.observe_dates
+                 if beg_date < date < end_date]
+        if not dates:
+            return None
+        t = (end_date - beg_date).days / 365
+        position = self._position_on_date(dates[-1])
+        sign = 1 if self.direction == 'upper' else -1
+        if continuity_correction:
+            position *= np.exp(sign * BG_BETA * vol
+                               * np.sqrt(t / (len(dates) + 1)))
+        a = np.maximum(- sign * np.log(np.divide(beg_price, position)), 0)
+        b = np.maximum(- sign * np.log(np.divide(end_price, position)), 0)
+        return np.exp(-2 * a * b / (vol ** 2 * t))
+
+    def restrict(self, dates: List[dt.date]) -> 'PositionBarrier':
+        """same barrier observed only on its observe dates within dates"""
+        dates = set(dates)
+        observe_dates = [date for date in self.observe_dates if date in dates]
+        position = self.position
+        if isinstance(position, dict):
+            position = [position[date] for date in observe_dates]
+        return self.__class__(position, observe_dates,
+                              self.direction, self.inclusive)
+
+    def __copy__(self) -> 'PositionBarrier':
+        """same barrier not sharing its observe dates and positions"""
+        inst = self.__class__.__new__(self.__class__)
+        inst.__dict__.update(self.__dict__)
+        inst.observe_dates = list(self.observe_dates)
+        if isinstance(self.position, dict):
+            inst.position = dict(self.position)
+        return inst
+
+    def positions(self, schedule: List[dt.date]) -> np.ndarray:
+        """
+        barrier position on each date of schedule as an array,
+        nan on the dates the barrier does not observe
+        """
+        observe_dates = set(self.observe_dates)
+        return np.array([self._position_on_date(date)
+                         if date in observe_dates else np.nan
+                         for date in schedule], dtype=float)
+
+    def first_hit(self, schedule: List[dt.date], price: np.ndarray,
+                  positions: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        schedule index of the first trigger of each path, all dates
+        compared at once against the schedule-aligned positions
+
+        parameters
+        ----------
+        schedule: dates of the price columns
+        price: array of shape (num_of_path, len(schedule))
+        positions: positions(schedule) if already known,
+            see ObservationCalendar.position
+
+        returns
+        -------
+        array of shape (num_of_path, ), len(schedule) for paths that never
+            trigger, so that an earlier event has the smaller index
+        """
+        if positions is None:
+            positions = self.positions(schedule)
+        column = np.flatnonzero(~np.isnan(positions))
+        if len(column) == 0:
+            return np.full(len(price), len(schedule), dtype=np.intp)
+        if len(column) < len(schedule):
+            price = price[:, column]
+        hit = self._compare_func(price, positions[column])
+        first = np.argmax(hit, axis=1)
+        return np.where(hit[np.arange(len(price)), first],
+                        column[first], len(schedule))
 
     def observe_func(self, date: dt.date) -> Callable:
         position = self._position_on_date(date)
 
-        def func(price: Numerical) -> bool:
-            return self._compare_func(price, position)
+        def func(price: Numerical, out: Optional[np.ndarray] = None) -> bool:
+            return self._compare_func(price, position, out=out)
 
         return func
 
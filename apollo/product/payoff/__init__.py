@@ -9,6 +9,9 @@ from .simple_payoff import (
     ConstantPayoff,
     DeltaOnePayoff,
 )
+from .payoff_table import (
+    PayoffTable,
+)
 
 
 if __name__ == '__main__':
@@ -1,12 +1,53 @@
 """doc string"""
 
 import abc
-from typing import Optional
+import math
+import numpy as np
+from typing import Callable, List, Optional, Tuple
 from apollo.utils import Numerical
+from apollo.product.payoff.basic_functions import PiecewiseLinear
+
+
+class CompiledPayoff:
+    """
+    sum of basic function formulas with accrual scaling and rounding,
+    a plain class rather than a closure so compiled payoffs pickle
+    """
+
+    def __init__(self,
+                 formula: List[Callable[[Numerical], Numerical]],
+                 coef: float = 1,
+                 rounding: Optional[int] = None):
+        """
+        parameters
+        ----------
+        formula: formulas of the basic functions, summed
+        coef: accrual scaling of the sum
+        rounding: rounding digit, None means no rounding
+        """
+        self.formula = formula
+        self.coef = coef
+        self.rounding = rounding
+
+    def __call__(self, price: Numerical) -> Numerical:
+        value = self.formula[0](price)
+        for func in self.formula[1:]:
+            value = value + func(price)
+        if self.coef != 1:
+            value = value * self.coef
+        if self.rounding:
+            value = np.round(value, self.rounding)
+        return value
 
 
 class Payoff(metaclass=abc.ABCMeta):
-    """payoff base class"""
+    """
+    payoff base class
+    the payoff compiles once into a vectorized callable over prices,
+    recompiled after any parameter in _mapping or the accrual and rounding
+    settings is reassigned, in-place changes of array parameters are not seen
+    each such change bumps version, so PayoffTable restacks
+    """
     _func_cls = None
     _mapping = {
         'level': 'rate',
@@ -15,6 +56,7 @@ class Payoff(metaclass=abc.ABCMeta):
         'sign': '_sign',
         'inclusive': 'inclusive'
     }
+    _settings = {'rounding', 'accrual_basis', 'accrual_days'}
 
     def __init__(self,
                  rounding: Optional[int] = None,
@@ -34,23 +76,109 @@ class Payoff(metaclass=abc.ABCMeta):
         self.accrual_basis = accrual_basis
         self.accrual_days = accrual_days
 
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in self._settings or name in self._mapping.values():
+            self.__dict__.pop('_compiled', None)
+            self.__dict__['_version'] = self.__dict__.get('_version', 0) + 1
+
+    @property
+    def version(self) -> int:
+        """number of parameter changes, see PayoffTable"""
+        return self.__dict__.get('_version', 0)
+
+    def __copy__(self) -> 'Payoff':
+        # bypasses __setattr__, the compiled payoff stays valid
+        inst = self.__class__.__new__(self.__class__)
+        inst.__dict__.update(self.__dict__)
+        return inst
+
     def payoff(self, price: Numerical) -> Numerical:
         """
         get payoff of given asset price
 
         parameters
         ----------
-        price: asset price or performance
+        price: asset price or performance, scalar or array
 
         returns
         -------
         payoff value
         """
-        payoff = self._payoff_impl(price)
-        payoff = payoff * self.accrual_days / self.accrual_basis
-        if self.rounding:
-            payoff = round(payoff, self.rounding)
-        return payoff
+        return self.compiled(price)
+
+    def derivative(self, price: Numerical) -> Numerical:
+        """
+        derivative of the payoff in price, the slope of piecewise,
+        rounding and jumps are ignored, used by pathwise sensitivities
+
+        parameters
+        ----------
+        price: asset price or performance, scalar or array
+        """
+        return self.piecewise().derivative(price)
+
+    @property
+    def compiled(self) -> Callable[[Numerical], Numerical]:
+        """cached compile, see compile"""
+        compiled = self.__dict__.get('_compiled')
+        if compiled is None:
+            compiled = self.compile()
+            self.__dict__['_compiled'] = compiled
+        return compiled
+
+    def compile(self) -> Callable[[Numerical], Numerical]:
+        """
+        vectorized payoff over prices with the basic functions built once
+        and accrual scaling and rounding folded in
+
+        returns
+        -------
+        CompiledPayoff, function of price, scalar or array
+        """
+        coef = self.accrual_days / self.accrual_basis
+        if len(self._func_cls) > 1:
+            # several functions cost one evaluation once merged
+            formula = [self.piecewise().formula]
+            coef = 1
+        else:
+            kls_param = self._parameter_mapping()
+            formula = [kls(**kls_param).formula for kls in self._func_cls]
+        return CompiledPayoff(formula, coef, self.rounding)
+
+    def piecewise(self) -> PiecewiseLinear:
+        """
+        payoff before rounding as one PiecewiseLinear, the sum of its basic
+        functions scaled by accrual
+        """
+        kls_param = self._parameter_mapping()
+        function = sum(kls(**kls_param).to_piecewise()
+                       for kls in self._func_cls)
+        return function * (self.accrual_days / self.accrual_basis)
+
+    def expectation(self, forward: float, vol: float, rate: float,
+                    maturity: float) -> Tuple[float, float, float]:
+        """
+        closed form discounted expectation of the payoff at maturity
+        under Black-Scholes, exact for any sum of the basic functions,
+        rounding is ignored, see PiecewiseLinear.lognormal_expectation
+
+        parameters
+        ----------
+        forward: forward price of the asset at maturity
+        vol: annualised volatility
+        rate: continuously compounded risk free rate
+        maturity: time to maturity in years
+
+        returns
+        -------
+        value, delta to forward and vega, spot delta is
+            delta * forward / spot
+        """
+        df = math.exp(- rate * maturity)
+        value, delta, vega = self.piecewise().lognormal_expectation(
+            forward, vol, maturity)
+        return df * value, df * delta, df * vega
 
     def _parameter_mapping(self):
         param = {}
@@ -59,14 +187,6 @@ class Payoff(metaclass=abc.ABCMeta):
                 param[k] = getattr(self, v)
         return param
 
-    def _payoff_impl(self, price: Numerical) -> Numerical:
-        kls_param = self._parameter_mapping()
-        payoff = 0
-        for kls in self._func_cls:
-            inst = kls(**kls_param)
-            payoff += inst.formula(price)
-        return payoff
-
     def __repr__(self):
         return self.__class__.__name__
 
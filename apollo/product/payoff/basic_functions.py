@@ -1,6 +1,8 @@
+import math
 import numpy as np
 from abc import ABCMeta, abstractmethod
-from apollo.utils import Numerical
+from typing import Optional, Sequence, Tuple
+from apollo.utils import Numerical, norm_cdf
 
 
 class FunctionBase(metaclass=ABCMeta):
@@ -12,6 +14,34 @@ class FunctionBase(metaclass=ABCMeta):
     def formula(self, *args, **kwargs):
         pass
 
+    @abstractmethod
+    def to_piecewise(self) -> 'PiecewiseLinear':
+        """
+        the function as a PiecewiseLinear, the form payoffs are summed,
+        compiled and integrated in, see Payoff.piecewise
+        """
+        pass
+
+    # arithmetic goes through the piecewise linear form
+    def __add__(self, other) -> 'PiecewiseLinear':
+        return self.to_piecewise() + other
+
+    __radd__ = __add__
+
+    def __mul__(self, scale: Numerical) -> 'PiecewiseLinear':
+        return self.to_piecewise() * scale
+
+    __rmul__ = __mul__
+
+    def __neg__(self) -> 'PiecewiseLinear':
+        return self.to_piecewise() * -1
+
+    def __sub__(self, other) -> 'PiecewiseLinear':
+        return self.to_piecewise() + (- other)
+
+    def __rsub__(self, other) -> 'PiecewiseLinear':
+        return (- self.to_piecewise()) + other
+
 
 class Constant(FunctionBase):
     """constant function"""
@@ -26,6 +56,9 @@ class Constant(FunctionBase):
     def formula(self, *args, **kwargs):
         return self.level
 
+    def to_piecewise(self) -> 'PiecewiseLinear':
+        return PiecewiseLinear([], [0], [], [], level=self.level)
+
 
 class Linear(FunctionBase):
     """linear function"""
@@ -42,6 +75,10 @@ class Linear(FunctionBase):
     def formula(self, x: Numerical):
         return self.slope * (x - self.origin)
 
+    def to_piecewise(self) -> 'PiecewiseLinear':
+        return PiecewiseLinear([], [self.slope], [], [],
+                               level=- self.slope * self.origin)
+
 
 class Step(FunctionBase):
     """step function"""
@@ -65,14 +102,23 @@ class Step(FunctionBase):
         self.inclusive = inclusive
         super().__init__(*args, **kwargs)
 
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        self.__dict__.pop('_piecewise', None)
+
     def formula(self, x: Numerical):
-        return np.piecewise(x,
-                            [x * self.sign < self.origin * self.sign,
-                             x == self.origin,
-                             x * self.sign > self.origin * self.sign],
-                            [0.0,
-                             self.level if self.inclusive else 0.0,
-                             self.level])
+        # piecewise form built once, rebuilt after any attribute changes
+        piecewise = self.__dict__.get('_piecewise')
+        if piecewise is None:
+            piecewise = self.__dict__['_piecewise'] = self.to_piecewise()
+        return piecewise.formula(x)
+
+    def to_piecewise(self) -> 'PiecewiseLinear':
+        if self.sign >= 0:
+            return PiecewiseLinear([self.origin], [0, 0], [self.level],
+                                   [self.inclusive])
+        return PiecewiseLinear([self.origin], [0, 0], [- self.level],
+                               [not self.inclusive], level=self.level)
 
 
 class Ramp(FunctionBase):
@@ -94,7 +140,302 @@ class Ramp(FunctionBase):
         super().__init__(*args, **kwargs)
 
     def formula(self, x: Numerical):
-        return max(self.sign * (x - self.origin), 0) * self.slope
+        return np.maximum(self.sign * (x - self.origin), 0) * self.slope
+
+    def to_piecewise(self) -> 'PiecewiseLinear':
+        if self.sign >= 0:
+            return PiecewiseLinear([self.origin], [0, self.slope], [0], [True])
+        return PiecewiseLinear([self.origin], [- self.slope, 0], [0], [True],
+                               level=self.slope * self.origin)
+
+
+class PiecewiseLinear(FunctionBase):
+    """
+    piecewise linear function with jumps
+    evaluated with one searchsorted and one multiply-add whatever the
+    number of pieces, so it is the common form functions and payoffs
+    are added, scaled and composed into
+    """
+    def __init__(self,
+                 breakpoints: Sequence[Numerical],
+                 slopes: Sequence[Numerical],
+                 jumps: Sequence[Numerical],
+                 inclusive: Sequence[bool],
+                 level: Numerical = 0,
+                 values: Optional[Sequence[Numerical]] = None,
+                 *args, **kwargs):
+        """
+        init
+        :param breakpoints: sorted breakpoints, n of them
+        :param slopes: slope of each of the n + 1 pieces, from the left
+        :param jumps: right limit minus left limit at each breakpoint
+        :param inclusive: the value at each breakpoint is its right limit
+            when True, else its left limit
+        :param level: value at 0 of the line of the leftmost piece
+        :param values: value at each breakpoint, overrides inclusive,
+            e.g. the mean of both limits
+        """
+        breakpoints = np.asarray(breakpoints, dtype=float)
+        slopes = np.asarray(slopes, dtype=float)
+        jumps = np.asarray(jumps, dtype=float)
+        assert len(slopes) == len(breakpoints) + 1, \
+            f'slopes dimension ({len(slopes)}) != ' \
+            f'breakpoints dimension ({len(breakpoints)}) + 1'
+        assert len(jumps) == len(breakpoints) == len(inclusive), \
+            f'jumps ({len(jumps)}) and inclusive ({len(inclusive)}) ' \
+            f'dimension != breakpoints dimension ({len(breakpoints)})'
+        assert np.all(np.diff(breakpoints) > 0), \
+            'breakpoints should be strictly increasing'
+        intercepts = np.empty(len(slopes))
+        intercepts[0] = level
+        for i, x in enumerate(breakpoints):
+            intercepts[i + 1] = intercepts[i] \
+                + (slopes[i] - slopes[i + 1]) * x + jumps[i]
+        if values is None:
+            left, right = self._limits(breakpoints, slopes, intercepts)
+            values = np.where(inclusive, right, left)
+        self._set(breakpoints, slopes, intercepts,
+                  np.asarray(values, dtype=float))
+        super().__init__(*args, **kwargs)
+
+    @classmethod
+    def from_intercepts(cls, breakpoints, slopes, intercepts,
+                        inclusive=None, values=None) -> 'PiecewiseLinear':
+        """
+        function with the line slopes * x + intercepts on each piece,
+        the value at each breakpoint given by values, else by inclusive
+        like the constructor
+        """
+        breakpoints = np.asarray(breakpoints, dtype=float)
+        slopes = np.asarray(slopes, dtype=float)
+        intercepts = np.asarray(intercepts, dtype=float)
+        if values is None:
+            left, right = cls._limits(breakpoints, slopes, intercepts)
+            values = np.where(inclusive, right, left)
+        inst = cls.__new__(cls)
+        inst._set(breakpoints, slopes, intercepts,
+                  np.asarray(values, dtype=float))
+        return inst
+
+    @staticmethod
+    def _limits(breakpoints, slopes, intercepts):
+        """left and right limits at each breakpoint"""
+        return intercepts[:-1] + slopes[:-1] * breakpoints, \
+            intercepts[1:] + slopes[1:] * breakpoints
+
+    def _set(self, breakpoints, slopes, intercepts, values):
+        self.breakpoints = breakpoints
+        self.slopes = slopes
+        self.intercepts = intercepts
+        left, right = self._limits(breakpoints, slopes, intercepts)
+        # values within rounding of a limit are that limit
+        takes_right = np.isclose(values, right, rtol=0, atol=1E-12)
+        takes_left = ~takes_right & np.isclose(values, left, rtol=0,
+                                               atol=1E-12)
+        self.values = np.where(takes_right, right,
+                               np.where(takes_left, left, values))
+        self.inclusive = takes_right
+        # a breakpoint taking its left limit moves up by one ulp, so that
+        # searchsorted on the right side lands on the left piece there
+        self._edges = np.where(takes_left, np.nextafter(breakpoints, np.inf),
+                               breakpoints)
+        # breakpoints taking neither limit are isolated points, their value
+        # replaces the one of their right piece after the lookup
+        isolated = ~(takes_right | takes_left)
+        self._points = breakpoints[isolated]
+        self._point_values = self.values[isolated]
+
+    @property
+    def jumps(self) -> np.ndarray:
+        x = self.breakpoints
+        return (self.intercepts[1:] + self.slopes[1:] * x) \
+            - (self.intercepts[:-1] + self.slopes[:-1] * x)
+
+    def piece(self, x: Numerical):
+        """
+        piece index of x, breakpoints belong to the piece of their value,
+        isolated points to their right piece
+        """
+        return np.searchsorted(self._edges, x, side='right')
+
+    def _point(self, x: Numerical):
+        """index in the isolated points of x and whether x is one"""
+        index = np.minimum(np.searchsorted(self._points, x),
+                           len(self._points) - 1)
+        return index, self._points[index] == x
+
+    def formula(self, x: Numerical):
+        piece = self.piece(x)
+        value = self.intercepts[piece] + self.slopes[piece] * x
+        if len(self._points):
+            index, hit = self._point(x)
+            value = np.where(hit, self._point_values[index], value)[()]
+        return value
+
+    def derivative(self, x: Numerical):
+        """slope of the piece of x, jumps and isolated points are ignored"""
+        return self.slopes[self.piece(x)]
+
+    def to_piecewise(self) -> 'PiecewiseLinear':
+        return self
+
+    def _combine(self, breakpoints, line) -> 'PiecewiseLinear':
+        """
+        function with given breakpoints whose pieces are given by
+        line(x) -> (slope, intercept) at a point x inside each piece and
+        whose breakpoint values follow from line at the breakpoint itself
+        """
+        breakpoints = np.unique(breakpoints)
+        if len(breakpoints):
+            inner = np.concatenate([
+                [breakpoints[0] - 1],
+                0.5 * (breakpoints[1:] + breakpoints[:-1]),
+                [breakpoints[-1] + 1]])
+        else:
+            inner = np.zeros(1)
+        slopes, intercepts = line(inner)
+        slopes = np.broadcast_to(slopes, inner.shape).astype(float)
+        intercepts = np.broadcast_to(intercepts, inner.shape).astype(float)
+        point_slopes, point_intercepts = line(breakpoints)
+        values = point_intercepts + point_slopes * breakpoints
+        return self.from_intercepts(breakpoints, slopes, intercepts,
+                                    values=values).normalized()
+
+    def normalized(self) -> 'PiecewiseLinear':
+        """
+        same function without the breakpoints it is continuous across and
+        takes its limit at
+        """
+        x = self.breakpoints
+        keep = (self.slopes[1:] != self.slopes[:-1]) \
+            | (self.intercepts[1:] != self.intercepts[:-1]) \
+            | ~(self.inclusive | (self._edges != x))
+        piece = np.concatenate([[True], keep])
+        return self.from_intercepts(x[keep], self.slopes[piece],
+                                    self.intercepts[piece],
+                                    values=self.values[keep])
+
+    def _line(self, x):
+        """line of x, constant at isolated points"""
+        piece = self.piece(x)
+        slope, intercept = self.slopes[piece], self.intercepts[piece]
+        if len(self._points):
+            index, hit = self._point(x)
+            slope = np.where(hit, 0., slope)
+            intercept = np.where(hit, self._point_values[index], intercept)
+        return slope, intercept
+
+    def __add__(self, other) -> 'PiecewiseLinear':
+        if not isinstance(other, FunctionBase):
+            other = Constant(other)
+        other = other.to_piecewise()
+
+        def line(x):
+            slope, intercept = self._line(x)
+            other_slope, other_intercept = other._line(x)
+            return slope + other_slope, intercept + other_intercept
+
+        return self._combine(
+            np.concatenate([self.breakpoints, other.breakpoints]), line)
+
+    __radd__ = __add__
+
+    def __mul__(self, scale: Numerical) -> 'PiecewiseLinear':
+        return self.from_intercepts(
+            self.breakpoints, self.slopes * scale, self.intercepts * scale,
+            values=self.values * scale).normalized()
+
+    __rmul__ = __mul__
+
+    def __neg__(self) -> 'PiecewiseLinear':
+        return self * -1
+
+    def __sub__(self, other) -> 'PiecewiseLinear':
+        return self + (- other)
+
+    def __rsub__(self, other) -> 'PiecewiseLinear':
+        return (- self) + other
+
+    def compose(self, inner: FunctionBase) -> 'PiecewiseLinear':
+        """the function of inner, x -> self(inner(x))"""
+        inner = inner.to_piecewise()
+        edges = np.concatenate([[-np.inf], inner.breakpoints, [np.inf]])
+        breakpoints = [inner.breakpoints]
+        for i, (slope, intercept) in enumerate(zip(inner.slopes,
+                                                   inner.intercepts)):
+            if slope == 0:
+                continue
+            x = (self.breakpoints - intercept) / slope
+            x = x[(x > edges[i]) & (x < edges[i + 1])]
+            breakpoints.append(self._transition(x, slope, intercept))
+
+        def line(x):
+            inner_slope, inner_intercept = inner._line(x)
+            slope, intercept = self._line(inner_intercept + inner_slope * x)
+            return slope * inner_slope, slope * inner_intercept + intercept
+
+        return self._combine(np.concatenate(breakpoints), line)
+
+    def lognormal_expectation(self, forward: float, vol: float,
+                              maturity: float) -> Tuple[float, float, float]:
+        """
+        expectation of the function of a lognormal variable S
+        S = forward * exp(vol * sqrt(maturity) * Z - 0.5 * vol ** 2 * maturity)
+        each piece contributes its intercept times the probability S lies on
+        it and its slope times the partial expectation of S there, both in
+        closed form like Black-Scholes, so any number of kinks and jumps is
+        exact, breakpoints at or below 0 are never crossed
+
+        returns
+        -------
+        expectation and its derivatives to forward and to vol
+        """
+        piece = self.piece(forward)
+        if maturity <= 0 or vol <= 0:
+            return float(self.formula(forward)), \
+                float(self.slopes[piece]), 0.
+        std = vol * math.sqrt(maturity)
+        value = self.intercepts[0] + self.slopes[0] * forward
+        delta = self.slopes[0]
+        vega = 0.
+        for i, x in enumerate(self.breakpoints):
+            d_intercept = self.intercepts[i + 1] - self.intercepts[i]
+            d_slope = self.slopes[i + 1] - self.slopes[i]
+            if x <= 0:
+                value += d_intercept + d_slope * forward
+                delta += d_slope
+                continue
+            d2 = math.log(forward / x) / std - 0.5 * std
+            d1 = d2 + std
+            n2 = math.exp(- 0.5 * d2 ** 2) / math.sqrt(2 * math.pi)
+            # forward * n(d1) == x * n(d2)
+            n1 = x * n2 / forward
+            # P(S > x) and E[S 1{S > x}]
+            value += d_intercept * norm_cdf(d2) \
+                + d_slope * forward * norm_cdf(d1)
+            delta += d_intercept * n2 / (forward * std) \
+                + d_slope * (norm_cdf(d1) + n1 / std)
+            vega -= (d_intercept * n2 * d1 + d_slope * forward * n1 * d2) / vol
+        return float(value), float(delta), float(vega)
+
+    def _transition(self, x: np.ndarray, slope: float,
+                    intercept: float) -> np.ndarray:
+        """
+        preimages x of breakpoints through slope * x + intercept moved to
+        the first float where the piece changes, as the division rounds
+        """
+        ulps = np.arange(-4, 5)
+        candidates = x[:, np.newaxis] + ulps * np.spacing(x)[:, np.newaxis]
+        piece = self.piece(intercept + slope * candidates)
+        changed = piece != piece[:, :1]
+        first = np.where(changed.any(axis=1), changed.argmax(axis=1), 4)
+        return candidates[np.arange(len(x)), first]
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} ' \
+               f'breakpoints={self.breakpoints.tolist()} ' \
+               f'values={self.values.tolist()} ' \
+               f'slopes={self.slopes.tolist()}>'
 
 
 if __name__ == '__main__':
@@ -111,5 +452,6 @@ if __name__ == '__main__':
     def combine(_x):
         return s1.formula(_x) + s2.formula(_x) + s3.formula(_x)
     print(combine(0.5))
+    print((s1 + s2 + s3).formula(np.array([0.5, 1, 1.5, 2, 2.5])))
 
 
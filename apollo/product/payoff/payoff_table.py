@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import copy
+import datetime as dt
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+from apollo.utils import Numerical
+from apollo.product.payoff.base_payoff import Payoff
+from apollo.product.payoff.simple_payoff import ConstantPayoff, DeltaOnePayoff
+from apollo.product.payoff.vanilla_payoff import VanillaPayoff
+
+
+def linear_terms(payoff: Payoff) -> Optional[Tuple[float, float, float, int]]:
+    """
+    payoff before accrual and rounding as (level, weight, strike, sign)
+    payoff = level + weight * max(sign * (S - K), 0) for sign in (-1, 1)
+    payoff = level + weight * (S - K) for sign 0
+
+    returns
+    -------
+    terms, None if the payoff has no such form
+    """
+    if type(payoff) is ConstantPayoff:
+        return payoff.rate, 0., 0., 0
+    if type(payoff) is DeltaOnePayoff:
+        return 0., payoff.weight, payoff.strike, 0
+    if isinstance(payoff, VanillaPayoff) and payoff._sign in (-1, 1):
+        return 0., payoff.weight, payoff.strike, payoff._sign
+    return None
+
+
+class PayoffTable:
+    """
+    payoffs of an observation schedule stacked into per date arrays
+    evaluates any batch of (date index, price) pairs in one call, by a
+    gather of the per date terms instead of one payoff call per date
+    payoffs are looked up by date like a dict, table[date], and the arrays
+    are restacked when a payoff changed since, see Payoff.version
+    """
+
+    def __init__(self,
+                 dates: Sequence[dt.date],
+                 payoffs: Sequence[Payoff],
+                 schedule: Optional[Sequence[dt.date]] = None):
+        """
+        parameters
+        ----------
+        dates: payoff dates
+        payoffs: payoff of each date
+        schedule: dates of the table rows, dates by default,
+            rows of schedule dates without payoff evaluate to nan
+        """
+        assert len(dates) == len(payoffs), \
+            f'dates dimension ({len(dates)}) != ' \
+            f'payoffs dimension ({len(payoffs)})'
+        self.dates: List[dt.date] = list(dates)
+        self.payoffs: List[Payoff] = list(payoffs)
+        self._payoff: Dict[dt.date, Payoff] = dict(zip(dates, payoffs))
+        self.schedule: List[dt.date] = list(
+            self.dates if schedule is None else schedule)
+        self.rows: List[Optional[Payoff]] = [self._payoff.get(date)
+                                             for date in self.schedule]
+        self._stack()
+
+    def _stack(self):
+        """per row arrays of the linear terms with accrual folded in"""
+        self._versions = [payoff.version for payoff in self.payoffs]
+        size = len(self.rows)
+        self.level = np.full(size, np.nan)
+        self.weight = np.zeros(size)
+        self.strike = np.zeros(size)
+        self.sign = np.zeros(size, dtype=np.int8)
+        rounding = {payoff.rounding for payoff in self.payoffs}
+        self.rounding = rounding.pop() if len(rounding) == 1 else None
+        # False when some payoff has no linear form or the rounding differs,
+        # evaluation then groups the batch by row
+        self.vectorized = len(rounding) == 0
+        for i, payoff in enumerate(self.rows):
+            if payoff is None:
+                continue
+            terms = linear_terms(payoff)
+            if terms is None:
+                self.vectorized = False
+                continue
+            accrual = payoff.accrual_days / payoff.accrual_basis
+            self.level[i] = terms[0] * accrual
+            self.weight[i] = terms[1] * accrual
+            self.strike[i] = terms[2]
+            self.sign[i] = terms[3]
+        for array in [self.level, self.weight, self.strike, self.sign]:
+            array.setflags(write=False)
+        self._constant = not self.weight.any()
+        # sign 0 is linear, max(1 * (S - K), -inf)
+        self._slope = np.where(self.sign == 0, 1., self.sign)
+        self._floor = np.where(self.sign == 0, -np.inf, 0.)
+
+    def _refresh(self):
+        """restack after a payoff changed"""
+        if any(payoff.version != version
+               for payoff, version in zip(self.payoffs, self._versions)):
+            self._stack()
+
+    @property
+    def coefficients(self) -> np.ndarray:
+        """array of shape (len(schedule), 4) of level, weight, strike, sign"""
+        self._refresh()
+        return np.column_stack([self.level, self.weight, self.strike,
+                                self.sign])
+
+    def align(self, schedule: Sequence[dt.date]) -> 'PayoffTable':
+        """same payoffs with rows on the dates of schedule"""
+        return self.__class__(self.dates, self.payoffs, schedule)
+
+    def __copy__(self) -> 'PayoffTable':
+        """
+        same table with its own payoff objects and lists, the read-only
+        per row arrays are shared, no restacking
+        """
+        inst = self.__class__.__new__(self.__class__)
+        inst.__dict__.update(self.__dict__)
+        payoffs = {id(payoff): copy.copy(payoff) for payoff in self.payoffs}
+        inst.dates = list(self.dates)
+        inst.payoffs = [payoffs[id(payoff)] for payoff in self.payoffs]
+        inst._payoff = dict(zip(inst.dates, inst.payoffs))
+        inst.schedule = list(self.schedule)
+        inst.rows = [inst._payoff.get(date) for date in inst.schedule]
+        return inst
+
+    def payoff(self, date_index: Numerical, price: Numerical) -> Numerical:
+        """
+        payoff of each price on its schedule date
+
+        parameters
+        ----------
+        date_index: row of each price, index in schedule
+        price: asset price or performance, same shape as date_index
+
+        returns
+        -------
+        payoff value
+        """
+        self._refresh()
+        if not self.vectorized:
+            return self._payoff_by_row(date_index, price)
+        if self._constant:
+            value = self.level[date_index]
+        else:
+            value = self.level[date_index] + self.weight[date_index] \
+                * np.maximum(self._slope[date_index]
+                             * (price - self.strike[date_index]),
+                             self._floor[date_index])
+        if self.rounding:
+            value = np.round(value, self.rounding)
+        return value
+
+    def _payoff_by_row(self, date_index, price):
+        date_index, price = np.broadcast_arrays(date_index, price)
+        value = np.full(date_index.shape, np.nan)
+        for row in np.unique(date_index):
+            payoff = self.rows[row]
+            if payoff is not None:
+                mask = date_index == row
+                value[mask] = payoff.payoff(price[mask])
+        return value if value.ndim else value[()]
+
+    def __getitem__(self, date: dt.date) -> Payoff:
+        return self._payoff[date]
+
+    def __contains__(self, date) -> bool:
+        return date in self._payoff
+
+    def __iter__(self):
+        return iter(self.dates)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} dates={len(self.dates)} ' \
+               f'rows={len(self.rows)}>'
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import numpy as np
+import datetime as dt
+from typing import List, Dict, Optional, Union
+from apollo.product.template.snowball import (
+    SnowballProduct,
+    SnowBallSimulate,
+    populate_matrix,
+    matrix_chunk_size,
+)
+
+
+class SnowballBook:
+    """
+    value many snowball contracts on one shared path set
+    paths are simulated once per underlying over the union of the
+    observation schedules of its contracts, then every contract is
+    evaluated on the columns of its own schedule
+    """
+
+    def __init__(self,
+                 parameters: List[dict],
+                 product=SnowballProduct,
+                 rate: float = 0.03,
+                 vol: Union[float, Dict[str, float]] = 0.5):
+        """
+        parameters
+        ----------
+        parameters: contract parameter dicts, see SnowBallSimulate
+            optional key 'Underlying' names the asset, default to 'default'
+        product: product class of the object engine
+        rate: risk free rate
+        vol: volatility, or a dict of volatility per underlying
+        """
+        self.rate = rate
+        self.underlying = [p.get('Underlying', 'default') for p in parameters]
+        self.vol = vol if isinstance(vol, dict) else \
+            {name: vol for name in self.underlying}
+        self.contracts = [
+            SnowBallSimulate(product, p, rate, self.vol[name])
+            for p, name in zip(parameters, self.underlying)
+        ]
+
+    def schedule(self, underlying: str) -> List[dt.date]:
+        """union of the strike dates and observation schedules on underlying"""
+        dates = set()
+        for contract, name in zip(self.contracts, self.underlying):
+            if name == underlying:
+                dates.add(contract.strike_date)
+                dates.update(contract.observer().schedule)
+        return sorted(dates)
+
+    def simulate(self, path_generator, num_of_path: int,
+                 memory_budget: int = 2 ** 27,
+                 valuation_date: Optional[dt.date] = None) -> np.ndarray:
+        """
+        monte carlo pv of every contract on shared paths
+        each underlying starts from 1 at the earliest strike date on it,
+        a contract observes its performance against its own strike date
+        and is discounted to it, as when simulated on its own
+
+        parameters
+        ----------
+        path_generator: random source providing get_matrix
+        num_of_path: number of simulated paths per underlying
+        memory_budget: bytes of one underlying path matrix per chunk
+        valuation_date: discount every contract to this date instead
+
+        returns
+        -------
+        array of pv, one per contract in input order
+        """
+        pv_sum = np.zeros(len(self.contracts))
+        for underlying in sorted(set(self.underlying)):
+            schedule = self.schedule(underlying)
+            start_date = schedule[0]
+            year_fraction = np.diff(
+                [0] + [(date - start_date).days for date in schedule]) / 365
+            plan = []
+            for i, contract in enumerate(self.contracts):
+                if self.underlying[i] != underlying:
+                    continue
+                observer = contract.observer()
+                column = np.searchsorted(schedule, observer.schedule)
+                strike = schedule.index(contract.strike_date)
+                df = contract.discount_factor(observer.schedule,
+                                              valuation_date)
+                plan.append((i, contract, observer, column, strike, df))
+            chunk_size = matrix_chunk_size(len(schedule), memory_budget,
+                                           path_generator=path_generator)
+            for beg in range(0, num_of_path, chunk_size):
+                size = min(chunk_size, num_of_path - beg)
+                price = populate_matrix(
+                    path_generator.get_matrix(size, len(schedule)),
+                    year_fraction, self.rate, self.vol[underlying])
+                for i, contract, observer, column, strike, df in plan:
+                    performance = price[:, column] / price[:, [strike]]
+                    state = contract.evaluate_matrix(observer, performance)
+                    pv_sum[i] += np.sum(contract.calculate_pv_array(
+                        state, observer.schedule, df))
+        return pv_sum / num_of_path
+
+    def __len__(self):
+        return len(self.contracts)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} contracts={len(self)} ' \
+               f'underlyings={len(set(self.underlying))}>'
+
+
+if __name__ == '__main__':
+    pass
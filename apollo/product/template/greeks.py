@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import time
+import datetime as dt
+import numpy as np
+from typing import Dict
+from apollo.simulation import RunningStatistics
+from apollo.product.template.snowball import matrix_chunk_size
+
+
+class GreeksResult:
+    """price and sensitivities with their standard errors"""
+    names = ['price', 'delta', 'gamma', 'vega', 'theta']
+
+    def __init__(self, stats: Dict[str, RunningStatistics], method: str,
+                 elapsed: float):
+        """
+        parameters
+        ----------
+        stats: running statistics of the per-path samples of each measure
+        method: estimator used for the sensitivities
+        elapsed: wall time in seconds
+        """
+        self.stats = stats
+        self.method = method
+        self.elapsed = elapsed
+        for name in self.names:
+            setattr(self, name, stats[name].mean)
+        self.std_error = {name: stats[name].std_error for name in self.names}
+        self.num_of_path = stats['price'].count
+
+    def __repr__(self):
+        description = ' '.join(f'{name}={getattr(self, name):.6f}'
+                               f'({self.std_error[name]:.1e})'
+                               for name in self.names)
+        return f'<{self.__class__.__name__} {self.method} {description}>'
+
+
+class SnowballGreeks:
+    """
+    price, delta, gamma, vega and theta of a snowball in a single pass
+    all measures are estimated on the same normals, chunk by chunk
+
+    spot is the performance the paths start from, 1 at strike date,
+    delta and gamma are per unit performance, vega per unit volatility,
+    theta the value change over one calendar day
+    """
+
+    def __init__(self,
+                 simulate,
+                 method: str = 'pathwise',
+                 spot_bump: float = 0.01,
+                 smoothing: float = 0.005):
+        """
+        parameters
+        ----------
+        simulate: SnowBallSimulate of the contract
+        method: 'pathwise' differentiates the discounted payoff along each
+                path in spot and volatility, KO/KI indicators are smoothed
+                over a log-price band so the payoff is differentiable,
+                see SnowBallSimulate.smooth_pv, gamma is the central
+                difference of the pathwise delta on common random numbers
+            'likelihood_ratio' weights the exact payoff by the score of the
+                path density, unbiased through the barriers but noisier,
+                especially gamma when the first step is short
+            theta revalues the paths one day later with both methods
+        spot_bump: relative spot bump of the gamma difference,
+            'pathwise' only
+        smoothing: barrier smoothing width in log-price, 'pathwise' only
+        """
+        assert method in ['pathwise', 'likelihood_ratio'], \
+            f"method should be either 'pathwise' or 'likelihood_ratio', " \
+            f"got '{method}'"
+        assert simulate.assets is None, \
+            'greeks are computed on a single underlying'
+        self.simulate = simulate
+        self.method = method
+        self.spot_bump = spot_bump
+        self.smoothing = smoothing
+
+    def compute(self, path_generator, num_of_path: int,
+                memory_budget: int = 2 ** 27) -> GreeksResult:
+        """
+        parameters
+        ----------
+        path_generator: random source providing get_matrix
+        num_of_path: number of simulated paths
+        memory_budget: bytes of the path matrices per chunk
+
+        returns
+        -------
+        GreeksResult
+        """
+        beg = time.perf_counter()
+        sim = self.simulate
+        observer = sim.observer()
+        schedule = observer.schedule
+        stats = {name: RunningStatistics() for name in GreeksResult.names}
+        chunk_size = matrix_chunk_size(len(schedule), memory_budget // 3,
+                                       path_generator=path_generator)
+        for chunk_beg in range(0, num_of_path, chunk_size):
+            size = min(chunk_size, num_of_path - chunk_beg)
+            normal = path_generator.get_matrix(size, len(schedule))
+            if self.method == 'pathwise':
+                sample = self._pathwise(observer, normal)
+            else:
+                sample = self._likelihood_ratio(observer, normal)
+            for name, value in sample.items():
+                stats[name].update(value)
+        return GreeksResult(stats, self.method, time.perf_counter() - beg)
+
+    def _price(self, normal, year_fraction, vol, spot=1):
+        sim = self.simulate
+        log_path = np.multiply(normal, np.sqrt(year_fraction)).cumsum(axis=1)
+        log_path *= vol
+        log_path += (sim.rate - 0.5 * vol ** 2) * np.cumsum(year_fraction)
+        return np.multiply(spot, np.exp(log_path, out=log_path), out=log_path)
+
+    def _pathwise(self, observer, normal):
+        sim = self.simulate
+        schedule = observer.schedule
+        year_fraction = sim.year_fraction(schedule)
+        df = sim.discount_factor(schedule)
+        h, width = self.spot_bump, self.smoothing
+
+        price = self._price(normal, year_fraction, sim.vol)
+        state = sim.evaluate_matrix(observer, price)
+        pv = sim.calculate_pv_array(state, schedule, df)
+        # d price / d spot is price, d price / d vol is price * (W - vol t)
+        price_vol = np.multiply(normal, np.sqrt(year_fraction)).cumsum(axis=1)
+        price_vol -= sim.vol * np.cumsum(year_fraction)
+        price_vol *= price
+        base, (delta, vega) = sim.smooth_pv(observer, price, df, width,
+                                            [price, price_vol])
+        delta_up = sim.smooth_pv(observer, price * (1 + h), df, width,
+                                 [price])[1][0]
+        delta_down = sim.smooth_pv(observer, price * (1 - h), df, width,
+                                   [price])[1][0]
+
+        valuation_date = sim.strike_date + dt.timedelta(days=1)
+        theta = sim.smooth_pv(
+            observer,
+            self._price(normal, sim.year_fraction(schedule, valuation_date),
+                        sim.vol),
+            sim.discount_factor(schedule, valuation_date), width)
+        return {
+            'price': pv,
+            'delta': delta,
+            'gamma': (delta_up - delta_down) / (2 * h),
+            'vega': vega,
+            'theta': theta - base,
+        }
+
+    def _likelihood_ratio(self, observer, normal):
+        sim = self.simulate
+        schedule = observer.schedule
+        year_fraction = sim.year_fraction(schedule)
+        vol = sim.vol
+        step = year_fraction > 0
+        first = np.argmax(step)
+        z = normal[:, first].copy()
+        sqrt_t = np.sqrt(year_fraction[first])
+        drift = sim.rate - 0.5 * vol ** 2
+        score_vega = np.sum((normal[:, step] ** 2 - 1) / vol
+                            - normal[:, step] * np.sqrt(year_fraction[step]),
+                            axis=1)
+
+        price = self._price(normal, year_fraction, vol)
+        pv = sim.calculate_pv_array(
+            sim.evaluate_matrix(observer, price), schedule)
+
+        score_delta = z / (vol * sqrt_t)
+        score_gamma = (z ** 2 - 1) / (vol * sqrt_t) ** 2 - score_delta
+        score_time = - 0.5 / sqrt_t ** 2 + drift * z / (vol * sqrt_t) \
+            + 0.5 * z ** 2 / sqrt_t ** 2
+        return {
+            'price': pv,
+            'delta': pv * score_delta,
+            'gamma': pv * score_gamma,
+            'vega': pv * score_vega,
+            'theta': pv * (sim.rate - score_time) / 365,
+        }
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {self.method}>'
+
+
+if __name__ == '__main__':
+    pass
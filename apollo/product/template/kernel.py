@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import math
+import threading
+import multiprocessing
+import numpy as np
+from typing import Optional, Tuple
+from apollo.product.payoff.payoff_table import linear_terms
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+HAS_NUMBA = numba is not None
+# paths per block of the fused kernel
+BLOCK_SIZE = 512
+
+
+def payoff_coefficients(payoff) -> Optional[Tuple[float, float, float, int]]:
+    """
+    payoff as (level, weight, strike, sign) for the fused kernel
+    payoff = level + weight * max(sign * (S - K), 0) for sign in (-1, 1)
+    payoff = level + weight * (S - K) for sign 0
+    accrual is folded into level and weight
+
+    returns
+    -------
+    coefficients, None if the payoff has no such form or is rounded
+    """
+    terms = linear_terms(payoff)
+    if payoff.rounding or terms is None:
+        return None
+    accrual = payoff.accrual_days / payoff.accrual_basis
+    level, weight, strike, sign = terms
+    return level * accrual, weight * accrual, strike, sign
+
+
+if HAS_NUMBA:
+    @numba.njit(cache=True, inline='always')
+    def _trigger(price, position, upper, inclusive, atol):
+        # same decision as NumberCompare with absolute tolerance atol
+        if abs(price - position) <= atol:
+            return inclusive
+        return price > position if upper else price < position
+
+    @numba.njit(cache=True, inline='always')
+    def _payoff(price, level, weight, strike, sign):
+        if sign == 0:
+            return level + weight * (price - strike)
+        return level + weight * max(sign * (price - strike), 0.)
+
+    @numba.njit(cache=True, nogil=True)
+    def _fused_block(beg, end, normal, scale, drift,
+                     ko_flag, ko_position, ko_coef, ko_upper, ko_inclusive,
+                     ki_flag, ki_position, ki_upper, ki_inclusive,
+                     maturity_index, ki_coef, mat_coef, atol,
+                     state, settle_index, amount):
+        # paths beg to end of fused_kernel, date by date
+        num_of_date = normal.shape[1]
+        # log-prices and steps in the dtype of the normals, steps rounded
+        # like populate_matrix, which computes them against float64 scale
+        log_price = np.zeros(end - beg, dtype=normal.dtype)
+        log_step = np.zeros(1, dtype=normal.dtype)
+        knocked_in = np.zeros(end - beg, dtype=np.bool_)
+        live = np.ones(end - beg, dtype=np.bool_)
+        num_of_live = end - beg
+        for i in range(num_of_date):
+            if num_of_live == 0:
+                break
+            for j in range(end - beg):
+                if not live[j]:
+                    continue
+                p = beg + j
+                log_step[0] = normal[p, i] * scale[i]
+                log_step[0] += drift[i]
+                log_price[j] += log_step[0]
+                price = math.exp(log_price[j])
+                if ko_flag[i] and _trigger(price, ko_position[i],
+                                           ko_upper, ko_inclusive, atol):
+                    state[p] = 2
+                    settle_index[p] = i
+                    amount[p] = _payoff(price, ko_coef[i, 0],
+                                        ko_coef[i, 1], ko_coef[i, 2],
+                                        ko_coef[i, 3])
+                    live[j] = False
+                    num_of_live -= 1
+                    continue
+                if ki_flag[i] and _trigger(price, ki_position[i],
+                                           ki_upper, ki_inclusive, atol):
+                    knocked_in[j] = True
+                if i == maturity_index:
+                    settle_index[p] = i
+                    if knocked_in[j]:
+                        state[p] = 1
+                        amount[p] = _payoff(price, ki_coef[0],
+                                            ki_coef[1], ki_coef[2],
+                                            ki_coef[3])
+                    else:
+                        amount[p] = _payoff(price, mat_coef[0],
+                                            mat_coef[1], mat_coef[2],
+                                            mat_coef[3])
+                    live[j] = False
+                    num_of_live -= 1
+
+    @numba.njit(cache=True, parallel=True, nogil=True)
+    def _fused_parallel(normal, *args):
+        num_of_path = normal.shape[0]
+        num_of_block = (num_of_path + BLOCK_SIZE - 1) // BLOCK_SIZE
+        for block in numba.prange(num_of_block):
+            beg = block * BLOCK_SIZE
+            _fused_block(beg, min(beg + BLOCK_SIZE, num_of_path),
+                         normal, *args)
+
+    @numba.njit(cache=True, nogil=True)
+    def _fused_serial(normal, *args):
+        num_of_path = normal.shape[0]
+        for beg in range(0, num_of_path, BLOCK_SIZE):
+            _fused_block(beg, min(beg + BLOCK_SIZE, num_of_path),
+                         normal, *args)
+
+    def fused_kernel(normal, scale, drift,
+                     ko_flag, ko_position, ko_coef, ko_upper, ko_inclusive,
+                     ki_flag, ki_position, ki_upper, ki_inclusive,
+                     maturity_index, ki_coef, mat_coef, atol,
+                     state, settle_index, amount):
+        """
+        evolve, observe and settle paths in one pass over their normals
+        without intermediate arrays, same decisions as evaluate_matrix
+        the normals are drawn by the caller, that draw is not fused
+        paths are processed in blocks, date by date within a block, so the
+        column-major normals are read contiguously and stay in cache
+        blocks run in parallel only on the main thread of a process that
+        is not a multiprocessing worker, elsewhere the caller already
+        parallelises and the workqueue threading layer of numba is not
+        threadsafe, so they run serially
+
+        parameters
+        ----------
+        normal: standard normals of shape (num_of_path, num_of_date),
+            log-prices and prices are computed in their dtype
+        scale, drift: log-price step is normal * scale + drift
+        ko_flag, ko_position, ko_coef: 'KO' date flag, position and payoff
+            coefficients per date, see payoff_coefficients
+        ki_flag, ki_position: 'KI' date flag and position per date
+        *_upper, *_inclusive: barrier direction and inclusiveness
+        maturity_index: schedule index of maturity
+        ki_coef, mat_coef: knock-in and maturity payoff coefficients
+        atol: absolute tolerance of the barrier comparison
+        state, settle_index, amount: SnowballPathState arrays, filled
+        """
+        kernel = _fused_parallel \
+            if multiprocessing.parent_process() is None \
+            and threading.current_thread() is threading.main_thread() \
+            else _fused_serial
+        kernel(normal, scale, drift,
+               ko_flag, ko_position, ko_coef, ko_upper, ko_inclusive,
+               ki_flag, ki_position, ki_upper, ki_inclusive,
+               maturity_index, ki_coef, mat_coef, atol,
+               state, settle_index, amount)
+else:
+    fused_kernel = None
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import csv
+import numpy as np
+import datetime as dt
+from typing import Dict, List, Optional, Sequence
+
+
+class CashflowLedger:
+    """
+    columnar cashflows of a batch of paths
+    one row per cashflow: path index, schedule date index, tag code, amount
+    """
+
+    def __init__(self,
+                 path_index: np.ndarray,
+                 date_index: np.ndarray,
+                 tag: np.ndarray,
+                 amount: np.ndarray,
+                 num_of_path: int,
+                 schedule: Sequence[dt.date],
+                 tags: Sequence[str]):
+        """
+        parameters
+        ----------
+        path_index: path of each cashflow
+        date_index: schedule date index of each cashflow
+        tag: tag code of each cashflow, index into tags
+        amount: undiscounted amount of each cashflow
+        num_of_path: number of paths, including paths without cashflow
+        schedule: observation schedule the date indices refer to
+        tags: tag names
+        """
+        self.path_index = np.asarray(path_index, dtype=np.intp)
+        self.date_index = np.asarray(date_index, dtype=np.intp)
+        self.tag = np.asarray(tag, dtype=np.int8)
+        self.amount = np.asarray(amount, dtype=float)
+        self.num_of_path = num_of_path
+        self.schedule = list(schedule)
+        self.tags = list(tags)
+
+    @classmethod
+    def concatenate(cls, ledgers: List['CashflowLedger']) -> 'CashflowLedger':
+        """ledger of consecutive path batches on the same schedule"""
+        offset = np.cumsum([0] + [ledger.num_of_path for ledger in ledgers])
+        return cls(
+            np.concatenate([ledger.path_index + beg
+                            for ledger, beg in zip(ledgers, offset)]),
+            np.concatenate([ledger.date_index for ledger in ledgers]),
+            np.concatenate([ledger.tag for ledger in ledgers]),
+            np.concatenate([ledger.amount for ledger in ledgers]),
+            int(offset[-1]), ledgers[0].schedule, ledgers[0].tags,
+        )
+
+    def discounted(self, df: np.ndarray) -> np.ndarray:
+        """
+        discounted amount of each cashflow
+
+        parameters
+        ----------
+        df: discount factor of each schedule date, computed once per date
+        """
+        return self.amount * np.asarray(df)[self.date_index]
+
+    def path_pv(self, df: np.ndarray) -> np.ndarray:
+        """discounted payoff of each path"""
+        return np.bincount(self.path_index, weights=self.discounted(df),
+                           minlength=self.num_of_path)
+
+    def pv(self, df: np.ndarray) -> float:
+        """average discounted payoff over paths"""
+        return np.sum(self.discounted(df)) / self.num_of_path
+
+    def pv_by_tag(self, df: np.ndarray) -> Dict[str, float]:
+        """average discounted payoff over paths, broken down by tag"""
+        pv = np.bincount(self.tag, weights=self.discounted(df),
+                         minlength=len(self.tags)) / self.num_of_path
+        return dict(zip(self.tags, pv))
+
+    def to_records(self, df: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        cashflows as a structured array for audit
+
+        parameters
+        ----------
+        df: discount factor of each schedule date, adds a 'pv' column
+        """
+        fields = [('path', np.intp), ('date', 'datetime64[D]'),
+                  ('tag', object), ('amount', float)]
+        if df is not None:
+            fields.append(('pv', float))
+        records = np.empty(len(self), dtype=fields)
+        records['path'] = self.path_index
+        records['date'] = np.array(self.schedule,
+                                   dtype='datetime64[D]')[self.date_index]
+        records['tag'] = np.array(self.tags, dtype=object)[self.tag]
+        records['amount'] = self.amount
+        if df is not None:
+            records['pv'] = self.discounted(df)
+        return records
+
+    def to_csv(self, path: str, df: Optional[np.ndarray] = None):
+        """write the cashflows to a csv file for audit, see to_records"""
+        records = self.to_records(df)
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(records.dtype.names)
+            writer.writerows(records.tolist())
+
+    def __len__(self):
+        return len(self.amount)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} cashflows={len(self)} ' \
+               f'paths={self.num_of_path}>'
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import time
+import datetime as dt
+import numpy as np
+from typing import Dict, List
+from apollo.product.template.snowball import SnowballProduct, SnowBallSimulate
+
+try:
+    from scipy.linalg.lapack import dgttrf, dgttrs
+except ImportError:
+    dgttrf = dgttrs = None
+
+
+class PDEResult:
+    """price, delta and gamma read off the grid at the strike date"""
+    names = ['price', 'delta', 'gamma']
+
+    def __init__(self, x: np.ndarray, value: np.ndarray, spot: float,
+                 elapsed: float):
+        """
+        parameters
+        ----------
+        x: log-performance nodes
+        value: not knocked-in value on the nodes
+        spot: performance the measures are read at, 1 at strike
+        elapsed: wall time in seconds
+        """
+        self.x = x
+        self.value = value
+        self.spot = spot
+        self.elapsed = elapsed
+        value_x = np.gradient(value, x)
+        value_xx = np.gradient(value_x, x)
+        log_spot = np.log(spot)
+        self.price = np.interp(log_spot, x, value)
+        self.delta = np.interp(log_spot, x, value_x) / spot
+        self.gamma = np.interp(log_spot, x, value_xx - value_x) / spot ** 2
+
+    def at(self, spot: float) -> 'PDEResult':
+        """measures at another spot on the same grid, no new solve"""
+        return self.__class__(self.x, self.value, spot, self.elapsed)
+
+    def __repr__(self):
+        description = ' '.join(f'{name}={getattr(self, name):.6f}'
+                               for name in self.names)
+        return f'<{self.__class__.__name__} spot={self.spot} {description}>'
+
+
+class SnowballPDE:
+    """
+    finite difference pricer of a single underlying snowball
+    the not knocked-in and knocked-in values are solved on the same
+    log-price grid backward in time with Crank-Nicolson, and coupled on
+    observation dates through the 'KO' and 'KI' barriers and payoffs
+    of SnowBallSimulate, valued at the strike date like the monte carlo
+    """
+
+    def __init__(self,
+                 parameters: dict,
+                 rate: float = 0.03,
+                 vol: float = 0.5,
+                 num_of_space: int = 400,
+                 steps_per_day: int = 1,
+                 num_of_std: float = 5,
+                 rannacher_steps: int = 2):
+        """
+        parameters
+        ----------
+        parameters: contract parameters, see SnowBallSimulate
+        rate: risk free rate
+        vol: volatility
+        num_of_space: number of log-price steps
+        steps_per_day: time steps per calendar day between observations
+        num_of_std: grid half width in standard deviations to maturity
+        rannacher_steps: Crank-Nicolson steps replaced by two implicit
+            half steps after each barrier observation, to damp the
+            oscillations of the discontinuities it introduces
+        """
+        self.contract = SnowBallSimulate(SnowballProduct, parameters,
+                                         rate, vol)
+        self.rate = rate
+        self.vol = vol
+        self.num_of_space = num_of_space
+        self.steps_per_day = steps_per_day
+        self.num_of_std = num_of_std
+        self.rannacher_steps = rannacher_steps
+        self._step_factor: Dict[float, tuple] = {}
+
+    def grid(self) -> np.ndarray:
+        """
+        uniform log-performance nodes with the first 'KI' and 'KO' barrier
+        positions on nodes, so the barrier conditions converge smoothly
+        """
+        contract = self.contract
+        t = (contract.maturity - contract.strike_date).days / 365
+        width = self.num_of_std * self.vol * np.sqrt(t)
+        dx = 2 * width / self.num_of_space
+        ki, ko = [np.log(barrier._position_on_date(barrier.observe_dates[0]))
+                  for barrier in (contract.ki_barrier, contract.ko_barrier)]
+        if ko > ki:
+            dx = (ko - ki) / max(1, round((ko - ki) / dx))
+        beg = ki + np.floor((- width - ki) / dx) * dx
+        return beg + dx * np.arange(int(np.ceil((width - beg) / dx)) + 1)
+
+    def schedule(self) -> List[dt.date]:
+        """strike date and observation dates up to maturity"""
+        contract = self.contract
+        dates = set(contract.observer().schedule)
+        dates.update([contract.strike_date, contract.maturity])
+        return sorted(date for date in dates
+                      if contract.strike_date <= date <= contract.maturity)
+
+    def operator(self, x: np.ndarray) -> np.ndarray:
+        """
+        discretised Black-Scholes operator in log-price
+        0.5 * vol ** 2 * V_xx + (r - 0.5 * vol ** 2) * V_x - r * V
+        boundary nodes are only discounted
+
+        returns
+        -------
+        tridiagonal operator as its upper, diagonal and lower bands,
+            array of shape (3, len(x)) laid out as for
+            scipy.linalg.solve_banded
+        """
+        dx = x[1] - x[0]
+        diffusion = 0.5 * self.vol ** 2 / dx ** 2
+        convection = (self.rate - 0.5 * self.vol ** 2) / (2 * dx)
+        operator = np.zeros((3, len(x)))
+        operator[1] = - self.rate
+        operator[1, 1:-1] -= 2 * diffusion
+        # band[0, j] multiplies node j in row j - 1, band[2, j] in row j + 1
+        operator[0, 2:] = diffusion + convection
+        operator[2, :-2] = diffusion - convection
+        return operator
+
+    def step_factor(self, operator: np.ndarray, dt_: float) -> tuple:
+        """
+        factorization of identity - 0.5 * dt_ * operator, cached per step
+        size, see factorize_tridiagonal
+        """
+        if dt_ not in self._step_factor:
+            bands = - 0.5 * dt_ * operator
+            bands[1] += 1
+            self._step_factor[dt_] = factorize_tridiagonal(bands)
+        return self._step_factor[dt_]
+
+    def step(self, operator: np.ndarray, value: np.ndarray, dt_: float,
+             implicit: bool = False) -> np.ndarray:
+        """
+        values taken back by dt_ years with tridiagonal solves
+        Crank-Nicolson by default, two implicit half steps if implicit
+        """
+        factor = self.step_factor(operator, dt_)
+        solved = solve_tridiagonal(factor, value)
+        if implicit:
+            return solve_tridiagonal(factor, solved)
+        # with B = 0.5 * dt_ * operator
+        # (I - B) ^ -1 (I + B) v == 2 (I - B) ^ -1 v - v
+        return 2 * solved - value
+
+    def observe(self, date: dt.date, price: np.ndarray,
+                value: np.ndarray) -> bool:
+        """
+        apply the conditions of date to the values right after it,
+        in reverse order of the monte carlo engines: maturity, 'KI', 'KO'
+
+        parameters
+        ----------
+        date: schedule date
+        price: performance on the nodes
+        value: array of shape (num_of_node, 2), not knocked-in and
+            knocked-in values, updated in place
+
+        returns
+        -------
+        whether any condition applied on date
+        """
+        contract = self.contract
+        applied = False
+        if date == contract.maturity:
+            value[:, 0] = contract.mat_payoff.payoff(price)
+            value[:, 1] = contract.ki_payoff.payoff(price)
+            applied = True
+        if date in contract.ki_barrier.observe_dates:
+            ki = self.trigger_weight(contract.ki_barrier, date, price)
+            value[:, 0] += ki * (value[:, 1] - value[:, 0])
+            applied = True
+        if date in contract.ko_barrier.observe_dates:
+            ko = self.trigger_weight(contract.ko_barrier, date, price)
+            amount = contract.ko_payoff[date].payoff(price)
+            value += ko[:, np.newaxis] * (
+                np.reshape(amount, (-1, 1)) - value)
+            applied = True
+        return applied
+
+    @staticmethod
+    def trigger_weight(barrier, date: dt.date,
+                       price: np.ndarray) -> np.ndarray:
+        """
+        barrier trigger on the nodes, 0.5 on a node at the barrier position
+        so the discontinuity is centred on the node
+        """
+        weight = barrier.observe(date, price).astype(float)
+        on_barrier = barrier.precision.equal(
+            price, barrier._position_on_date(date))
+        weight[on_barrier] = 0.5
+        return weight
+
+    def solve(self, spot: float = 1.0) -> PDEResult:
+        """
+        solve both grids from maturity back to the strike date
+
+        parameters
+        ----------
+        spot: performance to read price, delta and gamma at, 1 at strike
+
+        returns
+        -------
+        PDEResult, see PDEResult.at for other spots on the same grid
+        """
+        beg = time.perf_counter()
+        x = self.grid()
+        price = np.exp(x)
+        operator = self.operator(x)
+        schedule = self.schedule()
+        value = np.zeros((len(x), 2))
+        self.observe(schedule[-1], price, value)
+        smoothing = self.rannacher_steps
+        for prev_date, date in zip(schedule[-2::-1], schedule[:0:-1]):
+            days = (date - prev_date).days
+            num_of_step = max(1, int(np.ceil(days * self.steps_per_day)))
+            dt_ = days / 365 / num_of_step
+            for _ in range(num_of_step):
+                value = self.step(operator, value, dt_, smoothing > 0)
+                smoothing -= 1
+            if self.observe(prev_date, price, value):
+                smoothing = self.rannacher_steps
+        return PDEResult(x, value[:, 0], spot, time.perf_counter() - beg)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} ' \
+               f'space={self.num_of_space} ' \
+               f'steps_per_day={self.steps_per_day}>'
+
+
+def factorize_tridiagonal(bands: np.ndarray) -> tuple:
+    """
+    LU factorization of a tridiagonal matrix, see SnowballPDE.operator for
+    the bands, with LAPACK through scipy when available, see
+    solve_tridiagonal
+    """
+    if dgttrf is not None:
+        *factor, info = dgttrf(bands[2, :-1], bands[1], bands[0, 1:])
+        assert info == 0, f'singular tridiagonal matrix, info={info}'
+        return tuple(factor)
+    lower, diagonal, upper = bands[2, :-1], bands[1], bands[0, 1:]
+    # Thomas elimination without pivoting, the step matrices are
+    # diagonally dominant
+    pivot = np.empty(len(diagonal))
+    ratio = np.empty(len(diagonal) - 1)
+    pivot[0] = diagonal[0]
+    for i in range(1, len(diagonal)):
+        ratio[i - 1] = upper[i - 1] / pivot[i - 1]
+        pivot[i] = diagonal[i] - lower[i - 1] * ratio[i - 1]
+    return lower, pivot, ratio
+
+
+def solve_tridiagonal(factor: tuple, value: np.ndarray) -> np.ndarray:
+    """solve a tridiagonal system from factorize_tridiagonal"""
+    if dgttrs is not None:
+        solution, info = dgttrs(*factor, value)
+        assert info == 0, f'tridiagonal solve failed, info={info}'
+        return solution
+    lower, pivot, ratio = factor
+    solution = np.array(value, dtype=float)
+    solution[0] /= pivot[0]
+    for i in range(1, len(pivot)):
+        solution[i] -= lower[i - 1] * solution[i - 1]
+        solution[i] /= pivot[i]
+    for i in range(len(pivot) - 2, -1, -1):
+        solution[i] -= ratio[i] * solution[i + 1]
+    return solution
+
+
+if __name__ == '__main__':
+    pass
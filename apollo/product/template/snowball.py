@@ -1,8 +1,9 @@
 # -*- coding: utf-8 -*-
 """doc string"""
 
+import copy
 import time
-import contextlib
+import math
 import numpy as np
 import datetime as dt
 from state_machine import (
@@ -12,24 +13,21 @@ from state_machine import (
     before,
     after,
 )
-from apollo.product.barrier import (
-    KnockOutBarrier,
-    KnockInBarrier,
-    Observer,
+from apollo.product.barrier import Observer
+from apollo.product.template.ledger import CashflowLedger
+from apollo.product.template.spec import ContractSpec, compile_spec
+from apollo.product.template.kernel import (
+    HAS_NUMBA,
+    fused_kernel,
+    payoff_coefficients,
 )
-from apollo.product.payoff import (
-    VanillaPutPayoff,
-    ConstantPayoff,
+from apollo.simulation import (
+    PathGenerator,
+    RunningStatistics,
+    SimulationResult,
+    antithetic_matrix,
 )
-from apollo.utils.typing import Numerical
-
-
-@contextlib.contextmanager
-def timer(msg):
-    beg = time.time()
-    yield
-    end = time.time()
-    print(f'{msg} | {end - beg}')
+from apollo.utils import null_profiler, print_sink, Profiler
 
 
 class ProductPayoff:
@@ -80,55 +78,340 @@ class SnowballProduct:
         return f'<{self.__class__.__name__} state={self.current_state}>'
 
 
+class SnowballPathState:
+    """
+    struct-of-arrays state of a batch of snowball paths
+    replaces one SnowballProduct object per path in the array engine
+    """
+    normal = 0
+    knocked_in = 1
+    knocked_out = 2
+    tags = ['knock out rebate rate', 'knock in put value',
+            'maturity bonus coupon']
+    # tag code of a settled path by its state code
+    _state_tag = np.array([2, 1, 0], dtype=np.int8)
+
+    def __init__(self, num_of_path: int):
+        """
+        parameters
+        ----------
+        num_of_path: number of paths in the batch
+        """
+        self.state = np.full(num_of_path, self.normal, dtype=np.int8)
+        self.retired = np.zeros(num_of_path, dtype=bool)
+        self.settle_index = np.full(num_of_path, -1, dtype=np.intp)
+        self.amount = np.zeros(num_of_path)
+        # knock-in weighting between observation dates, allocated on use
+        self.survival = None
+        self.ki_amount = None
+
+    def __len__(self):
+        return len(self.state)
+
+    def knock_out(self, index: np.ndarray, date_index: int, amount):
+        """knock out and settle paths at index on schedule date_index"""
+        self.state[index] = self.knocked_out
+        self.settle(index, date_index, amount)
+
+    def knock_in(self, index: np.ndarray):
+        """knock in paths at index, non-reversible"""
+        normal = self.state[index] == self.normal
+        self.state[index[normal]] = self.knocked_in
+
+    def knock_in_probability(self, index: np.ndarray, probability):
+        """
+        weight paths at index by the probability they knocked in,
+        instead of sampling the knock-in, see settle_weighted
+        """
+        if self.survival is None:
+            self.survival = np.ones(len(self))
+        self.survival[index] *= 1 - probability
+
+    def settle(self, index: np.ndarray, date_index: int, amount):
+        """retire paths at index and record their payoff amount"""
+        self.retired[index] = True
+        self.settle_index[index] = date_index
+        self.amount[index] = amount
+
+    def settle_weighted(self, index: np.ndarray, date_index: int,
+                        amount, ki_amount):
+        """
+        retire paths at index paying amount, plus ki_amount under the
+        knock-in tag for their probability of having knocked in
+        """
+        self.settle(index, date_index, amount)
+        if self.ki_amount is None:
+            self.ki_amount = np.zeros(len(self))
+        self.ki_amount[index] = ki_amount
+
+    def ledger(self, schedule) -> CashflowLedger:
+        """cashflows of the settled paths, see CashflowLedger"""
+        index = np.flatnonzero(self.retired)
+        tag = self._state_tag[self.state[index]]
+        amount = self.amount[index]
+        if self.ki_amount is not None:
+            weighted = np.flatnonzero(self.ki_amount)
+            index = np.concatenate([index, weighted])
+            tag = np.concatenate([tag, np.full(
+                len(weighted), self._state_tag[self.knocked_in])])
+            amount = np.concatenate([amount, self.ki_amount[weighted]])
+        return CashflowLedger(index, self.settle_index[index], tag, amount,
+                              len(self), schedule, self.tags)
+
+    def __repr__(self):
+        counts = np.bincount(self.state, minlength=3)
+        return f'<{self.__class__.__name__} normal={counts[self.normal]} ' \
+               f'knocked_in={counts[self.knocked_in]} ' \
+               f'knocked_out={counts[self.knocked_out]}>'
+
+
 class SnowBallSimulate:
 
-    def __init__(self, product, parameters):
+    def __init__(self, product, parameters, rate=0.03, vol=0.5,
+                 profiler=null_profiler, ki_monitoring='discrete',
+                 continuity_correction=False, dtype=np.float64,
+                 assets=None):
+        """
+        parameters
+        ----------
+        product: product class of the object engine
+        parameters: contract parameters, dict or ContractSpec, dicts are
+            compiled through the cache of compile_spec
+        rate: risk free rate
+        vol: volatility
+        profiler: records phase timings of the engines, see Profiler
+        ki_monitoring: 'discrete' steps through every 'KI' observation date,
+            'sample' and 'weight' only step through 'KO' dates and maturity
+            and knock in between them by the Brownian-bridge probability of
+            crossing the 'KI' barrier, either sampled with one uniform per
+            path or kept as a weight on the maturity payoff,
+            'array' and 'matrix' engines only
+        continuity_correction: shift the 'KI' barrier between coarse dates
+            so that the crossing probability matches discrete observation
+            instead of continuous, see PositionBarrier.crossing_probability
+        dtype: float dtype of the normals and prices of the 'array',
+            'matrix' and 'fused' engines, float32 halves their memory,
+            cashflows and pv are accumulated in float64 whatever the dtype,
+            barrier tolerances follow the dtype, see NumberCompare
+        assets: MultiAsset of several correlated underlyings, barriers
+            and payoffs then observe their reduced performance, e.g.
+            worst-of, vol is not used, 'array' and 'matrix' engines only,
+            'fused' falls back to 'matrix', with discrete 'KI' monitoring
+        """
+        assert np.issubdtype(dtype, np.floating), \
+            f'dtype should be a float dtype, got {dtype}'
+        assert ki_monitoring in ['discrete', 'sample', 'weight'], \
+            f"ki_monitoring should be one of 'discrete', 'sample' or " \
+            f"'weight', got '{ki_monitoring}'"
+        assert assets is None or ki_monitoring == 'discrete', \
+            f"ki_monitoring '{ki_monitoring}' needs a single underlying"
         self.product = product
-        self.strike_date = dt.date.fromisoformat(parameters['StrikeDate'])
-        self.maturity = dt.date.fromisoformat(parameters['Maturity'])
+        self.rate = rate
+        self.vol = vol
+        self.profiler = profiler
+        self.ki_monitoring = ki_monitoring
+        self.continuity_correction = continuity_correction
+        self.dtype = np.dtype(dtype)
+        self.assets = assets
+        self.num_of_asset = 1 if assets is None else assets.num_of_asset
+        if not isinstance(parameters, ContractSpec):
+            parameters = compile_spec(parameters)
+        self.spec = parameters
+        self.strike_date = dt.date.fromordinal(self.spec.strike_date)
+        self.maturity = dt.date.fromordinal(self.spec.maturity)
+        # built once per contract, copied so that instances never share
+        # a barrier or payoff a caller could change
+        self.ko_barrier = copy.copy(self.spec.ko_barrier)
+        self.ki_barrier = copy.copy(self.spec.ki_barrier)
+        self.ko_payoff = copy.copy(self.spec.ko_payoff)
+        self.ki_payoff = copy.copy(self.spec.ki_payoff)
+        self.mat_payoff = copy.copy(self.spec.mat_payoff)
+        # observers by coarse, built on first use, see observer
+        self._observers = {}
 
-        ko_obs_date = [dt.date.fromisoformat(d)
-                       for d in parameters['ObservationDate']]
+    def __getstate__(self):
+        # compiled calendars hold observe closures, rebuilt after unpickling
+        state = self.__dict__.copy()
+        state['_observers'] = {}
+        return state
 
-        ki_obs_date = [dt.date.fromisoformat(d)
-                       for d in parameters['KIObservationDate']]
+    def simulate(self, path_generator, num_of_path, engine='object',
+                 memory_budget=2 ** 27, antithetic=False,
+                 control_variate=False, path_store=None):
+        """
+        monte carlo pv of the contract, see path_pv for parameters
+        use simulate_result for the error and variance reduction achieved
 
-        self.ko_barrier = KnockOutBarrier(
-            direction='upper',
-            position=parameters['UpperBarrier'],
-            observe_dates=ko_obs_date,
-            inclusive=True,
-        )
+        returns
+        -------
+        average discounted payoff
+        """
+        return np.average(self.path_pv(path_generator, num_of_path, engine,
+                                       memory_budget, antithetic,
+                                       control_variate, path_store))
 
-        self.ki_barrier = KnockInBarrier(
-            direction='lower',
-            position=parameters['KIBarrier'],
-            observe_dates=ki_obs_date,
-            inclusive=True,
-        )
+    def path_pv(self, path_generator, num_of_path, engine='object',
+                memory_budget=2 ** 27, antithetic=False,
+                control_variate=False, path_store=None):
+        """
+        discounted payoff of each simulated path
 
-        self.ko_payoff = {
-            date: ConstantPayoff(rate=rebate)
-            for date, rebate in zip(
-                ko_obs_date,
-                parameters['KnockOutRebate'],
-            )
-        }
-
-        self.ki_payoff = VanillaPutPayoff(
-            strike=parameters['Strike'],
-            weight=-1,
-        )
+        parameters
+        ----------
+        path_generator: random source, get_path(n) returns n standard normals
+            of one date, 'object' and 'array' engines only
+        num_of_path: number of simulated paths
+        engine: 'object' keeps one SnowballProduct per path,
+            'array' keeps path state as flat arrays, see SnowballPathState
+            both consume random numbers in the same order and give the same pv
+            and only draw normals for live paths, 'array' is the engine for
+            plain pricing
+            'matrix' generates whole paths over the schedule chunk by chunk,
+            path_generator must provide get_matrix(num_of_path, num_of_date),
+            paths are drawn to maturity even after they knock out, so it
+            draws more normals than 'array' and is slower on contracts that
+            knock out early, it serves what needs whole paths: variance
+            reduction, path store and balanced generators, see
+            SobolPathGenerator
+            'fused' consumes the same normals as 'matrix' and evolves,
+            observes and settles each path in one compiled pass, see
+            kernel.fused_kernel, it falls back to 'matrix' without numba
+            or for payoffs and monitoring the kernel does not cover,
+            it saves the price matrix and barrier temporaries, not the
+            drawing of the normals, which dominates both engines
+        memory_budget: bytes of the path matrix per chunk, 'matrix' and
+            'fused' engines only
+        antithetic: pair each path with its mirror, 'matrix' engine only
+            paths 2k and 2k + 1 are then not independent
+        control_variate: subtract the knock-in put paid at maturity on every
+            path, whose closed form pv is known, 'matrix' engine only
+        path_store: PathStore to map the price matrix from, 'matrix' engine
+            only, a matrix is simulated and stored on a miss
 
-        self.mat_payoff = ConstantPayoff(
-            rate=parameters['MaturityBonusCoupon'],
-        )
+        returns
+        -------
+        array of shape (num_of_path, )
+        """
+        assert engine in ['object', 'array', 'matrix', 'fused'], \
+            f"engine should be one of 'object', 'array', 'matrix' " \
+            f"or 'fused', got '{engine}'"
+        assert engine == 'matrix' or not (antithetic or control_variate), \
+            f"variance reduction needs full paths, " \
+            f"use the 'matrix' engine instead of '{engine}'"
+        assert engine == 'matrix' or path_store is None, \
+            f"path store holds full paths, " \
+            f"use the 'matrix' engine instead of '{engine}'"
+        assert self.assets is None or \
+            (engine != 'object' and not control_variate), \
+            f"several underlyings need the 'array' or 'matrix' engine " \
+            f"without control variate"
+        assert engine in ['matrix', 'fused'] or \
+            hasattr(path_generator, 'get_path'), \
+            f"{path_generator!r} builds whole paths, " \
+            f"use the 'matrix' or 'fused' engine instead of '{engine}'"
+        profiler = self.profiler
+        with profiler.run('path_pv', engine=engine, num_of_path=num_of_path):
+            control = None
+            if engine == 'array':
+                ledger = self._simulate_array(path_generator, num_of_path)
+            elif engine == 'matrix':
+                ledger, control = self._simulate_matrix(
+                    path_generator, num_of_path, memory_budget,
+                    antithetic, control_variate, path_store)
+            elif engine == 'fused':
+                ledger = self._simulate_fused(path_generator, num_of_path,
+                                              memory_budget)
+            else:
+                ledger = self._simulate_object(path_generator, num_of_path)
+            with profiler.phase('pv', num_of_path):
+                pv = ledger.path_pv(self.discount_factor(ledger.schedule))
+                if control_variate:
+                    pv = control_adjust(pv, control, self.control_mean)
+        return pv
 
-    def simulate(self, path_generator, num_of_path):
-        with timer('prepare'):
-            observer = Observer()
-            observer.register_barrier('KO', self.ko_barrier)
-            observer.register_barrier('KI', self.ki_barrier)
+    def cashflow_ledger(self, path_generator, num_of_path, engine='array',
+                        memory_budget=2 ** 27, antithetic=False,
+                        path_store=None):
+        """
+        cashflows of every simulated path, see path_pv for parameters
+
+        returns
+        -------
+        CashflowLedger, discount with discount_factor(ledger.schedule)
+        """
+        assert engine == 'matrix' or not antithetic and path_store is None, \
+            f"antithetic paths and path store need the 'matrix' engine, " \
+            f"got '{engine}'"
+        assert engine in ['matrix', 'fused'] or \
+            hasattr(path_generator, 'get_path'), \
+            f"{path_generator!r} builds whole paths, " \
+            f"use the 'matrix' or 'fused' engine instead of '{engine}'"
+        with self.profiler.run('cashflow_ledger', engine=engine,
+                               num_of_path=num_of_path):
+            if engine == 'matrix':
+                return self._simulate_matrix(
+                    path_generator, num_of_path, memory_budget,
+                    antithetic, path_store=path_store)[0]
+            if engine == 'fused':
+                return self._simulate_fused(path_generator, num_of_path,
+                                            memory_budget)
+            if engine == 'array':
+                return self._simulate_array(path_generator, num_of_path)
+            return self._simulate_object(path_generator, num_of_path)
+
+    def simulate_result(self, path_generator, num_of_path,
+                        memory_budget=2 ** 27, antithetic=False,
+                        control_variate=False, level=0.95):
+        """
+        'matrix' engine pv with its error and the variance reduction achieved
+        see path_pv for parameters
+
+        returns
+        -------
+        SimulationResult, variance_reduction is the variance of plain
+            monte carlo over the variance achieved at the same number of paths
+        """
+        assert not antithetic or num_of_path % 2 == 0, \
+            f'antithetic pairs need an even number of paths, got {num_of_path}'
+        assert self.assets is None or not control_variate, \
+            f"the knock-in put control variate needs a single underlying"
+        beg = time.perf_counter()
+        profiler = self.profiler
+        with profiler.run('simulate_result', engine='matrix',
+                          num_of_path=num_of_path):
+            ledger, control = self._simulate_matrix(
+                path_generator, num_of_path, memory_budget,
+                antithetic, control_variate)
+            with profiler.phase('pv', num_of_path):
+                pv = ledger.path_pv(self.discount_factor(ledger.schedule))
+                sample = pv
+                if control_variate:
+                    sample = control_adjust(pv, control, self.control_mean)
+                if antithetic:
+                    sample = 0.5 * (sample[0::2] + sample[1::2])
+                variance_reduction = np.var(pv, ddof=1) * len(sample) \
+                    / (np.var(sample, ddof=1) * num_of_path)
+        return SimulationResult(RunningStatistics().update(sample),
+                                time.perf_counter() - beg, level,
+                                num_of_path=num_of_path,
+                                variance_reduction=variance_reduction)
+
+    @property
+    def control_mean(self):
+        """closed form pv of the knock-in put paid at maturity on every path"""
+        t = (self.maturity - self.strike_date).days / 365
+        return self.ki_payoff.expectation(
+            math.exp(self.rate * t), self.vol, self.rate, t)[0]
+
+    def _simulate_object(self, path_generator, num_of_path):
+        assert self.ki_monitoring == 'discrete', \
+            f"ki_monitoring '{self.ki_monitoring}' needs the 'array' " \
+            f"or 'matrix' engine"
+        assert self.dtype == np.float64, \
+            f"dtype {self.dtype} needs the 'array' or 'matrix' engine"
+        profiler = self.profiler
+        with profiler.phase('prepare'):
+            observer = self.observer()
             product_list = np.array([self.product() for _ in range(num_of_path)])
             live_func = np.vectorize(lambda x: not x.retired)
             live_product = product_list
@@ -137,15 +420,19 @@ class SnowBallSimulate:
             ko_batch = np.vectorize(self.ko, cache=True)
             ki_batch = np.vectorize(self.ki, cache=True)
             retire_batch = np.vectorize(self.retire, cache=True)
-        with timer('simulate'):
+        with profiler.phase('simulate', num_of_path):
             for date, obs_func in observer:
                 live_index = np.where(live_func(live_product))
                 live_path = live_path[live_index]
                 live_product = live_product[live_index]
+                profiler.count('live_paths', date, len(live_product))
                 if len(live_product) == 0:
                     break
-                new_path = path_generator.get_path(len(live_product))
-                live_path = populate_path(live_path, new_path, date - prev_date)
+                with profiler.phase('populate_path', len(live_product)):
+                    new_path = path_generator.get_path(len(live_product))
+                    live_path = populate_path(live_path, new_path,
+                                              date - prev_date,
+                                              self.rate, self.vol)
                 if 'KO' in obs_func:
                     ko = obs_func['KO'](live_path)
                     ko_product = live_product[np.where(ko)]
@@ -164,18 +451,531 @@ class SnowBallSimulate:
                 if date == self.maturity:
                     retire_batch(nko_path, nko_product, date)
                 prev_date = date
-        with timer('payoff'):
-            pv = np.vectorize(self.calculate_pv)(product_list)
-            print(np.average(pv))
-
-    def calculate_pv(self, product):
-        r = 0.03
-        pv = 0
-        for payoff in product.payoff:
-            t = (payoff.date - self.strike_date).days
-            df = np.exp(- r * t / 365)
-            pv += df * payoff.amount
-        return pv
+        with profiler.phase('ledger', num_of_path):
+            ledger = self.product_ledger(product_list, observer.schedule)
+        return ledger
+
+    def _simulate_array(self, path_generator, num_of_path):
+        profiler = self.profiler
+        with profiler.phase('prepare'):
+            coarse = self.ki_monitoring != 'discrete'
+            observer = self.observer(coarse)
+            calendar = observer.calendar(self.strike_date)
+            schedule = calendar.dates
+            maturity_index = calendar.index(self.maturity)
+            state = SnowballPathState(num_of_path)
+            live_index = np.arange(num_of_path)
+            live_path = np.ones(num_of_path, dtype=self.dtype)
+            # per asset performance of the live paths, see MultiAsset
+            live_assets = None if self.assets is None else np.ones(
+                (self.num_of_asset, num_of_path), dtype=self.dtype)
+            prev_date = self.strike_date
+            profiler.array('live_path', live_path)
+        with profiler.phase('simulate', num_of_path):
+            for date_index, (date, obs_func) in enumerate(calendar):
+                profiler.count('live_paths', date, len(live_index))
+                if len(live_index) == 0:
+                    break
+                with profiler.phase('populate_path', len(live_index)):
+                    prev_path = live_path
+                    new_path = path_generator.get_path(
+                        len(live_index) * self.num_of_asset).astype(
+                        self.dtype, copy=False)
+                    t = calendar.year_fraction[date_index]
+                    if live_assets is None:
+                        live_path = populate_step(live_path, new_path, t,
+                                                  self.rate, self.vol)
+                    else:
+                        live_assets = self.assets.step(
+                            live_assets,
+                            new_path.reshape(self.num_of_asset, -1),
+                            t, self.rate)
+                        live_path = self.assets.reduce(live_assets)
+                if 'KO' in obs_func:
+                    with profiler.phase('barrier', len(live_index)):
+                        ko = obs_func['KO'](live_path)
+                    if ko.any():
+                        with profiler.phase('payoff'):
+                            state.knock_out(
+                                live_index[ko], date_index,
+                                self.ko_payoff[date].payoff(live_path[ko]))
+                    live_index = live_index[~ko]
+                    live_path = live_path[~ko]
+                    if live_assets is not None:
+                        live_assets = live_assets[:, ~ko]
+                    if coarse:
+                        prev_path = prev_path[~ko]
+                if coarse:
+                    with profiler.phase('barrier', len(live_index)):
+                        self.knock_in_between(
+                            state, live_index, prev_date, date,
+                            prev_path, live_path, path_generator.get_uniform)
+                if 'KI' in obs_func:
+                    with profiler.phase('barrier', len(live_index)):
+                        ki = obs_func['KI'](live_path)
+                    state.knock_in(live_index[ki])
+                if date_index == maturity_index:
+                    with profiler.phase('payoff', len(live_index)):
+                        self.retire_array(state, live_index, live_path,
+                                          date_index)
+                    live_index = live_index[:0]
+                prev_date = date
+        with profiler.phase('ledger', num_of_path):
+            ledger = state.ledger(schedule)
+        return ledger
+
+    def _simulate_matrix(self, path_generator, num_of_path, memory_budget,
+                         antithetic=False, control_variate=False,
+                         path_store=None):
+        profiler = self.profiler
+        with profiler.phase('prepare'):
+            coarse = self.ki_monitoring != 'discrete'
+            observer = self.observer(coarse)
+            calendar = observer.calendar(self.strike_date)
+            schedule = calendar.dates
+            year_fraction = calendar.year_fraction
+            chunk_size = matrix_chunk_size(
+                len(schedule) * self.num_of_asset, memory_budget,
+                self.dtype.itemsize, path_generator)
+            if antithetic:
+                chunk_size = max(2, chunk_size - chunk_size % 2)
+            ledgers = []
+            control = np.zeros(num_of_path) if control_variate else None
+            maturity_index = calendar.index(self.maturity)
+            maturity_df = self.discount_factor(schedule)[maturity_index]
+            if path_store is not None:
+                stored = self.stored_matrix(path_store, path_generator,
+                                            num_of_path, schedule,
+                                            chunk_size, antithetic)
+        with profiler.phase('simulate', num_of_path):
+            for beg in range(0, num_of_path, chunk_size):
+                end = min(beg + chunk_size, num_of_path)
+                with profiler.phase('populate_path', end - beg):
+                    if path_store is not None:
+                        price = stored[beg:end]
+                    else:
+                        price = self.price_matrix(path_generator, end - beg,
+                                                  year_fraction, antithetic)
+                profiler.array('price', price)
+                state = self.evaluate_matrix(
+                    observer, price,
+                    path_generator.get_uniform
+                    if self.ki_monitoring == 'sample' else None, coarse)
+                with profiler.phase('ledger', end - beg):
+                    ledgers.append(state.ledger(schedule))
+                if control_variate:
+                    with profiler.phase('payoff', end - beg):
+                        control[beg:end] = maturity_df \
+                            * self.ki_payoff.payoff(price[:, maturity_index])
+        return CashflowLedger.concatenate(ledgers), control
+
+    def _simulate_fused(self, path_generator, num_of_path, memory_budget):
+        profiler = self.profiler
+        with profiler.phase('prepare'):
+            observer = self.observer()
+            schedule = observer.schedule
+            argument = self.fused_arguments(schedule)
+            if argument is None:
+                return self._simulate_matrix(path_generator, num_of_path,
+                                             memory_budget)[0]
+            chunk_size = matrix_chunk_size(len(schedule), memory_budget,
+                                           self.dtype.itemsize,
+                                           path_generator)
+            state = SnowballPathState(num_of_path)
+        with profiler.phase('simulate', num_of_path):
+            for beg in range(0, num_of_path, chunk_size):
+                end = min(beg + chunk_size, num_of_path)
+                # prices are evolved in the kernel, this is the draw only
+                with profiler.phase('random', end - beg):
+                    normal = path_generator.get_matrix(
+                        end - beg, len(schedule), self.dtype)
+                profiler.array('normal', normal)
+                with profiler.phase('kernel', end - beg):
+                    fused_kernel(normal, *argument, state.state[beg:end],
+                                 state.settle_index[beg:end],
+                                 state.amount[beg:end])
+            state.retired = state.settle_index >= 0
+        with profiler.phase('ledger', num_of_path):
+            ledger = state.ledger(schedule)
+        return ledger
+
+    def fused_arguments(self, schedule):
+        """
+        per date arrays of the fused kernel over schedule, see fused_kernel
+
+        returns
+        -------
+        tuple of kernel arguments after the normals, None if the kernel
+            is unavailable or does not cover the contract
+        """
+        if not HAS_NUMBA or self.ki_monitoring != 'discrete' \
+                or self.assets is not None:
+            return None
+        ko_payoff = self.ko_payoff.align(schedule)
+        ki_coef = payoff_coefficients(self.ki_payoff)
+        mat_coef = payoff_coefficients(self.mat_payoff)
+        if not ko_payoff.vectorized or ko_payoff.rounding \
+                or ki_coef is None or mat_coef is None:
+            return None
+        if self.ko_barrier.precision is not self.ki_barrier.precision:
+            return None
+        ko_dates = set(self.ko_barrier.observe_dates)
+        ki_dates = set(self.ki_barrier.observe_dates)
+        ko_coef = np.nan_to_num(ko_payoff.coefficients)
+        ko_position = np.zeros(len(schedule), dtype=self.dtype)
+        ki_position = np.zeros(len(schedule), dtype=self.dtype)
+        for i, date in enumerate(schedule):
+            if date in ko_dates:
+                ko_position[i] = self.ko_barrier._position_on_date(date)
+            if date in ki_dates:
+                ki_position[i] = self.ki_barrier._position_on_date(date)
+        year_fraction = self.year_fraction(schedule)
+        return (
+            self.vol * np.sqrt(year_fraction),
+            (self.rate - 0.5 * self.vol ** 2) * year_fraction,
+            np.array([date in ko_dates for date in schedule]),
+            ko_position, ko_coef,
+            self.ko_barrier.direction == 'upper', self.ko_barrier.inclusive,
+            np.array([date in ki_dates for date in schedule]),
+            ki_position,
+            self.ki_barrier.direction == 'upper', self.ki_barrier.inclusive,
+            schedule.index(self.maturity),
+            np.array(ki_coef, dtype=float), np.array(mat_coef, dtype=float),
+            self.ko_barrier.precision.abs_tol(self.dtype),
+        )
+
+    def price_matrix(self, path_generator, num_of_path, year_fraction,
+                     antithetic=False):
+        """
+        one chunk of prices over the schedule of year_fraction,
+        the reduced performance of several underlyings, see MultiAsset
+        """
+        num_of_date = len(year_fraction)
+        if antithetic:
+            new_path = antithetic_matrix(
+                path_generator, num_of_path,
+                num_of_date * self.num_of_asset, self.dtype)
+        else:
+            new_path = path_generator.get_matrix(
+                num_of_path, num_of_date * self.num_of_asset, self.dtype)
+        if self.assets is not None:
+            # one block of dates per asset, assets on the first axis
+            new_path = new_path.reshape(
+                (num_of_path, num_of_date, self.num_of_asset),
+                order='F').transpose(2, 0, 1)
+            return self.assets.reduce(self.assets.performance(
+                new_path, year_fraction, self.rate))
+        return populate_matrix(new_path, year_fraction, self.rate, self.vol)
+
+    def stored_matrix(self, path_store, path_generator, num_of_path,
+                      schedule, chunk_size, antithetic=False):
+        """
+        full price matrix mapped from path_store, simulated on a miss
+        the key holds the state of path_generator, which is left after
+        the matrix as if simulated, also on a hit, so that reusing the
+        generator draws fresh paths with or without the store
+
+        returns
+        -------
+        read-only map of shape (num_of_path, len(schedule))
+        """
+        state_key = getattr(path_generator, 'state_key', None)
+        state_key = state_key and state_key()
+        assert state_key is not None, \
+            f'path store needs a generator whose state fixes its draws, ' \
+            f'got {path_generator!r}'
+        year_fraction = self.year_fraction(schedule)
+        key = path_store.key(
+            generator=repr(path_generator), state=state_key,
+            rate=self.rate, vol=self.vol,
+            schedule=[date.toordinal() for date in schedule],
+            start=self.strike_date.toordinal(), num_of_path=num_of_path,
+            chunk_size=chunk_size, antithetic=antithetic,
+            dtype=self.dtype.name, assets=repr(self.assets))
+
+        # generator state after the matrix, stored next to it
+        end_key = path_store.key(after=key)
+        matrix = path_store.get(key)
+        end_state = path_store.get(end_key)
+        if matrix is not None and end_state is not None \
+                and matrix.shape == (num_of_path, len(schedule)):
+            path_generator.set_state(np.asarray(end_state[0]))
+            return matrix
+
+        def fill(matrix):
+            for beg in range(0, num_of_path, chunk_size):
+                end = min(beg + chunk_size, num_of_path)
+                matrix[beg:end] = self.price_matrix(
+                    path_generator, end - beg, year_fraction, antithetic)
+
+        matrix = path_store.put(key, (num_of_path, len(schedule)), fill,
+                                self.dtype)
+        state = path_generator.get_state()
+
+        def fill_state(array):
+            array[0] = state
+
+        path_store.put(end_key, (1, len(state)), fill_state)
+        return matrix
+
+    def evaluate_matrix(self, observer, price, uniform=None, coarse=False):
+        """
+        resolve barrier events and payoffs over a full path matrix
+        discrete monitoring is resolved by evaluate_first_hit, coarse
+        monitoring date by date with knock-ins sampled between dates
+
+        parameters
+        ----------
+        observer: observer with 'KO' and 'KI' barriers registered
+        price: array of shape (num_of_path, len(observer.schedule))
+        uniform: function of n returning n uniforms, to sample knock-ins
+            between coarse dates, see knock_in_between
+        coarse: observer is coarse, see observer
+
+        returns
+        -------
+        SnowballPathState of the batch
+        """
+        calendar = observer.calendar(self.strike_date)
+        if not coarse:
+            return self.evaluate_first_hit(calendar, price)
+        profiler = self.profiler
+        state = SnowballPathState(len(price))
+        prev_date = self.strike_date
+        ko_payoff = self.ko_payoff.align(calendar.dates)
+        # trigger and live flags of a date, reused across dates
+        hit = np.empty(len(price), dtype=bool)
+        live = np.empty(len(price), dtype=bool)
+        for date_index, (date, obs_func) in enumerate(calendar):
+            date_price = price[:, date_index]
+            with profiler.phase('barrier', len(price)):
+                index = np.flatnonzero(~state.retired)
+                prev_price = price[index, date_index - 1] \
+                    if date_index > 0 else 1
+                self.knock_in_between(state, index, prev_date, date,
+                                      prev_price, date_price[index], uniform)
+            prev_date = date
+            if 'KO' in obs_func:
+                with profiler.phase('barrier', len(price)):
+                    ko = obs_func['KO'](date_price, out=hit)
+                    ko &= np.logical_not(state.retired, out=live)
+                    # amounts are set for all dates at once after the loop
+                    state.knock_out(np.flatnonzero(ko), date_index, 0)
+            if 'KI' in obs_func:
+                with profiler.phase('barrier', len(price)):
+                    ki = obs_func['KI'](date_price, out=hit)
+                    ki &= np.logical_not(state.retired, out=live)
+                state.knock_in(np.flatnonzero(ki))
+            if date == self.maturity:
+                with profiler.phase('payoff'):
+                    index = np.flatnonzero(~state.retired)
+                    self.retire_array(state, index, date_price[index],
+                                      date_index)
+        with profiler.phase('payoff'):
+            index = np.flatnonzero(state.state == state.knocked_out)
+            date_index = state.settle_index[index]
+            state.amount[index] = ko_payoff.payoff(
+                date_index, price[index, date_index])
+        return state
+
+    def evaluate_first_hit(self, calendar, price):
+        """
+        resolve barrier events and payoffs over a full path matrix from
+        the first 'KO' and 'KI' trigger of each path, without a loop over
+        dates, discrete monitoring of evaluate_matrix
+
+        parameters
+        ----------
+        calendar: ObservationCalendar of 'KO' and 'KI', see observer
+        price: array of shape (num_of_path, len(calendar))
+
+        returns
+        -------
+        SnowballPathState of the batch
+        """
+        profiler = self.profiler
+        state = SnowballPathState(len(price))
+        schedule = calendar.dates
+        # events after maturity never happen, paths are retired by then
+        horizon = calendar.index(self.maturity)
+        if horizon < 0:
+            horizon = len(schedule) - 1
+        with profiler.phase('barrier', len(price)):
+            ko = self.ko_barrier.first_hit(schedule, price,
+                                           calendar.position('KO'))
+            ki = self.ki_barrier.first_hit(schedule, price,
+                                           calendar.position('KI'))
+            # 'KO' is observed before 'KI' on a date both observe
+            state.knock_in(np.flatnonzero((ki < ko) & (ki <= horizon)))
+            index = np.flatnonzero(ko <= horizon)
+            date_index = ko[index]
+        with profiler.phase('payoff'):
+            state.knock_out(index, date_index, self.ko_payoff.align(
+                schedule).payoff(date_index, price[index, date_index]))
+            if schedule[horizon] == self.maturity:
+                index = np.flatnonzero(~state.retired)
+                self.retire_array(state, index, price[index, horizon],
+                                  horizon)
+        return state
+
+    def smooth_pv(self, observer, price, df, width, tangents=()):
+        """
+        discounted payoff of each path with smoothed barriers
+        each barrier triggers with a probability that moves from 0 to 1
+        over a log-price band of the given width, see observe_smooth,
+        so the pv is a smooth function of the path and is differentiated
+        along each tangent in the same pass, see SnowballGreeks
+
+        parameters
+        ----------
+        observer: observer with 'KO' and 'KI' barriers registered
+        price: array of shape (num_of_path, len(observer.schedule))
+        df: discount factor of each schedule date
+        width: smoothing width in log-price, 0 for hard barriers
+        tangents: derivatives of price in some parameters, arrays of the
+            shape of price, e.g. price itself for the spot
+
+        returns
+        -------
+        array of shape (num_of_path, ), with tangents also the array of
+            shape (len(tangents), num_of_path) of the pv derivatives
+        """
+        calendar = observer.calendar(self.strike_date)
+        normal = np.ones(len(price))
+        knocked_in = np.zeros(len(price))
+        pv = np.zeros(len(price))
+        # derivatives of the above along each tangent
+        d_normal = np.zeros((len(tangents), len(price)))
+        d_knocked_in = np.zeros((len(tangents), len(price)))
+        d_pv = np.zeros((len(tangents), len(price)))
+        for date_index, (date, obs_func) in enumerate(calendar):
+            date_price = price[:, date_index]
+            d_price = np.array([tangent[:, date_index]
+                                for tangent in tangents]).reshape(d_pv.shape)
+            if 'KO' in obs_func:
+                ko = self.ko_barrier.observe_smooth(date, date_price, width)
+                d_ko = d_price * self.ko_barrier.smooth_derivative(
+                    date, date_price, width)
+                payoff = self.ko_payoff[date]
+                amount = payoff.payoff(date_price)
+                live = normal + knocked_in
+                pv += df[date_index] * live * ko * amount
+                d_pv += df[date_index] * (
+                    (d_normal + d_knocked_in) * ko * amount
+                    + live * d_ko * amount
+                    + live * ko * d_price * payoff.derivative(date_price))
+                d_normal = d_normal * (1 - ko) - normal * d_ko
+                d_knocked_in = d_knocked_in * (1 - ko) - knocked_in * d_ko
+                normal *= 1 - ko
+                knocked_in *= 1 - ko
+            if 'KI' in obs_func:
+                ki = self.ki_barrier.observe_smooth(date, date_price, width)
+                d_ki = d_price * self.ki_barrier.smooth_derivative(
+                    date, date_price, width)
+                d_knocked_in += d_normal * ki + normal * d_ki
+                d_normal = d_normal * (1 - ki) - normal * d_ki
+                knocked_in += normal * ki
+                normal *= 1 - ki
+            if date == self.maturity:
+                ki_amount = self.ki_payoff.payoff(date_price)
+                mat_amount = self.mat_payoff.payoff(date_price)
+                pv += df[date_index] * (
+                    knocked_in * ki_amount + normal * mat_amount)
+                d_pv += df[date_index] * (
+                    d_knocked_in * ki_amount + d_normal * mat_amount
+                    + d_price * (
+                        knocked_in * self.ki_payoff.derivative(date_price)
+                        + normal * self.mat_payoff.derivative(date_price)))
+                break
+        return (pv, d_pv) if len(tangents) else pv
+
+    def observer(self, coarse=False):
+        """
+        observer with 'KO' and 'KI' barriers registered, built once per
+        coarse so that its calendars compile once across simulations
+
+        parameters
+        ----------
+        coarse: observe 'KI' only on strike date, 'KO' dates and maturity,
+            knock-ins in between follow from knock_in_between
+        """
+        if coarse in self._observers:
+            return self._observers[coarse]
+        observer = Observer(self.profiler)
+        observer.register_barrier('KO', self.ko_barrier)
+        if coarse:
+            observer.register_barrier('KI', self.ki_barrier.restrict(
+                [self.strike_date, self.maturity]
+                + self.ko_barrier.observe_dates))
+        else:
+            observer.register_barrier('KI', self.ki_barrier)
+        self._observers[coarse] = observer
+        return observer
+
+    def knock_in_between(self, state, index, prev_date, date,
+                         prev_price, price, uniform=None):
+        """
+        knock in paths at index between two coarse observation dates by the
+        Brownian-bridge probability of crossing the 'KI' barrier
+
+        parameters
+        ----------
+        state: SnowballPathState of the batch
+        index: live paths
+        prev_date: previous coarse date
+        date: current coarse date
+        prev_price: price of the live paths on prev_date
+        price: price of the live paths on date
+        uniform: function of n returning n uniforms, used when
+            ki_monitoring is 'sample'
+        """
+        if len(index) == 0:
+            return
+        probability = self.ki_barrier.crossing_probability(
+            prev_date, date, prev_price, price, self.vol,
+            self.continuity_correction)
+        if probability is None:
+            return
+        if self.ki_monitoring == 'weight':
+            state.knock_in_probability(index, probability)
+        else:
+            state.knock_in(index[uniform(len(index)) < probability])
+
+    def year_fraction(self, schedule, valuation_date=None):
+        """
+        year fraction of each step of the schedule
+        the first step starts from valuation_date, default to strike date
+        steps before valuation_date are 0
+        """
+        valuation_date = valuation_date or self.strike_date
+        t = np.array([max((date - valuation_date).days, 0)
+                      for date in schedule])
+        return np.diff(t, prepend=0) / 365
+
+    def discount_factor(self, schedule, valuation_date=None):
+        """discount factor of each schedule date, from strike date by default"""
+        r = self.rate
+        valuation_date = valuation_date or self.strike_date
+        t = np.array([(date - valuation_date).days for date in schedule])
+        return np.exp(- r * t / 365)
+
+    def calculate_pv_array(self, state, schedule, df=None):
+        df = self.discount_factor(schedule) if df is None else df
+        return state.ledger(schedule).path_pv(df)
+
+    def product_ledger(self, product_list, schedule):
+        """collect the ProductPayoff lists of the object engine in a ledger"""
+        date_index = {date: i for i, date in enumerate(schedule)}
+        tag_code = {tag: i for i, tag in enumerate(SnowballPathState.tags)}
+        cashflow = [(i, date_index[payoff.date], tag_code[payoff.tag],
+                     payoff.amount)
+                    for i, product in enumerate(product_list)
+                    for payoff in product.payoff]
+        path_index, date, tag, amount = zip(*cashflow) if cashflow \
+            else ([], [], [], [])
+        return CashflowLedger(path_index, date, tag, amount,
+                              len(product_list), schedule,
+                              SnowballPathState.tags)
 
     def ko(self, payoff, price, product, date):
         product.knock_out()
@@ -195,12 +995,80 @@ class SnowBallSimulate:
             product.pending_payoff = self.mat_payoff.payoff(price)
             product.confirm_payoff(date, 'maturity bonus coupon')
 
+    def retire_array(self, state, index, price, date_index):
+        knocked_in = state.state[index] == state.knocked_in
+        ki_amount = self.ki_payoff.payoff(price)
+        amount = np.where(knocked_in, ki_amount,
+                          self.mat_payoff.payoff(price))
+        if state.survival is None:
+            state.settle(index, date_index, amount)
+            return
+        survival = np.where(knocked_in, 1, state.survival[index])
+        state.settle_weighted(index, date_index, survival * amount,
+                              (1 - survival) * ki_amount)
+
+
+def populate_path(prev_path, new_path, date_pass, r=0.03, vol=0.5):
+    return populate_step(prev_path, new_path, date_pass.days / 365, r, vol)
+
+
+def populate_step(prev_path, new_path, t, r=0.03, vol=0.5):
+    """prices after a step of t years from prev_path"""
+    return prev_path * np.exp((r - 0.5 * vol ** 2) * t + vol * math.sqrt(t) * new_path)
+
+
+def populate_matrix(new_path, year_fraction, r=0.03, vol=0.5):
+    """
+    turn standard normals over a whole schedule into prices
+    with one cumulative sum and exp, new_path is overwritten
 
-def populate_path(prev_path, new_path, date_pass):
-    r = 0.03
-    vol = 0.5
-    t = date_pass.days / 365
-    return prev_path * np.exp((r - 0.5 * vol ** 2) * t + vol * np.sqrt(t) * new_path)
+    parameters
+    ----------
+    new_path: standard normals of shape (num_of_path, num_of_date)
+    year_fraction: year fraction of each step, shape (num_of_date, )
+    r: risk free rate
+    vol: volatility
+
+    returns
+    -------
+    prices of shape (num_of_path, num_of_date), starting from 1
+    """
+    log_path = np.multiply(new_path, vol * np.sqrt(year_fraction), out=new_path)
+    log_path += (r - 0.5 * vol ** 2) * year_fraction
+    np.cumsum(log_path, axis=1, out=log_path)
+    return np.exp(log_path, out=log_path)
+
+
+def control_adjust(pv, control, control_mean):
+    """
+    control variate estimator with the coefficient regressed on the same paths
+
+    parameters
+    ----------
+    pv: discounted payoff of each path
+    control: discounted control payoff of each path
+    control_mean: closed form expectation of the control
+
+    returns
+    -------
+    adjusted payoff of each path, same mean in expectation and lower variance
+    """
+    cov = np.cov(pv, control)
+    beta = cov[0, 1] / cov[1, 1] if cov[1, 1] > 0 else 0
+    return pv - beta * (control - control_mean)
+
+
+def matrix_chunk_size(num_of_date, memory_budget, itemsize=8,
+                      path_generator=None):
+    """
+    number of paths per chunk so that one path matrix fits memory_budget,
+    a power of 2 for generators drawing balanced sets of that size,
+    see SobolPathGenerator
+    """
+    chunk_size = max(1, memory_budget // (num_of_date * itemsize))
+    if getattr(path_generator, 'power_of_2_chunks', False):
+        chunk_size = 1 << (chunk_size.bit_length() - 1)
+    return chunk_size
 
 
 if __name__ == '__main__':
@@ -215,17 +1083,12 @@ if __name__ == '__main__':
         'Maturity': '2020-12-31',
         'KIObservationDate': ['2020-01-01', '2020-01-02', '2020-01-03', '2020-01-04', '2020-01-05', '2020-01-06', '2020-01-07', '2020-01-08', '2020-01-09', '2020-01-10', '2020-01-11', '2020-01-12', '2020-01-13', '2020-01-14', '2020-01-15', '2020-01-16', '2020-01-17', '2020-01-18', '2020-01-19', '2020-01-20', '2020-01-21', '2020-01-22', '2020-01-23', '2020-01-24', '2020-01-25', '2020-01-26', '2020-01-27', '2020-01-28', '2020-01-29', '2020-01-30', '2020-01-31', '2020-02-01', '2020-02-02', '2020-02-03', '2020-02-04', '2020-02-05', '2020-02-06', '2020-02-07', '2020-02-08', '2020-02-09', '2020-02-10', '2020-02-11', '2020-02-12', '2020-02-13', '2020-02-14', '2020-02-15', '2020-02-16', '2020-02-17', '2020-02-18', '2020-02-19', '2020-02-20', '2020-02-21', '2020-02-22', '2020-02-23', '2020-02-24', '2020-02-25', '2020-02-26', '2020-02-27', '2020-02-28', '2020-02-29', '2020-03-01', '2020-03-02', '2020-03-03', '2020-03-04', '2020-03-05', '2020-03-06', '2020-03-07', '2020-03-08', '2020-03-09', '2020-03-10', '2020-03-11', '2020-03-12', '2020-03-13', '2020-03-14', '2020-03-15', '2020-03-16', '2020-03-17', '2020-03-18', '2020-03-19', '2020-03-20', '2020-03-21', '2020-03-22', '2020-03-23', '2020-03-24', '2020-03-25', '2020-03-26', '2020-03-27', '2020-03-28', '2020-03-29', '2020-03-30', '2020-03-31', '2020-04-01', '2020-04-02', '2020-04-03', '2020-04-04', '2020-04-05', '2020-04-06', '2020-04-07', '2020-04-08', '2020-04-09', '2020-04-10', '2020-04-11', '2020-04-12', '2020-04-13', '2020-04-14', '2020-04-15', '2020-04-16', '2020-04-17', '2020-04-18', '2020-04-19', '2020-04-20', '2020-04-21', '2020-04-22', '2020-04-23', '2020-04-24', '2020-04-25', '2020-04-26', '2020-04-27', '2020-04-28', '2020-04-29', '2020-04-30', '2020-05-01', '2020-05-02', '2020-05-03', '2020-05-04', '2020-05-05', '2020-05-06', '2020-05-07', '2020-05-08', '2020-05-09', '2020-05-10', '2020-05-11', '2020-05-12', '2020-05-13', '2020-05-14', '2020-05-15', '2020-05-16', '2020-05-17', '2020-05-18', '2020-05-19', '2020-05-20', '2020-05-21', '2020-05-22', '2020-05-23', '2020-05-24', '2020-05-25', '2020-05-26', '2020-05-27', '2020-05-28', '2020-05-29', '2020-05-30', '2020-05-31', '2020-06-01', '2020-06-02', '2020-06-03', '2020-06-04', '2020-06-05', '2020-06-06', '2020-06-07', '2020-06-08', '2020-06-09', '2020-06-10', '2020-06-11', '2020-06-12', '2020-06-13', '2020-06-14', '2020-06-15', '2020-06-16', '2020-06-17', '2020-06-18', '2020-06-19', '2020-06-20', '2020-06-21', '2020-06-22', '2020-06-23', '2020-06-24', '2020-06-25', '2020-06-26', '2020-06-27', '2020-06-28', '2020-06-29', '2020-06-30', '2020-07-01', '2020-07-02', '2020-07-03', '2020-07-04', '2020-07-05', '2020-07-06', '2020-07-07', '2020-07-08', '2020-07-09', '2020-07-10', '2020-07-11', '2020-07-12', '2020-07-13', '2020-07-14', '2020-07-15', '2020-07-16', '2020-07-17', '2020-07-18', '2020-07-19', '2020-07-20', '2020-07-21', '2020-07-22', '2020-07-23', '2020-07-24', '2020-07-25', '2020-07-26', '2020-07-27', '2020-07-28', '2020-07-29', '2020-07-30', '2020-07-31', '2020-08-01', '2020-08-02', '2020-08-03', '2020-08-04', '2020-08-05', '2020-08-06', '2020-08-07', '2020-08-08', '2020-08-09', '2020-08-10', '2020-08-11', '2020-08-12', '2020-08-13', '2020-08-14', '2020-08-15', '2020-08-16', '2020-08-17', '2020-08-18', '2020-08-19', '2020-08-20', '2020-08-21', '2020-08-22', '2020-08-23', '2020-08-24', '2020-08-25', '2020-08-26', '2020-08-27', '2020-08-28', '2020-08-29', '2020-08-30', '2020-08-31', '2020-09-01', '2020-09-02', '2020-09-03', '2020-09-04', '2020-09-05', '2020-09-06', '2020-09-07', '2020-09-08', '2020-09-09', '2020-09-10', '2020-09-11', '2020-09-12', '2020-09-13', '2020-09-14', '2020-09-15', '2020-09-16', '2020-09-17', '2020-09-18', '2020-09-19', '2020-09-20', '2020-09-21', '2020-09-22', '2020-09-23', '2020-09-24', '2020-09-25', '2020-09-26', '2020-09-27', '2020-09-28', '2020-09-29', '2020-09-30', '2020-10-01', '2020-10-02', '2020-10-03', '2020-10-04', '2020-10-05', '2020-10-06', '2020-10-07', '2020-10-08', '2020-10-09', '2020-10-10', '2020-10-11', '2020-10-12', '2020-10-13', '2020-10-14', '2020-10-15', '2020-10-16', '2020-10-17', '2020-10-18', '2020-10-19', '2020-10-20', '2020-10-21', '2020-10-22', '2020-10-23', '2020-10-24', '2020-10-25', '2020-10-26', '2020-10-27', '2020-10-28', '2020-10-29', '2020-10-30', '2020-10-31', '2020-11-01', '2020-11-02', '2020-11-03', '2020-11-04', '2020-11-05', '2020-11-06', '2020-11-07', '2020-11-08', '2020-11-09', '2020-11-10', '2020-11-11', '2020-11-12', '2020-11-13', '2020-11-14', '2020-11-15', '2020-11-16', '2020-11-17', '2020-11-18', '2020-11-19', '2020-11-20', '2020-11-21', '2020-11-22', '2020-11-23', '2020-11-24', '2020-11-25', '2020-11-26', '2020-11-27', '2020-11-28', '2020-11-29', '2020-11-30', '2020-12-01', '2020-12-02', '2020-12-03', '2020-12-04', '2020-12-05', '2020-12-06', '2020-12-07', '2020-12-08', '2020-12-09', '2020-12-10', '2020-12-11', '2020-12-12', '2020-12-13', '2020-12-14', '2020-12-15', '2020-12-16', '2020-12-17', '2020-12-18', '2020-12-19', '2020-12-20', '2020-12-21', '2020-12-22', '2020-12-23', '2020-12-24', '2020-12-25', '2020-12-26', '2020-12-27', '2020-12-28', '2020-12-29', '2020-12-30', '2020-12-31'],
     }
-    simulate = SnowBallSimulate(SnowballProduct, test_param)
-
-    class PathGenerator:
-
-        def __init__(self, seed=888):
-            self.seed = seed
-            self.generator = np.random.mtrand.RandomState(seed=self.seed)
-
-        def get_path(self, num_of_path):
-            return self.generator.randn(num_of_path)
+    simulate = SnowBallSimulate(SnowballProduct, test_param,
+                                profiler=Profiler(print_sink))
 
     # import cProfile
     # cProfile.run('simulate.simulate_live(PathGenerator(), 100000)')
-    simulate.simulate(PathGenerator(), 100000)
+    print(simulate.simulate(PathGenerator(), 100000, engine='array'))
+    # whole paths pay off through variance reduction
+    print(simulate.simulate_result(PathGenerator(), 100000,
+                                   antithetic=True, control_variate=True))
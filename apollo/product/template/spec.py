@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import struct
+import hashlib
+import threading
+import datetime as dt
+import numpy as np
+from collections import OrderedDict
+from typing import List
+from apollo.product.barrier import KnockOutBarrier, KnockInBarrier
+from apollo.product.payoff import (
+    VanillaPutPayoff,
+    ConstantPayoff,
+    PayoffTable,
+)
+from apollo.utils import LazyProperty
+
+# number of compiled specs kept by compile_spec
+SPEC_CACHE_SIZE = 1024
+
+
+class ContractSpec:
+    """
+    snowball contract parameters validated and compiled once into
+    read-only arrays of date ordinals, barrier positions and rebates
+    the barriers and payoffs built from it are cached on the spec, every
+    SnowBallSimulate of the contract takes its own copies, see compile_spec
+    """
+    # magic, version, strike date, maturity, strike, maturity bonus coupon,
+    # number of 'KO' dates, number of 'KI' dates
+    _header = struct.Struct('<4sBiiddII')
+    _magic = b'SNWB'
+    _version = 1
+
+    def __init__(self,
+                 strike_date: int,
+                 maturity: int,
+                 strike: float,
+                 bonus_coupon: float,
+                 ko_date: np.ndarray,
+                 ko_position: np.ndarray,
+                 ko_rebate: np.ndarray,
+                 ki_date: np.ndarray,
+                 ki_position: np.ndarray):
+        """
+        parameters
+        ----------
+        strike_date, maturity: date ordinals
+        strike: knock-in put strike
+        bonus_coupon: maturity bonus coupon rate
+        ko_date, ko_position, ko_rebate: 'KO' observation date ordinals,
+            barrier position and rebate rate on each
+        ki_date, ki_position: 'KI' observation date ordinals and barrier
+            position on each
+        """
+        self.strike_date = int(strike_date)
+        self.maturity = int(maturity)
+        self.strike = float(strike)
+        self.bonus_coupon = float(bonus_coupon)
+        self.ko_date = _frozen(ko_date, np.int32)
+        self.ko_position = _frozen(ko_position, np.float64)
+        self.ko_rebate = _frozen(ko_rebate, np.float64)
+        self.ki_date = _frozen(ki_date, np.int32)
+        self.ki_position = _frozen(ki_position, np.float64)
+        self._validate()
+
+    def _validate(self):
+        assert self.strike_date <= self.maturity, \
+            f'strike date ({dt.date.fromordinal(self.strike_date)}) is ' \
+            f'after maturity ({dt.date.fromordinal(self.maturity)})'
+        for name in ['ko', 'ki']:
+            date = getattr(self, f'{name}_date')
+            assert np.all(np.diff(date) > 0), \
+                f'{name} observation dates should be strictly increasing'
+            assert len(getattr(self, f'{name}_position')) == len(date), \
+                f'{name} position dimension != {name} date dimension'
+        assert len(self.ko_rebate) == len(self.ko_date), \
+            f'rebate dimension ({len(self.ko_rebate)}) != ' \
+            f'ko date dimension ({len(self.ko_date)})'
+
+    @classmethod
+    def from_parameters(cls, parameters: dict) -> 'ContractSpec':
+        """
+        parse and validate a parameter dict, see SnowBallSimulate
+        barrier positions are either one number or one per date
+        """
+        missing = {'StrikeDate', 'Maturity', 'Strike', 'MaturityBonusCoupon',
+                   'ObservationDate', 'UpperBarrier', 'KnockOutRebate',
+                   'KIObservationDate', 'KIBarrier'} - set(parameters)
+        assert not missing, f'missing parameters {sorted(missing)}'
+        ko_date = _ordinals(parameters['ObservationDate'])
+        ki_date = _ordinals(parameters['KIObservationDate'])
+        return cls(
+            strike_date=_ordinals([parameters['StrikeDate']])[0],
+            maturity=_ordinals([parameters['Maturity']])[0],
+            strike=parameters['Strike'],
+            bonus_coupon=parameters['MaturityBonusCoupon'],
+            ko_date=ko_date,
+            ko_position=np.broadcast_to(parameters['UpperBarrier'],
+                                        ko_date.shape),
+            ko_rebate=parameters['KnockOutRebate'],
+            ki_date=ki_date,
+            ki_position=np.broadcast_to(parameters['KIBarrier'],
+                                        ki_date.shape),
+        )
+
+    def to_bytes(self) -> bytes:
+        """compact little-endian binary form, see from_bytes"""
+        header = self._header.pack(
+            self._magic, self._version, self.strike_date, self.maturity,
+            self.strike, self.bonus_coupon,
+            len(self.ko_date), len(self.ki_date))
+        return header + b''.join(
+            array.astype(array.dtype.newbyteorder('<'), copy=False).tobytes()
+            for array in [self.ko_date, self.ko_position, self.ko_rebate,
+                          self.ki_date, self.ki_position])
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'ContractSpec':
+        """spec from to_bytes"""
+        (magic, version, strike_date, maturity, strike, bonus_coupon,
+         num_of_ko, num_of_ki) = cls._header.unpack_from(data)
+        assert magic == cls._magic and version == cls._version, \
+            f'not a version {cls._version} contract spec'
+        offset = cls._header.size
+        arrays = []
+        for dtype, count in [('<i4', num_of_ko), ('<f8', num_of_ko),
+                             ('<f8', num_of_ko), ('<i4', num_of_ki),
+                             ('<f8', num_of_ki)]:
+            arrays.append(np.frombuffer(data, dtype, count, offset))
+            offset += arrays[-1].nbytes
+        assert offset == len(data), \
+            f'contract spec size {len(data)} != expected size {offset}'
+        return cls(strike_date, maturity, strike, bonus_coupon, *arrays)
+
+    @LazyProperty
+    def hash(self) -> str:
+        """content hash, equal for specs of the same contract"""
+        return hashlib.sha256(self.to_bytes()).hexdigest()[:32]
+
+    @LazyProperty
+    def ko_dates(self) -> List[dt.date]:
+        return [dt.date.fromordinal(int(d)) for d in self.ko_date]
+
+    @LazyProperty
+    def ki_dates(self) -> List[dt.date]:
+        return [dt.date.fromordinal(int(d)) for d in self.ki_date]
+
+    @LazyProperty
+    def ko_barrier(self) -> KnockOutBarrier:
+        return KnockOutBarrier(
+            direction='upper',
+            position=_position(self.ko_position),
+            observe_dates=self.ko_dates,
+            inclusive=True,
+        )
+
+    @LazyProperty
+    def ki_barrier(self) -> KnockInBarrier:
+        return KnockInBarrier(
+            direction='lower',
+            position=_position(self.ki_position),
+            observe_dates=self.ki_dates,
+            inclusive=True,
+        )
+
+    @LazyProperty
+    def ko_payoff(self) -> PayoffTable:
+        return PayoffTable(
+            self.ko_dates,
+            [ConstantPayoff(rate=rebate) for rebate in self.ko_rebate.tolist()],
+        )
+
+    @LazyProperty
+    def ki_payoff(self) -> VanillaPutPayoff:
+        return VanillaPutPayoff(strike=self.strike, weight=-1)
+
+    @LazyProperty
+    def mat_payoff(self) -> ConstantPayoff:
+        return ConstantPayoff(rate=self.bonus_coupon)
+
+    def __eq__(self, other):
+        return isinstance(other, ContractSpec) and self.hash == other.hash
+
+    def __hash__(self):
+        return hash(self.hash)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {self.hash[:8]} ' \
+               f'ko={len(self.ko_date)} ki={len(self.ki_date)}>'
+
+
+def compile_spec(parameters: dict) -> ContractSpec:
+    """
+    ContractSpec of a parameter dict, the last SPEC_CACHE_SIZE compiled
+    are kept, keyed on the canonical form of parameters
+    thread safe, parsing runs outside the lock
+    """
+    key = _canonical(parameters)
+    with _spec_lock:
+        spec = _spec_cache.get(key)
+        if spec is not None:
+            _spec_cache.move_to_end(key)
+            return spec
+    spec = ContractSpec.from_parameters(parameters)
+    with _spec_lock:
+        # keep the spec of a thread that compiled the same parameters first
+        spec = _spec_cache.setdefault(key, spec)
+        _spec_cache.move_to_end(key)
+        while len(_spec_cache) > SPEC_CACHE_SIZE:
+            _spec_cache.popitem(last=False)
+    return spec
+
+
+_spec_cache: 'OrderedDict[tuple, ContractSpec]' = OrderedDict()
+_spec_lock = threading.Lock()
+
+
+def _canonical(value):
+    """
+    hashable form of a parameter value, floats and arrays kept exact,
+    unlike their str, and dates as iso strings like the parsed ones
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _canonical(v)) for k, v in value.items()))
+    if isinstance(value, np.ndarray):
+        value = value.tolist()
+    if isinstance(value, (list, tuple)):
+        if all(isinstance(v, (str, int, float)) for v in value):
+            return tuple(value)
+        return tuple(_canonical(v) for v in value)
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dt.date):
+        return value.isoformat()
+    return value
+
+
+def _ordinals(dates) -> np.ndarray:
+    return np.array([dt.date.fromisoformat(d).toordinal()
+                     if isinstance(d, str) else d.toordinal()
+                     for d in dates], dtype=np.int32)
+
+
+def _frozen(array, dtype) -> np.ndarray:
+    array = np.array(array, dtype=dtype)
+    array.setflags(write=False)
+    return array
+
+
+def _position(position: np.ndarray):
+    # one number when constant, as PositionBarrier then skips the lookup
+    if len(position) and np.all(position == position[0]):
+        return float(position[0])
+    return position.tolist()
+
+
+if __name__ == '__main__':
+    pass
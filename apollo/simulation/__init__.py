@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+from .path_generator import (
+    PathGenerator,
+    antithetic_matrix,
+)
+from .parallel import (
+    ParallelSimulate,
+)
+from .statistics import (
+    RunningStatistics,
+    SimulationResult,
+)
+from .streaming import (
+    StreamingSimulate,
+)
+from .path_store import (
+    PathStore,
+)
+from .multi_asset import (
+    MultiAsset,
+)
+from .sobol import (
+    BrownianBridge,
+    SobolPathGenerator,
+    randomized_qmc,
+)
+
+
+if __name__ == '__main__':
+    pass
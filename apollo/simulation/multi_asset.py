@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import math
+import numpy as np
+from typing import Optional, Sequence
+
+
+class MultiAsset:
+    """
+    correlated lognormal assets observed through one reduced performance
+    normals of all assets are drawn as one block, assets on the first
+    axis, and correlated by the Cholesky factor of the correlation matrix
+    in one matrix product, the per asset performances are then reduced
+    along the asset axis in one call, so the cost grows linearly with the
+    number of assets
+    """
+    reductions = ['worst_of', 'best_of', 'basket']
+
+    def __init__(self,
+                 vol: Sequence[float],
+                 correlation: Sequence[Sequence[float]],
+                 reduction: str = 'worst_of',
+                 weights: Optional[Sequence[float]] = None):
+        """
+        parameters
+        ----------
+        vol: volatility of each asset
+        correlation: correlation matrix of the asset returns,
+            symmetric positive definite
+        reduction: 'worst_of' or 'best_of' performance, or 'basket',
+            the weighted sum of performances
+        weights: basket weights, equal weights by default
+        """
+        assert reduction in self.reductions, \
+            f"reduction should be one of {self.reductions}, " \
+            f"got '{reduction}'"
+        self.vol = np.asarray(vol, dtype=float)
+        self.correlation = np.asarray(correlation, dtype=float)
+        assert self.correlation.shape == (len(self.vol), len(self.vol)), \
+            f'correlation shape {self.correlation.shape} != ' \
+            f'({len(self.vol)}, {len(self.vol)})'
+        self.reduction = reduction
+        if weights is None:
+            weights = np.full(len(self.vol), 1 / len(self.vol))
+        self.weights = np.asarray(weights, dtype=float)
+        assert self.weights.shape == self.vol.shape, \
+            f'weights dimension ({len(self.weights)}) != ' \
+            f'asset dimension ({len(self.vol)})'
+        # raises LinAlgError if the correlation is not positive definite
+        self.cholesky = np.linalg.cholesky(self.correlation)
+
+    @property
+    def num_of_asset(self) -> int:
+        return len(self.vol)
+
+    def correlate(self, normal: np.ndarray) -> np.ndarray:
+        """
+        correlated normals from independent ones, assets on the first axis,
+        one matrix product over all the other axes
+        """
+        shape = normal.shape
+        normal = normal.reshape(self.num_of_asset, -1)
+        return (self.cholesky.astype(normal.dtype, copy=False)
+                @ normal).reshape(shape)
+
+    def reduce(self, performance: np.ndarray) -> np.ndarray:
+        """
+        reduced performance, assets on the first axis, each asset is a
+        contiguous block so the reduction is elementwise across blocks
+        """
+        if self.reduction == 'worst_of':
+            return np.minimum.reduce(performance, axis=0)
+        if self.reduction == 'best_of':
+            return np.maximum.reduce(performance, axis=0)
+        return np.tensordot(self.weights.astype(performance.dtype,
+                                                copy=False),
+                            performance, axes=1)
+
+    def performance(self, normal: np.ndarray, year_fraction: np.ndarray,
+                    rate: float) -> np.ndarray:
+        """
+        per asset performance over a whole schedule
+
+        parameters
+        ----------
+        normal: independent standard normals of shape
+            (num_of_asset, num_of_path, num_of_date), the paths of one
+            date contiguous like PathGenerator.get_matrix
+        year_fraction: year fraction of each step, shape (num_of_date, )
+        rate: risk free rate
+
+        returns
+        -------
+        array of the shape and layout of normal, starting from 1
+        """
+        # date-major view, contiguous along paths
+        log_path = self.correlate(normal.transpose(0, 2, 1))
+        vol = self.vol[:, np.newaxis, np.newaxis]
+        year_fraction = year_fraction[:, np.newaxis]
+        log_path *= vol * np.sqrt(year_fraction)
+        log_path += (rate - 0.5 * vol ** 2) * year_fraction
+        np.cumsum(log_path, axis=1, out=log_path)
+        return np.exp(log_path, out=log_path).transpose(0, 2, 1)
+
+    def step(self, performance: np.ndarray, normal: np.ndarray,
+             t: float, rate: float) -> np.ndarray:
+        """
+        per asset performance after a step of t years
+
+        parameters
+        ----------
+        performance: array of shape (num_of_asset, num_of_path)
+        normal: independent standard normals of the same shape
+        t: step in years
+        rate: risk free rate
+        """
+        vol = self.vol[:, np.newaxis]
+        log_step = self.correlate(normal)
+        log_step *= vol * math.sqrt(t)
+        log_step += (rate - 0.5 * vol ** 2) * t
+        return performance * np.exp(log_step, out=log_step)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {self.reduction} ' \
+               f'vol={self.vol.tolist()} ' \
+               f'correlation={self.correlation.tolist()} ' \
+               f'weights={self.weights.tolist()}>'
+
+
+if __name__ == '__main__':
+    pass
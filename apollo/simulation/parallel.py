@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import os
+import math
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Type
+from apollo.simulation.path_generator import PathGenerator
+
+
+def _batch_pv_sum(simulate, generator, num_of_path, engine):
+    return math.fsum(simulate.path_pv(generator, num_of_path, engine=engine))
+
+
+def _process_context():
+    # workers forked from a fork server rather than from the caller, which
+    # may run threads that do not survive a fork, e.g. the threading layer
+    # of numba after the fused engine ran
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context()
+
+
+class ParallelSimulate:
+    """
+    run monte carlo path batches on a pool of workers
+
+    paths are split into batches of a fixed size, batch i draws from
+    the i-th stream spawned from one seed and the per-batch sums are merged
+    with an exact summation, so the result does not depend on the backend
+    or on how many workers ran
+    """
+
+    def __init__(self,
+                 backend: str = 'process',
+                 num_of_worker: Optional[int] = None,
+                 batch_size: int = 2 ** 16,
+                 generator_cls: Type[PathGenerator] = PathGenerator):
+        """
+        parameters
+        ----------
+        backend: 'process' for a process pool, started from a fork server
+            where available, 'thread' for a thread pool
+            numpy releases the GIL in random generation and array arithmetic
+        num_of_worker: pool size, default to the number of cpus
+        batch_size: number of paths per batch, part of the random stream layout
+            changing it changes the result, changing num_of_worker does not
+        generator_cls: path generator class, constructed from a SeedSequence
+        """
+        assert backend in ['process', 'thread'], \
+            f"backend should be either 'process' or 'thread', " \
+            f"got '{backend}'"
+        self.backend = backend
+        self.num_of_worker = num_of_worker or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.generator_cls = generator_cls
+
+    def batches(self, num_of_path: int):
+        """sizes of the path batches"""
+        return [min(self.batch_size, num_of_path - beg)
+                for beg in range(0, num_of_path, self.batch_size)]
+
+    def simulate(self, simulate, seed: int, num_of_path: int,
+                 engine: str = 'array') -> float:
+        """
+        parallel monte carlo pv
+
+        parameters
+        ----------
+        simulate: pricer providing path_pv(path_generator, num_of_path, engine)
+            must be picklable for the process backend
+        seed: root random seed
+        num_of_path: number of simulated paths
+        engine: engine passed to path_pv
+
+        returns
+        -------
+        average discounted payoff
+        """
+        sizes = self.batches(num_of_path)
+        generators = self.generator_cls.spawn(seed, len(sizes))
+        func = functools.partial(_batch_pv_sum, simulate, engine=engine)
+        if self.backend == 'process':
+            executor = ProcessPoolExecutor(max_workers=self.num_of_worker,
+                                           mp_context=_process_context())
+        else:
+            executor = ThreadPoolExecutor(max_workers=self.num_of_worker)
+        with executor:
+            partial_sums = list(executor.map(func, generators, sizes))
+        return math.fsum(partial_sums) / num_of_path
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {self.backend} ' \
+               f'x{self.num_of_worker}>'
+
+
+if __name__ == '__main__':
+    pass
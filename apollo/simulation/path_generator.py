@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import hashlib
+import numpy as np
+from typing import List, Union
+
+# spawn key of the uniform stream under the seed of a path generator
+UNIFORM_STREAM = 0x756E69
+
+
+class PathGenerator:
+    """pseudo random standard normal generator"""
+
+    def __init__(self, seed: Union[int, np.random.SeedSequence] = 888):
+        """
+        parameters
+        ----------
+        seed: random seed, or a SeedSequence spawned for an independent stream
+        """
+        self.seed = seed
+        if isinstance(seed, np.random.SeedSequence):
+            self.generator = np.random.mtrand.RandomState(
+                np.random.MT19937(seed))
+        else:
+            self.generator = np.random.mtrand.RandomState(seed=self.seed)
+        self.uniform_generator = None
+
+    @classmethod
+    def spawn(cls, seed: int, num_of_stream: int) -> List['PathGenerator']:
+        """
+        independent generators spawned from one seed
+        stream i only depends on seed and i, not on num_of_stream
+
+        parameters
+        ----------
+        seed: root random seed
+        num_of_stream: number of generators
+
+        returns
+        -------
+        list of generators
+        """
+        return [cls(child) for child in
+                np.random.SeedSequence(seed).spawn(num_of_stream)]
+
+    def get_path(self, num_of_path: int) -> np.ndarray:
+        """
+        standard normals for one observation date
+
+        parameters
+        ----------
+        num_of_path: number of paths
+
+        returns
+        -------
+        array of shape (num_of_path, )
+        """
+        return self.generator.randn(num_of_path)
+
+    def get_matrix(self, num_of_path: int, num_of_date: int,
+                   dtype=np.float64) -> np.ndarray:
+        """
+        standard normals for a whole schedule in one call
+
+        parameters
+        ----------
+        num_of_path: number of paths
+        num_of_date: number of observation dates
+        dtype: float dtype of the matrix, the normals are drawn in float64
+            in the same order whatever the dtype and rounded date by date
+
+        returns
+        -------
+        array of shape (num_of_path, num_of_date), in column-major order
+            so that the paths of one date are contiguous
+        """
+        if np.dtype(dtype) == np.float64:
+            return self.generator.randn(num_of_date, num_of_path).T
+        matrix = np.empty((num_of_date, num_of_path), dtype=dtype)
+        for i in range(num_of_date):
+            matrix[i] = self.generator.randn(num_of_path)
+        return matrix.T
+
+    def get_uniform(self, num_of_path: int) -> np.ndarray:
+        """
+        uniforms on [0, 1), e.g. to sample barrier crossings between dates
+        drawn from a stream of their own, see uniform_stream, so the normals
+        do not depend on when or how many uniforms are drawn
+
+        parameters
+        ----------
+        num_of_path: number of paths
+
+        returns
+        -------
+        array of shape (num_of_path, )
+        """
+        if self.uniform_generator is None:
+            self.uniform_generator = uniform_stream(self.seed)
+        return self.uniform_generator.random(num_of_path)
+
+    def state_key(self) -> str:
+        """digest of the generator state, equal digests draw equal numbers"""
+        return hashlib.sha256(self.get_state().tobytes()).hexdigest()[:32]
+
+    def get_state(self) -> np.ndarray:
+        """generator state as a float64 array, see set_state"""
+        _, key, pos, has_gauss, gauss = self.generator.get_state()
+        return np.concatenate([key, [pos, has_gauss, gauss]]).astype(float)
+
+    def set_state(self, state: np.ndarray):
+        """restore a state of get_state"""
+        self.generator.set_state(('MT19937', state[:-3].astype(np.uint32),
+                                  int(state[-3]), int(state[-2]),
+                                  float(state[-1])))
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} seed={self.seed}>'
+
+
+def uniform_stream(seed) -> np.random.Generator:
+    """
+    pseudo random generator of uniforms derived from the seed of a path
+    generator, independent of its normals and of the streams of spawn
+
+    parameters
+    ----------
+    seed: int, SeedSequence or None, see PathGenerator
+    """
+    if isinstance(seed, np.random.SeedSequence):
+        sequence = np.random.SeedSequence(
+            seed.entropy, spawn_key=seed.spawn_key + (UNIFORM_STREAM,))
+    else:
+        sequence = np.random.SeedSequence(seed, spawn_key=(UNIFORM_STREAM,))
+    return np.random.default_rng(sequence)
+
+
+def antithetic_matrix(path_generator, num_of_path: int,
+                      num_of_date: int, dtype=np.float64) -> np.ndarray:
+    """
+    standard normals over a whole schedule in antithetic pairs
+    row 2k + 1 is the negative of row 2k
+
+    parameters
+    ----------
+    path_generator: generator providing get_matrix(num_of_path, num_of_date)
+    num_of_path: number of paths
+    num_of_date: number of observation dates
+    dtype: float dtype of the matrix
+
+    returns
+    -------
+    array of shape (num_of_path, num_of_date), in column-major order
+    """
+    half = path_generator.get_matrix((num_of_path + 1) // 2, num_of_date,
+                                     dtype)
+    matrix = np.empty((num_of_date, num_of_path), dtype=dtype).T
+    matrix[0::2] = half
+    np.negative(half[:num_of_path // 2], out=matrix[1::2])
+    return matrix
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import os
+import json
+import hashlib
+import tempfile
+import numpy as np
+from typing import Callable, Optional, Tuple
+
+
+class PathStore:
+    """
+    on-disk cache of simulated path matrices as memory-mapped .npy files
+    files are written once under a temporary name and renamed into place,
+    so other processes either map a complete matrix or none
+    the directory is kept under max_bytes by evicting the least recently
+    used matrices
+    """
+    suffix = '.npy'
+
+    def __init__(self, directory: str, max_bytes: int = 2 ** 32):
+        """
+        parameters
+        ----------
+        directory: cache directory, created if missing
+        max_bytes: size bound of the cached matrices
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(**fields) -> str:
+        """
+        content key of a path matrix, e.g. from model parameters,
+        generator seed, date grid and number of paths
+        """
+        text = json.dumps(fields, sort_keys=True, default=str)
+        return hashlib.sha256(text.encode()).hexdigest()[:32]
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.suffix)
+
+    def get(self, key: str) -> Optional[np.memmap]:
+        """read-only zero-copy map of a cached matrix, None if missing"""
+        path = self.path(key)
+        try:
+            matrix = np.load(path, mmap_mode='r')
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return matrix
+
+    def put(self, key: str, shape: Tuple[int, int],
+            fill: Callable[[np.memmap], None],
+            dtype=np.float64) -> np.memmap:
+        """
+        create a cached matrix in column-major order and map it read-only
+
+        parameters
+        ----------
+        key: content key, see key
+        shape: (num_of_path, num_of_date)
+        fill: function writing the matrix into the given writable map
+        dtype: matrix dtype
+
+        returns
+        -------
+        read-only map of the matrix
+        """
+        fd, tmp_path = tempfile.mkstemp(suffix=self.suffix + '.tmp',
+                                        dir=self.directory)
+        os.close(fd)
+        try:
+            matrix = np.lib.format.open_memmap(
+                tmp_path, mode='w+', dtype=dtype, shape=shape,
+                fortran_order=True)
+            fill(matrix)
+            matrix.flush()
+            del matrix
+            os.replace(tmp_path, self.path(key))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self.evict(keep=key)
+        return self.get(key)
+
+    def get_or_create(self, key: str, shape: Tuple[int, int],
+                      fill: Callable[[np.memmap], None],
+                      dtype=np.float64) -> np.memmap:
+        """cached matrix of key, created by fill on a miss, see put"""
+        matrix = self.get(key)
+        if matrix is None or matrix.shape != tuple(shape):
+            matrix = self.put(key, shape, fill, dtype)
+        return matrix
+
+    def entries(self):
+        """cached (path, size, last access time), least recent first"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.suffix):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def size(self) -> int:
+        """total bytes of the cached matrices"""
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, keep: Optional[str] = None):
+        """remove least recently used matrices until under max_bytes"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        keep = keep and self.path(keep)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for path, _, _ in self.entries():
+            os.remove(path)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {self.directory} ' \
+               f'max_bytes={self.max_bytes}>'
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import time
+import hashlib
+import datetime as dt
+import numpy as np
+from typing import List, Optional, Sequence
+from apollo.simulation.path_generator import uniform_stream
+from apollo.simulation.statistics import RunningStatistics, SimulationResult
+
+
+def bisection_order(index: Sequence[int]) -> List[int]:
+    """
+    coarse to fine construction order of a sorted index list
+    the last one first, then recursive midpoints
+    """
+    index = list(index)
+    if not index:
+        return []
+    order = [index[-1]]
+    queue = [(-1, len(index) - 1)]
+    while queue:
+        low, high = queue.pop(0)
+        if high - low < 2:
+            continue
+        mid = (low + high) // 2
+        order.append(index[mid])
+        queue.extend([(low, mid), (mid, high)])
+    return order
+
+
+class BrownianBridge:
+    """brownian bridge construction over an arbitrary time grid"""
+
+    def __init__(self, times: Sequence[float], order: Sequence[int]):
+        """
+        parameters
+        ----------
+        times: non-decreasing year fractions of each date from the start
+        order: construction order of the date indices,
+            the first one uses the first normal coordinate
+        """
+        self.times = np.asarray(times, dtype=float)
+        assert sorted(order) == list(range(len(self.times))), \
+            'order should be a permutation of the date indices'
+        self.order = list(order)
+        num_of_date = len(self.times)
+        self.left = np.full(num_of_date, -1)
+        self.right = np.full(num_of_date, -1)
+        self.left_weight = np.zeros(num_of_date)
+        self.right_weight = np.zeros(num_of_date)
+        self.std = np.zeros(num_of_date)
+        built = []
+        for k in self.order:
+            pos = np.searchsorted(built, k)
+            left = built[pos - 1] if pos > 0 else -1
+            right = built[pos] if pos < len(built) else -1
+            t, t_left = self.times[k], self.times[left] if left >= 0 else 0
+            if right < 0:
+                self.left_weight[k] = 1
+                self.std[k] = np.sqrt(t - t_left)
+            else:
+                t_right = self.times[right]
+                span = t_right - t_left
+                if span > 0:
+                    self.left_weight[k] = (t_right - t) / span
+                    self.right_weight[k] = (t - t_left) / span
+                    self.std[k] = np.sqrt((t - t_left) * (t_right - t) / span)
+                else:
+                    self.left_weight[k] = 1
+            self.left[k], self.right[k] = left, right
+            built.insert(pos, k)
+
+    def build(self, normal: np.ndarray) -> np.ndarray:
+        """
+        brownian motion at each date
+
+        parameters
+        ----------
+        normal: standard normals of shape (num_of_path, num_of_date),
+            column i feeds the i-th date in construction order
+
+        returns
+        -------
+        array of shape (num_of_path, num_of_date) in date order
+        """
+        path = np.zeros((len(self.times), len(normal))).T
+        for step, k in enumerate(self.order):
+            value = np.zeros(len(normal))
+            if self.std[k] > 0:
+                value += self.std[k] * normal[:, step]
+            if self.left[k] >= 0:
+                value += self.left_weight[k] * path[:, self.left[k]]
+            if self.right[k] >= 0:
+                value += self.right_weight[k] * path[:, self.right[k]]
+            path[:, k] = value
+        return path
+
+    def increment(self, normal: np.ndarray) -> np.ndarray:
+        """
+        brownian increments scaled back to standard normals per step
+        steps of zero length get zero
+        """
+        path = self.build(normal)
+        step = np.diff(self.times, prepend=0)
+        scale = np.divide(1, np.sqrt(step), out=np.zeros_like(step),
+                          where=step > 0)
+        increment = np.diff(path, axis=1, prepend=0)
+        increment *= scale
+        return np.asfortranarray(increment)
+
+
+class SobolPathGenerator:
+    """
+    quasi random generator of whole paths
+    scrambled sobol points mapped to normals through a brownian bridge,
+    so the priority dates take the best distributed coordinates
+    paths are built whole, there is no get_path of one date at a time,
+    use the 'matrix' or 'fused' engine
+    requires scipy
+    """
+    # sobol balance holds for draws of a power of 2 points,
+    # see matrix_chunk_size
+    power_of_2_chunks = True
+
+    def __init__(self,
+                 times: Sequence[float],
+                 priority: Sequence[int] = (),
+                 seed=None,
+                 scramble: bool = True):
+        """
+        parameters
+        ----------
+        times: year fraction of each schedule date from the start
+        priority: indices of the dates to build first, typically KO dates,
+            the last date is always built first
+        seed: scrambling seed, int, SeedSequence or numpy Generator
+        scramble: owen scrambling, required for randomized replications
+        """
+        try:
+            from scipy.stats import qmc
+        except ImportError as e:
+            raise ImportError(
+                f'{self.__class__.__name__} requires scipy') from e
+        self.times = np.asarray(times, dtype=float)
+        self.priority = sorted(set(priority) | {len(self.times) - 1})
+        self.seed = seed
+        self.scramble = scramble
+        rest = sorted(set(range(len(self.times))) - set(self.priority))
+        self.bridge = BrownianBridge(
+            self.times, bisection_order(self.priority) + bisection_order(rest))
+        if isinstance(seed, np.random.SeedSequence):
+            seed = np.random.default_rng(seed)
+        self.engine = qmc.Sobol(d=len(self.times), scramble=scramble,
+                                seed=seed)
+        if not scramble:
+            self.engine.fast_forward(1)
+        self.uniform_generator = None
+
+    @classmethod
+    def from_schedule(cls,
+                      schedule: Sequence[dt.date],
+                      start_date: dt.date,
+                      priority_dates: Sequence[dt.date] = (),
+                      **kwargs) -> 'SobolPathGenerator':
+        """
+        generator over an observation schedule, see Observer.schedule
+
+        parameters
+        ----------
+        schedule: sorted observation dates
+        start_date: date the paths start from
+        priority_dates: dates to build first, typically KO dates
+        **kwargs: seed and scramble
+        """
+        times = [(date - start_date).days / 365 for date in schedule]
+        priority_dates = set(priority_dates)
+        priority = [i for i, date in enumerate(schedule)
+                    if date in priority_dates]
+        return cls(times, priority, **kwargs)
+
+    def replicate(self, num_of_replication: int) -> List['SobolPathGenerator']:
+        """
+        independently scrambled copies for randomized qmc error estimates
+        copy i only depends on seed and i
+        """
+        assert self.scramble, 'replications need scrambling'
+        root = self.seed
+        if not isinstance(root, np.random.SeedSequence):
+            root = np.random.SeedSequence(
+                root if isinstance(root, int) else None)
+        return [self.__class__(self.times, self.priority, child)
+                for child in root.spawn(num_of_replication)]
+
+    def get_matrix(self, num_of_path: int, num_of_date: int,
+                   dtype=np.float64) -> np.ndarray:
+        """
+        standard normals for the whole schedule, see PathGenerator.get_matrix
+        sobol balance holds for powers of 2 of num_of_path
+        """
+        from scipy.special import ndtri
+        assert num_of_date == len(self.times), \
+            f'generator built for {len(self.times)} dates, got {num_of_date}'
+        eps = np.finfo(float).eps
+        uniform = np.clip(self.engine.random(num_of_path), eps, 1 - eps)
+        normal = ndtri(uniform)
+        return self.bridge.increment(normal).astype(dtype, order='F',
+                                                    copy=False)
+
+    def get_uniform(self, num_of_path: int) -> np.ndarray:
+        """
+        uniforms on [0, 1), e.g. to sample barrier crossings between dates
+        pseudo random from a stream of their own, see uniform_stream,
+        the sobol points only drive the normals
+        """
+        if self.uniform_generator is None:
+            seed = self.seed
+            if isinstance(seed, np.random.Generator):
+                seed = seed.bit_generator.seed_seq
+            self.uniform_generator = uniform_stream(seed)
+        return self.uniform_generator.random(num_of_path)
+
+    def state_key(self) -> Optional[str]:
+        """
+        digest of the generator state, equal digests draw equal numbers,
+        None when the scrambling is not reproducible, i.e. seeded by None
+        or by a numpy Generator
+        """
+        if self.scramble and not isinstance(
+                self.seed, (int, np.random.SeedSequence)):
+            return None
+        text = repr((self.times.tolist(), self.priority, self.scramble,
+                     repr(self.seed) if self.scramble else None,
+                     self.engine.num_generated))
+        return hashlib.sha256(text.encode()).hexdigest()[:32]
+
+    def get_state(self) -> np.ndarray:
+        """number of points drawn, see set_state"""
+        return np.array([self.engine.num_generated], dtype=float)
+
+    def set_state(self, state: np.ndarray):
+        """move the sequence to a state of get_state"""
+        num_generated = int(state[0])
+        if num_generated < self.engine.num_generated:
+            self.engine.reset()
+        self.engine.fast_forward(num_generated - self.engine.num_generated)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} dim={len(self.times)} ' \
+               f'seed={self.seed}>'
+
+
+def randomized_qmc(simulate,
+                   path_generator: SobolPathGenerator,
+                   num_of_path: int,
+                   num_of_replication: int = 16,
+                   level: float = 0.95,
+                   **kwargs) -> SimulationResult:
+    """
+    randomized qmc pv with an error estimate across scrambled replications
+
+    parameters
+    ----------
+    simulate: pricer providing path_pv(path_generator, num_of_path, ...)
+    path_generator: scrambled generator to replicate
+    num_of_path: number of paths per replication, a power of 2
+    num_of_replication: number of independent scramblings
+    level: confidence level of the interval
+    **kwargs: passed to path_pv, engine defaults to 'matrix'
+
+    returns
+    -------
+    SimulationResult over the replication means, variance_reduction
+        compares with plain monte carlo at the same number of paths
+    """
+    kwargs.setdefault('engine', 'matrix')
+    stats = RunningStatistics()
+    path_stats = RunningStatistics()
+    beg = time.perf_counter()
+    for generator in path_generator.replicate(num_of_replication):
+        pv = simulate.path_pv(generator, num_of_path, **kwargs)
+        stats.update(np.array([np.mean(pv)]))
+        path_stats.update(pv)
+    return SimulationResult(
+        stats, time.perf_counter() - beg, level,
+        num_of_path=num_of_path * num_of_replication,
+        variance_reduction=path_stats.variance
+        / (stats.variance * num_of_path))
+
+
+if __name__ == '__main__':
+    pass
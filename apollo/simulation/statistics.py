@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import math
+import statistics
+import numpy as np
+from typing import Tuple, Optional
+
+
+class RunningStatistics:
+    """
+    running mean and variance in constant memory
+    batches are merged with the parallel form of Welford's update
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values: np.ndarray) -> 'RunningStatistics':
+        """
+        merge a batch of samples
+
+        parameters
+        ----------
+        values: array of samples
+        """
+        count = len(values)
+        if count == 0:
+            return self
+        mean = float(np.mean(values))
+        m2 = float(np.sum(np.square(values - mean)))
+        self._merge(count, mean, m2)
+        return self
+
+    def merge(self, other: 'RunningStatistics') -> 'RunningStatistics':
+        """merge statistics collected elsewhere"""
+        if other.count > 0:
+            self._merge(other.count, other.mean, other.m2)
+        return self
+
+    def _merge(self, count, mean, m2):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+
+    @property
+    def variance(self) -> float:
+        """unbiased sample variance"""
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def std_error(self) -> float:
+        """standard error of the mean"""
+        return math.sqrt(self.variance / self.count) \
+            if self.count > 1 else math.inf
+
+    def confidence_interval(self, level: float = 0.95) -> Tuple[float, float]:
+        """normal confidence interval of the mean"""
+        z = statistics.NormalDist().inv_cdf(0.5 + level / 2)
+        return self.mean - z * self.std_error, self.mean + z * self.std_error
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} n={self.count} ' \
+               f'mean={self.mean} se={self.std_error}>'
+
+
+class SimulationResult:
+    """monte carlo estimate with its error"""
+
+    def __init__(self, stats: RunningStatistics, elapsed: float,
+                 level: float = 0.95,
+                 num_of_path: Optional[int] = None,
+                 variance_reduction: float = 1.0):
+        """
+        parameters
+        ----------
+        stats: running statistics of the independent estimator samples
+        elapsed: wall time in seconds
+        level: confidence level of the interval
+        num_of_path: number of simulated paths, default to the sample count
+            differs from it when samples pair up several paths
+        variance_reduction: variance of plain monte carlo over the variance
+            achieved, at the same number of paths
+        """
+        self.pv = stats.mean
+        self.std_error = stats.std_error
+        self.num_of_path = num_of_path or stats.count
+        self.confidence_interval = stats.confidence_interval(level)
+        self.level = level
+        self.elapsed = elapsed
+        self.variance_reduction = variance_reduction
+
+    def __repr__(self):
+        low, high = self.confidence_interval
+        return f'<{self.__class__.__name__} pv={self.pv} ' \
+               f'se={self.std_error} ' \
+               f'{self.level:.0%}ci=[{low}, {high}] n={self.num_of_path} ' \
+               f'vr={self.variance_reduction:.2f}>'
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import time
+from typing import Optional
+from apollo.simulation.statistics import RunningStatistics, SimulationResult
+
+
+class StreamingSimulate:
+    """
+    price batch after batch keeping only running statistics
+    memory is bounded by one batch whatever the number of paths
+    """
+
+    def __init__(self,
+                 batch_size: int = 2 ** 16,
+                 target_std_error: Optional[float] = None,
+                 time_budget: Optional[float] = None,
+                 max_num_of_path: Optional[int] = None,
+                 min_num_of_path: int = 2 ** 12,
+                 level: float = 0.95):
+        """
+        parameters
+        ----------
+        batch_size: number of paths per batch
+        target_std_error: stop once the standard error is below it
+        time_budget: stop once the elapsed seconds exceed it
+        max_num_of_path: stop once this many paths are priced
+        min_num_of_path: paths to price before target_std_error is checked
+        level: confidence level of the reported interval
+        """
+        assert target_std_error or time_budget or max_num_of_path, \
+            'at least one of target_std_error, time_budget ' \
+            'or max_num_of_path should be given'
+        self.batch_size = batch_size
+        self.target_std_error = target_std_error
+        self.time_budget = time_budget
+        self.max_num_of_path = max_num_of_path
+        self.min_num_of_path = min_num_of_path
+        self.level = level
+
+    def _stop(self, stats: RunningStatistics, elapsed: float) -> bool:
+        if self.max_num_of_path and stats.count >= self.max_num_of_path:
+            return True
+        if self.time_budget and elapsed >= self.time_budget:
+            return True
+        return bool(self.target_std_error) \
+            and stats.count >= self.min_num_of_path \
+            and stats.std_error <= self.target_std_error
+
+    def simulate(self, simulate, path_generator,
+                 engine: str = 'array') -> SimulationResult:
+        """
+        streaming monte carlo pv
+
+        parameters
+        ----------
+        simulate: pricer providing path_pv(path_generator, num_of_path, engine)
+        path_generator: random source, shared by all batches
+        engine: engine passed to path_pv
+
+        returns
+        -------
+        SimulationResult with pv, standard error and confidence interval
+        """
+        stats = RunningStatistics()
+        beg = time.perf_counter()
+        while not self._stop(stats, time.perf_counter() - beg):
+            size = self.batch_size
+            if self.max_num_of_path:
+                size = min(size, self.max_num_of_path - stats.count)
+            stats.update(simulate.path_pv(path_generator, size, engine=engine))
+        return SimulationResult(stats, time.perf_counter() - beg, self.level)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} batch={self.batch_size}>'
+
+
+if __name__ == '__main__':
+    pass
@@ -11,6 +11,15 @@ from .prop_utils import (
     LazyProperty,
 )
 from .typing import Numerical
+from .profile_utils import (
+    Profiler,
+    NullProfiler,
+    null_profiler,
+    print_sink,
+)
+from .bs_utils import (
+    norm_cdf,
+)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import math
+from apollo.utils.typing import Numerical
+
+
+def norm_cdf(x: Numerical) -> float:
+    """standard normal cumulative distribution function"""
+    return 0.5 * (1 + math.erf(x / math.sqrt(2)))
+
+
+if __name__ == '__main__':
+    pass
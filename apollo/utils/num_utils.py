@@ -2,12 +2,24 @@
 """doc string"""
 
 import numpy as np
-from typing import Union
+from typing import Optional, Tuple, Union
 from apollo.utils.typing import Numerical
 
 
 class NumberCompare:
-    """compare number based on given precision"""
+    """
+    compare number based on given precision
+    the tolerance is widened to a few ulps of the compared dtype when
+    abs_tol is below what the dtype can resolve, e.g. 1E-8 in float32
+    num2 is folded with the tolerance into the range of num1 equal to it,
+    so an array comparison is a single ufunc call against a shifted
+    threshold, see bounds
+    """
+    # ulps of the compared dtype at 1 the tolerance is at least
+    ulps = 4
+    # num2 up to this size have their bounds cached, and at most this
+    # many bounds of arrays and of scalars are kept
+    cache_size = 4096
 
     def __init__(self, abs_tol=1E-8):
         """
@@ -16,31 +28,173 @@ class NumberCompare:
         abs_tol: absolute tolerance
         """
         self._abs_tol = abs_tol
+        self._dtype_tol = {}
+        self._bounds = {}
+        self._scalar = {}
+
+    def abs_tol(self, dtype=np.float64) -> float:
+        """absolute tolerance applied to numbers of dtype"""
+        dtype = np.dtype(dtype)
+        if dtype not in self._dtype_tol:
+            tol = self._abs_tol
+            if np.issubdtype(dtype, np.floating):
+                tol = max(tol, self.ulps * float(np.finfo(dtype).eps))
+            self._dtype_tol[dtype] = tol
+        return self._dtype_tol[dtype]
+
+    def bounds(self, num2: Union[Numerical, np.array], dtype=np.float64
+               ) -> Tuple[Union[Numerical, np.array],
+                          Union[Numerical, np.array]]:
+        """
+        lowest and highest numbers of dtype equal to num2, so that
+        equal(num1, num2) == (lo <= num1) & (num1 <= hi) exactly,
+        the float rounding of the tolerance check included
+
+        parameters
+        ----------
+        num2: number compared with
+        dtype: float dtype the comparison is computed in
+
+        returns
+        -------
+        lo, hi of the shape of num2, nan if num2 is nan
+        """
+        num2 = np.asarray(num2, dtype=dtype)
+        if num2.size > self.cache_size:
+            return self._shifted(num2)
+        key = (num2.dtype, num2.shape, num2.tobytes())
+        # read once and return the local, another thread may clear the
+        # cache in between
+        bounds = self._bounds.get(key)
+        if bounds is None:
+            bounds = self._shifted(num2)
+            if len(self._bounds) >= self.cache_size:
+                self._bounds.clear()
+            self._bounds[key] = bounds
+        return bounds
+
+    def _shifted(self, num2: np.ndarray):
+        atol = self.abs_tol(num2.dtype)
+        finite = np.isfinite(num2)
+
+        def close(num1):
+            return np.isclose(num1, num2, rtol=0, atol=atol) & finite
+
+        bounds = []
+        for sign, outward in [(-1, -np.inf), (1, np.inf)]:
+            bound = np.where(finite, num2 + sign * atol, num2)
+            # the shifted threshold is off by a few ulps after rounding,
+            # step inside then out to the last number still equal
+            while True:
+                outside = ~close(bound) & finite
+                if not outside.any():
+                    break
+                bound = np.where(outside, np.nextafter(bound, num2), bound)
+            while True:
+                step = np.nextafter(bound, outward)
+                inside = close(step)
+                if not inside.any():
+                    break
+                bound = np.where(inside, step, bound)
+            bounds.append(bound[()] if bound.ndim == 0 else bound)
+        return tuple(bounds)
+
+    def _scalar_bounds(self, num2: Numerical) -> Tuple[float, float]:
+        bounds = self._scalar.get(num2)
+        if bounds is None:
+            lo, hi = self.bounds(num2)
+            if len(self._scalar) >= self.cache_size:
+                self._scalar.clear()
+            bounds = self._scalar[num2] = (float(lo), float(hi))
+        return bounds
+
+    def _dtype(self, num1, num2):
+        # the dtype np.isclose computes in
+        return np.result_type(num1, num2, 1.)
+
+    @staticmethod
+    def _is_scalar(num1, num2) -> bool:
+        return isinstance(num1, (int, float)) \
+            and isinstance(num2, (int, float))
+
+    def _bounds_of(self, num1, num2):
+        if np.size(num2) > 1 and np.size(num2) >= np.size(num1):
+            # as large as num1, shifting costs more than it saves
+            return None
+        return self.bounds(num2, self._dtype(num1, num2))
 
     def equal(self, num1: Union[Numerical, np.array],
-              num2: Union[Numerical, np.array]) -> Union[bool, np.array]:
+              num2: Union[Numerical, np.array],
+              out: Optional[np.ndarray] = None) -> Union[bool, np.array]:
         """check if num1 == num2"""
-        return np.isclose(num1, num2, rtol=0, atol=self._abs_tol)
+        if self._is_scalar(num1, num2):
+            lo, hi = self._scalar_bounds(num2)
+            return lo <= num1 <= hi
+        bounds = self._bounds_of(num1, num2)
+        if bounds is None:
+            close = np.isclose(num1, num2, rtol=0,
+                               atol=self.abs_tol(self._dtype(num1, num2)))
+            if out is None:
+                return close
+            out[...] = close
+            return out
+        out = np.greater_equal(num1, bounds[0], out=out)
+        out &= np.less_equal(num1, bounds[1])
+        return out
 
     def greater(self, num1: Union[Numerical, np.array],
-                num2: Union[Numerical, np.array]) -> Union[bool, np.array]:
+                num2: Union[Numerical, np.array],
+                out: Optional[np.ndarray] = None) -> Union[bool, np.array]:
         """check if num1 > num2"""
-        return np.greater(num1, num2) & (~self.equal(num1, num2))
+        if self._is_scalar(num1, num2):
+            return num1 > self._scalar_bounds(num2)[1]
+        bounds = self._bounds_of(num1, num2)
+        if bounds is None:
+            out = np.greater(num1, num2, out=out)
+            out &= ~self.equal(num1, num2)
+            return out
+        return np.greater(num1, bounds[1], out=out)
 
     def less(self, num1: Union[Numerical, np.array],
-             num2: Union[Numerical, np.array]) -> Union[bool, np.array]:
+             num2: Union[Numerical, np.array],
+             out: Optional[np.ndarray] = None) -> Union[bool, np.array]:
         """check if num1 < num2"""
-        return np.less(num1, num2) & (~self.equal(num1, num2))
+        if self._is_scalar(num1, num2):
+            return num1 < self._scalar_bounds(num2)[0]
+        bounds = self._bounds_of(num1, num2)
+        if bounds is None:
+            out = np.less(num1, num2, out=out)
+            out &= ~self.equal(num1, num2)
+            return out
+        return np.less(num1, bounds[0], out=out)
 
     def greater_equal(self, num1: Union[Numerical, np.array],
-                      num2: Union[Numerical, np.array]) -> Union[bool, np.array]:
-        """check if num1 <= num2"""
-        return np.greater(num1, num2) | self.equal(num1, num2)
+                      num2: Union[Numerical, np.array],
+                      out: Optional[np.ndarray] = None
+                      ) -> Union[bool, np.array]:
+        """check if num1 >= num2"""
+        if self._is_scalar(num1, num2):
+            return num1 >= self._scalar_bounds(num2)[0]
+        bounds = self._bounds_of(num1, num2)
+        if bounds is None:
+            out = np.greater(num1, num2, out=out)
+            out |= self.equal(num1, num2)
+            return out
+        return np.greater_equal(num1, bounds[0], out=out)
 
     def less_equal(self, num1: Union[Numerical, np.array],
-                   num2: Union[Numerical, np.array]) -> Union[bool, np.array]:
-        """check if num1 >= num2"""
-        return np.less(num1, num2) | self.equal(num1, num2)
+                   num2: Union[Numerical, np.array],
+                   out: Optional[np.ndarray] = None
+                   ) -> Union[bool, np.array]:
+        """check if num1 <= num2"""
+        if self._is_scalar(num1, num2):
+            return num1 <= self._scalar_bounds(num2)[1]
+        bounds = self._bounds_of(num1, num2)
+        if bounds is None:
+            out = np.less(num1, num2, out=out)
+            out |= self.equal(num1, num2)
+            return out
+        return np.less_equal(num1, bounds[1], out=out)
 
 
 precision_2 = NumberCompare(1E-2)
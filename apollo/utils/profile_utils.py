@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import time
+import threading
+import contextlib
+from typing import Callable, Dict, Optional
+
+
+class Profiler:
+    """
+    collect per-phase timings, counters and peak array sizes of a pricing run
+    and hand a summary to a sink callback when the outermost run ends
+    the records of a run are kept per thread, so runs on a shared pricer
+    from a thread pool are summarized separately, see ParallelSimulate
+    """
+
+    def __init__(self, sink: Optional[Callable[[Dict], None]] = None):
+        """
+        parameters
+        ----------
+        sink: callback receiving the summary dict of each run,
+            see print_sink, default keeps the last summary in self.summary
+            called from the thread of the run, one call at a time
+        """
+        self.sink = sink
+        self.summary = None
+        self._local = threading.local()
+        self._sink_lock = threading.Lock()
+
+    @property
+    def _state(self):
+        """records of the run of the calling thread"""
+        state = getattr(self._local, 'state', None)
+        if state is None:
+            state = self._local.state = _RunState()
+        return state
+
+    def __getstate__(self):
+        # thread state and lock are not picklable, a copy starts afresh
+        return {'sink': self.sink, 'summary': self.summary}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+        self._sink_lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def run(self, name: str, **info):
+        """
+        scope of one pricing run, nested runs are merged into the outermost
+
+        parameters
+        ----------
+        name: run name
+        **info: run attributes reported as is, e.g. engine and num_of_path
+        """
+        state = self._state
+        if state.depth == 0:
+            state.reset()
+            state.info = dict(info, name=name)
+        state.depth += 1
+        beg = time.perf_counter()
+        try:
+            yield self
+        finally:
+            state.depth -= 1
+            if state.depth == 0:
+                state.info['elapsed'] = time.perf_counter() - beg
+                self.flush()
+
+    @contextlib.contextmanager
+    def phase(self, name: str, num_of_path: Optional[int] = None):
+        """
+        time a phase, repeated phases accumulate
+
+        parameters
+        ----------
+        name: phase name
+        num_of_path: paths processed in the phase, for paths per second
+        """
+        state = self._state
+        beg = time.perf_counter()
+        try:
+            yield
+        finally:
+            state.elapsed[name] = state.elapsed.get(name, 0) \
+                + time.perf_counter() - beg
+            state.calls[name] = state.calls.get(name, 0) + 1
+            if num_of_path is not None:
+                state.paths[name] = state.paths.get(name, 0) + num_of_path
+
+    def count(self, name: str, key, value):
+        """record a counter, e.g. live paths keyed by date"""
+        self._state.counts.setdefault(name, {})[key] = value
+
+    def array(self, name: str, array):
+        """record the peak size of an array"""
+        peak_bytes = self._state.peak_bytes
+        peak_bytes[name] = max(peak_bytes.get(name, 0), array.nbytes)
+
+    def flush(self):
+        """build the summary of the current run and send it to the sink"""
+        state = self._state
+        summary = dict(
+            state.info,
+            phases={
+                name: {
+                    'elapsed': elapsed,
+                    'calls': state.calls[name],
+                    'paths_per_sec': state.paths[name] / elapsed
+                    if state.paths.get(name) and elapsed > 0 else None,
+                }
+                for name, elapsed in state.elapsed.items()
+            },
+            counts=state.counts,
+            peak_bytes=state.peak_bytes,
+        )
+        with self._sink_lock:
+            self.summary = summary
+            if self.sink is not None:
+                self.sink(summary)
+        return summary
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}>'
+
+
+class _RunState:
+    """records of one run, see Profiler"""
+
+    def __init__(self):
+        self.depth = 0
+        self.reset()
+
+    def reset(self):
+        self.info = {}
+        self.elapsed = {}
+        self.calls = {}
+        self.paths = {}
+        self.counts = {}
+        self.peak_bytes = {}
+
+
+class NullProfiler(Profiler):
+    """no-op profiler, the default of the pricing engines"""
+    _null = contextlib.nullcontext()
+
+    def __init__(self):
+        super().__init__(None)
+
+    def run(self, name: str, **info):
+        return self._null
+
+    def phase(self, name: str, num_of_path: Optional[int] = None):
+        return self._null
+
+    def count(self, name: str, key, value):
+        pass
+
+    def array(self, name: str, array):
+        pass
+
+    def flush(self):
+        pass
+
+
+null_profiler = NullProfiler()
+
+
+def print_sink(summary: Dict):
+    """sink printing the phase timings of a run to stdout"""
+    print(f"{summary['name']} | {summary.get('elapsed')}")
+    for name, phase in summary['phases'].items():
+        print(f"  {name} | {phase['elapsed']} | calls={phase['calls']} "
+              f"| paths/sec={phase['paths_per_sec']}")
+    for name, size in summary['peak_bytes'].items():
+        print(f'  peak {name} | {size} bytes')
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import datetime as dt
+import pytest
+
+
+def contract_parameters(num_of_month: int) -> dict:
+    """
+    snowball test contract with monthly knock-out and daily knock-in
+    observation over num_of_month months from 2020-01-01
+    """
+    strike_date = dt.date(2020, 1, 1)
+    ko_date = []
+    for i in range(1, num_of_month + 1):
+        year, month = divmod(i, 12)
+        ko_date.append(dt.date(2020 + year, month + 1, 1)
+                       - dt.timedelta(days=1))
+    maturity = ko_date[-1]
+    ki_date = [strike_date + dt.timedelta(days=i)
+               for i in range((maturity - strike_date).days + 1)]
+    return {
+        'UpperBarrier': 1.2,
+        'ObservationDate': [d.isoformat() for d in ko_date],
+        'KnockOutRebate': [0.2] * num_of_month,
+        'KIBarrier': 0.7,
+        'Strike': 1.0,
+        'StrikeDate': strike_date.isoformat(),
+        'MaturityBonusCoupon': 0.05,
+        'Maturity': maturity.isoformat(),
+        'KIObservationDate': [d.isoformat() for d in ki_date],
+    }
+
+
+@pytest.fixture(scope='session')
+def make_parameters():
+    """contract_parameters, for tests over several maturities"""
+    return contract_parameters
+
+
+@pytest.fixture
+def parameters():
+    """12 month test contract, a fresh dict per test"""
+    return contract_parameters(12)
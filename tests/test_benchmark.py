@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+from apollo.benchmark import Benchmark, compare
+
+
+def _results(**cases):
+    return {'results': {name: {'min': lo, 'median': (lo + hi) / 2, 'max': hi}
+                        for name, (lo, hi) in cases.items()}}
+
+
+def test_calibrated_number():
+    result = Benchmark('noop', lambda: (lambda: None), repeat=2).run()
+    assert result['number'] > 1000
+    assert result['min'] * result['number'] >= 0.1
+    assert Benchmark('noop', lambda: (lambda: None), number=10,
+                     repeat=2).run()['number'] == 10
+
+
+def test_compare_needs_separated_repeats():
+    baseline = _results(a=(1.0, 1.1), b=(1.0, 1.7), c=(1.0, 1.1),
+                        d=(1.0, 1.1))
+    results = _results(a=(1.6, 1.7), b=(1.6, 1.7), c=(1.3, 1.4),
+                       d=(0.6, 0.7), e=(1.0, 1.0))
+    status = {row['name']: row['status']
+              for row in compare(results, baseline)}
+    assert status == {'a': 'regression', 'b': 'ok', 'c': 'ok',
+                      'd': 'improvement', 'e': 'new'}
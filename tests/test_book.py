@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import io
+import contextlib
+import datetime as dt
+import numpy as np
+from apollo.product.template.book import SnowballBook
+from apollo.product.template.snowball import SnowballProduct, SnowBallSimulate
+from apollo.simulation import PathGenerator
+
+
+def late_parameters(param: dict, days: int) -> dict:
+    strike_date = dt.date.fromisoformat(param['StrikeDate'])
+    late = strike_date + dt.timedelta(days=days)
+    return dict(param, StrikeDate=late.isoformat(),
+                KIObservationDate=[d for d in param['KIObservationDate']
+                                   if dt.date.fromisoformat(d) >= late])
+
+
+def test_single_contract_matches_matrix_engine(parameters):
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected = SnowBallSimulate(SnowballProduct, parameters).simulate(
+            PathGenerator(4), 10 ** 4, engine='matrix')
+    pv = SnowballBook([parameters]).simulate(PathGenerator(4), 10 ** 4)
+    assert np.isclose(pv[0], expected, rtol=1e-12)
+
+
+def test_contracts_discounted_to_own_strike_date(parameters):
+    # without volatility paths are deterministic, so the pv of a contract
+    # does not depend on the book it is valued in
+    late = late_parameters(parameters, 14)
+    alone = SnowballBook([late], vol=0).simulate(PathGenerator(), 100)
+    book = SnowballBook([parameters, late], vol=0)
+    pv = book.simulate(PathGenerator(), 100)
+    assert np.isclose(pv[1], alone[0], rtol=1e-12)
+
+    valuation_date = dt.date.fromisoformat(parameters['StrikeDate'])
+    pv = book.simulate(PathGenerator(), 100, valuation_date=valuation_date)
+    assert np.isclose(pv[1], alone[0] * np.exp(-book.rate * 14 / 365),
+                      rtol=1e-12)
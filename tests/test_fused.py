@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import numpy as np
+import pytest
+from apollo.product.template.snowball import SnowballProduct, SnowBallSimulate
+from apollo.simulation import PathGenerator
+from apollo.simulation.parallel import ParallelSimulate
+
+pytest.importorskip('numba')
+
+
+@pytest.mark.parametrize('num_of_month', [12, 36])
+def test_fused_matches_matrix(num_of_month, make_parameters):
+    simulate = SnowBallSimulate(SnowballProduct,
+                                make_parameters(num_of_month))
+    fused = simulate.path_pv(PathGenerator(seed=1), 20000, engine='fused')
+    matrix = simulate.path_pv(PathGenerator(seed=1), 20000, engine='matrix')
+    np.testing.assert_allclose(fused, matrix, rtol=0, atol=1e-12)
+
+
+def test_fused_float32_matches_matrix(parameters):
+    simulate = SnowBallSimulate(SnowballProduct, parameters,
+                                dtype=np.float32)
+    fused = simulate.path_pv(PathGenerator(seed=1), 20000, engine='fused')
+    matrix = simulate.path_pv(PathGenerator(seed=1), 20000, engine='matrix')
+    # prices differ by float32 rounding of exp, no barrier decision does
+    np.testing.assert_allclose(fused, matrix, rtol=0, atol=1e-6)
+
+
+def test_fused_on_thread_backend(parameters):
+    simulate = SnowBallSimulate(SnowballProduct, parameters)
+    parallel = ParallelSimulate('thread', num_of_worker=4,
+                                batch_size=2 ** 12)
+    fused = parallel.simulate(simulate, seed=1, num_of_path=2 ** 14,
+                              engine='fused')
+    matrix = parallel.simulate(simulate, seed=1, num_of_path=2 ** 14,
+                               engine='matrix')
+    assert fused == pytest.approx(matrix, abs=1e-14)
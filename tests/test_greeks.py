@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import datetime as dt
+import pytest
+from apollo.product.template.greeks import SnowballGreeks
+from apollo.product.template.pde import SnowballPDE
+from apollo.product.template.snowball import SnowballProduct, SnowBallSimulate
+from apollo.simulation import PathGenerator
+
+
+def one_day_later(parameters):
+    """same contract valued one day after its strike date"""
+    strike_date = dt.date.fromisoformat(parameters['StrikeDate']) \
+        + dt.timedelta(days=1)
+    return dict(parameters, StrikeDate=strike_date.isoformat(),
+                KIObservationDate=[
+                    date for date in parameters['KIObservationDate']
+                    if dt.date.fromisoformat(date) >= strike_date])
+
+
+@pytest.fixture(scope='module')
+def contract(make_parameters):
+    # a short contract, whose theta stands out of the monte carlo noise
+    return make_parameters(3)
+
+
+@pytest.fixture(scope='module')
+def pde(contract):
+    return SnowballPDE(contract, num_of_space=800, steps_per_day=4).solve()
+
+
+@pytest.fixture(scope='module')
+def greeks(contract):
+    simulate = SnowBallSimulate(SnowballProduct, contract)
+    return {method: SnowballGreeks(simulate, method).compute(
+        PathGenerator(seed=1), 2 ** 17)
+        for method in ['pathwise', 'likelihood_ratio']}
+
+
+def agree(a, b, name, num_of_std=4):
+    error = (a.std_error[name] ** 2 + b.std_error[name] ** 2) ** 0.5
+    return abs(getattr(a, name) - getattr(b, name)) < num_of_std * error
+
+
+def test_rejects_unknown_method(parameters):
+    simulate = SnowBallSimulate(SnowballProduct, parameters)
+    with pytest.raises(AssertionError):
+        SnowballGreeks(simulate, 'bump')
+
+
+@pytest.mark.parametrize('method', ['pathwise', 'likelihood_ratio'])
+def test_delta_and_gamma_match_pde(method, greeks, pde):
+    result = greeks[method]
+    for name in ['delta', 'gamma']:
+        assert getattr(result, name) == pytest.approx(
+            getattr(pde, name), abs=4 * result.std_error[name])
+
+
+@pytest.mark.parametrize('name', ['delta', 'vega', 'theta'])
+def test_estimators_agree(name, greeks):
+    assert agree(greeks['pathwise'], greeks['likelihood_ratio'], name)
+
+
+@pytest.mark.parametrize('method', ['pathwise', 'likelihood_ratio'])
+def test_theta_sign(method, greeks, contract, pde):
+    theta = SnowballPDE(one_day_later(contract), num_of_space=800,
+                        steps_per_day=4).solve().price - pde.price
+    result = greeks[method]
+    # short volatility, the contract gains value as time passes
+    assert theta > 0
+    assert result.theta > 0
+    assert result.theta == pytest.approx(
+        theta, abs=4 * result.std_error['theta'])
+
+
+def test_pathwise_is_tighter(greeks):
+    pathwise, likelihood_ratio = greeks['pathwise'], greeks['likelihood_ratio']
+    for name in ['delta', 'vega', 'theta']:
+        assert pathwise.std_error[name] < likelihood_ratio.std_error[name]
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import numpy as np
+import pytest
+from apollo.product.template.ledger import CashflowLedger
+from apollo.product.template.snowball import SnowballProduct, SnowBallSimulate
+from apollo.simulation import PathGenerator
+
+
+@pytest.mark.parametrize('engine', ['object', 'array', 'matrix'])
+def test_ledger_sums_match_pv(engine, parameters):
+    simulate = SnowBallSimulate(SnowballProduct, parameters)
+    ledger = simulate.cashflow_ledger(PathGenerator(seed=1), 2000,
+                                      engine=engine)
+    pv = simulate.simulate(PathGenerator(seed=1), 2000, engine=engine)
+    df = simulate.discount_factor(ledger.schedule)
+    assert ledger.num_of_path == 2000
+    assert ledger.pv(df) == pytest.approx(pv, abs=1e-12)
+    assert np.mean(ledger.path_pv(df)) == pytest.approx(pv, abs=1e-12)
+    assert sum(ledger.pv_by_tag(df).values()) == pytest.approx(pv, abs=1e-12)
+    records = ledger.to_records(df)
+    assert np.sum(records['pv']) / 2000 == pytest.approx(pv, abs=1e-12)
+
+
+def test_concatenate_offsets_paths(parameters):
+    simulate = SnowBallSimulate(SnowballProduct, parameters)
+    generator = PathGenerator(seed=1)
+    ledgers = [simulate.cashflow_ledger(generator, size, engine='array')
+               for size in [1000, 500]]
+    ledger = CashflowLedger.concatenate(ledgers)
+    df = simulate.discount_factor(ledger.schedule)
+    np.testing.assert_array_equal(
+        ledger.path_pv(df),
+        np.concatenate([part.path_pv(df) for part in ledgers]))
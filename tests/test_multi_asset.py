@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import pytest
+from apollo.product.template.snowball import SnowballProduct, SnowBallSimulate
+from apollo.simulation import MultiAsset, PathGenerator
+
+
+def test_control_variate_rejects_several_underlyings(parameters):
+    simulate = SnowBallSimulate(
+        SnowballProduct, parameters,
+        assets=MultiAsset([0.3, 0.4], [[1, 0.5], [0.5, 1]]))
+    with pytest.raises(AssertionError):
+        simulate.simulate_result(PathGenerator(), 1000, control_variate=True)
+    with pytest.raises(AssertionError):
+        simulate.path_pv(PathGenerator(), 1000, engine='matrix',
+                         control_variate=True)
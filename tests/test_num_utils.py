@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import numpy as np
+from apollo.utils.num_utils import NumberCompare
+
+
+def test_matches_isclose():
+    compare = NumberCompare(abs_tol=1E-8)
+    num2 = 1.0
+    num1 = num2 + np.arange(-40, 41) * 1E-9 / 4
+    np.testing.assert_array_equal(
+        compare.equal(num1, num2),
+        np.isclose(num1, num2, rtol=0, atol=1E-8))
+    for x in num1:
+        assert compare.equal(float(x), num2) \
+            == np.isclose(x, num2, rtol=0, atol=1E-8)
+
+
+def test_caches_are_bounded():
+    compare = NumberCompare()
+    for i in range(3 * compare.cache_size):
+        compare.greater(1.0, 1.0 + i * 1E-6)
+    assert len(compare._scalar) <= compare.cache_size
+    assert len(compare._bounds) <= compare.cache_size
+
+
+
+class _ClearedDict(dict):
+    # another thread clearing the cache right after each store
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.clear()
+
+
+def test_bounds_survive_concurrent_clear():
+    compare = NumberCompare()
+    compare._bounds = _ClearedDict()
+    compare._scalar = _ClearedDict()
+    lo, hi = compare.bounds(np.array([1.0, 2.0]))
+    np.testing.assert_array_equal(lo <= [1.0, 2.0], True)
+    assert compare.greater(1.1, 1.0) and not compare.greater(1.0, 1.0)
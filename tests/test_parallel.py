@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import pickle
+import pytest
+from apollo.product.payoff import VanillaPutPayoff
+from apollo.product.template.snowball import SnowballProduct, SnowBallSimulate
+from apollo.simulation import PathGenerator
+from apollo.simulation.parallel import ParallelSimulate
+
+
+def test_compiled_payoff_pickles():
+    payoff = VanillaPutPayoff(strike=1.0, weight=-1, rounding=4)
+    value = payoff.payoff(0.8)
+    restored = pickle.loads(pickle.dumps(payoff))
+    assert restored.payoff(0.8) == value
+
+
+def test_process_backend_matches_thread_backend(parameters):
+    simulate = SnowBallSimulate(SnowballProduct, parameters)
+    # compile the payoffs before they are sent to the workers
+    simulate.simulate(PathGenerator(seed=0), 1000, engine='array')
+    pv = {backend: ParallelSimulate(backend, num_of_worker=2,
+                                    batch_size=2 ** 12).simulate(
+        simulate, seed=1, num_of_path=2 ** 14)
+        for backend in ['process', 'thread']}
+    assert pv['process'] == pv['thread']
+
+
+@pytest.mark.parametrize('backend', ['process', 'thread'])
+def test_worker_count_invariance(backend, parameters):
+    simulate = SnowBallSimulate(SnowballProduct, parameters)
+    simulate.simulate(PathGenerator(seed=0), 1000, engine='array')
+    # the last batch is short, so the split is not a multiple of the pool
+    pv = [ParallelSimulate(backend, num_of_worker=num_of_worker,
+                           batch_size=2 ** 12).simulate(
+        simulate, seed=1, num_of_path=5 * 2 ** 12 + 100)
+        for num_of_worker in [1, 3]]
+    assert pv[0] == pv[1]
+    # a different seed gives a different stream
+    assert ParallelSimulate(backend, num_of_worker=1,
+                            batch_size=2 ** 12).simulate(
+        simulate, seed=2, num_of_path=5 * 2 ** 12 + 100) != pv[0]
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import numpy as np
+import pytest
+from apollo.product.template.snowball import SnowballProduct, SnowBallSimulate
+from apollo.simulation import PathGenerator, PathStore, SobolPathGenerator
+
+
+def _two_runs(simulate, generator, path_store):
+    return [simulate.simulate(generator, 4096, engine='matrix',
+                              path_store=path_store) for _ in range(2)]
+
+
+def test_store_does_not_change_results(tmp_path, parameters):
+    simulate = SnowBallSimulate(SnowballProduct, parameters)
+    store = PathStore(str(tmp_path))
+    plain = _two_runs(simulate, PathGenerator(seed=3), None)
+    miss = _two_runs(simulate, PathGenerator(seed=3), store)
+    hit = _two_runs(simulate, PathGenerator(seed=3), store)
+    assert plain == miss == hit
+    # a reused generator draws fresh paths
+    assert plain[0] != plain[1]
+
+
+def test_store_with_sobol(tmp_path, parameters):
+    pytest.importorskip('scipy')
+    simulate = SnowBallSimulate(SnowballProduct, parameters)
+    schedule = simulate.observer().schedule
+
+    def generator(seed):
+        return SobolPathGenerator.from_schedule(schedule,
+                                                simulate.strike_date,
+                                                seed=seed)
+
+    store = PathStore(str(tmp_path))
+    plain = _two_runs(simulate, generator(3), None)
+    assert plain == _two_runs(simulate, generator(3), store) \
+        == _two_runs(simulate, generator(3), store)
+    with pytest.raises(AssertionError):
+        simulate.simulate(generator(np.random.default_rng(3)), 4096,
+                          engine='matrix', path_store=store)
+
+
+def test_store_does_not_change_sampled_knock_ins(tmp_path, parameters):
+    simulate = SnowBallSimulate(SnowballProduct, parameters,
+                                ki_monitoring='sample')
+    store = PathStore(str(tmp_path))
+    pv = [simulate.simulate(PathGenerator(seed=3), 4096, engine='matrix',
+                            memory_budget=2 ** 16, path_store=path_store)
+          for path_store in [None, store, store]]
+    assert pv[0] == pv[1] == pv[2]
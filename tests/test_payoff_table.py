@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import datetime as dt
+import numpy as np
+from apollo.product.payoff import (
+    ConstantPayoff,
+    PayoffTable,
+    VanillaCallPayoff,
+)
+
+DATES = [dt.date(2024, 1, 31), dt.date(2024, 2, 29)]
+
+
+def test_table_matches_payoffs():
+    payoffs = [ConstantPayoff(rate=0.1, accrual_days=31),
+               VanillaCallPayoff(strike=1.0, weight=0.5)]
+    table = PayoffTable(DATES, payoffs)
+    price = np.array([0.9, 1.2])
+    for row, payoff in enumerate(payoffs):
+        np.testing.assert_allclose(table.payoff(row, price),
+                                   payoff.payoff(price), rtol=0, atol=1e-15)
+
+
+def test_constant_table_rounds():
+    payoffs = [ConstantPayoff(rate=0.123456, rounding=2)] * 2
+    table = PayoffTable(DATES, payoffs)
+    np.testing.assert_array_equal(
+        table.payoff(np.array([0, 1]), np.array([1.0, 1.0])), [0.12, 0.12])
+    assert table.payoff(0, 1.0) == payoffs[0].payoff(1.0)
+
+
+def test_table_follows_payoff_changes():
+    payoffs = [ConstantPayoff(rate=0.1),
+               VanillaCallPayoff(strike=1.0, weight=0.5)]
+    table = PayoffTable(DATES, payoffs)
+    price = np.array([0.9, 1.2])
+    table.payoff(np.array([0, 1]), price)
+    payoffs[0].rate = 0.3
+    payoffs[1].strike = 0.8
+    payoffs[1].rounding = 2
+    for row, payoff in enumerate(payoffs):
+        np.testing.assert_allclose(table.payoff(row, price),
+                                   payoff.payoff(price), rtol=0, atol=1e-15)
+    np.testing.assert_allclose(table.coefficients[0], [0.3, 0, 0, 0])
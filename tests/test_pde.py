@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import numpy as np
+from apollo.product.template import pde
+from apollo.product.template.pde import SnowballPDE
+
+
+def dense(bands):
+    return np.diag(bands[1]) + np.diag(bands[0, 1:], 1) \
+        + np.diag(bands[2, :-1], -1)
+
+
+def test_step_matches_dense_crank_nicolson(parameters):
+    solver = SnowballPDE(parameters, num_of_space=50)
+    x = solver.grid()
+    operator = solver.operator(x)
+    value = np.random.RandomState(0).normal(size=(len(x), 2))
+    dt_ = 1 / 365
+    identity = np.eye(len(x))
+    half = np.linalg.inv(identity - 0.5 * dt_ * dense(operator))
+    np.testing.assert_allclose(
+        solver.step(operator, value, dt_),
+        half @ (identity + 0.5 * dt_ * dense(operator)) @ value,
+        rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(
+        solver.step(operator, value, dt_, implicit=True),
+        half @ half @ value, rtol=1e-12, atol=1e-12)
+
+
+def test_thomas_fallback_matches(monkeypatch, parameters):
+    expected = SnowballPDE(parameters, num_of_space=50).solve()
+    monkeypatch.setattr(pde, 'dgttrf', None)
+    monkeypatch.setattr(pde, 'dgttrs', None)
+    result = SnowballPDE(parameters, num_of_space=50).solve()
+    for name in result.names:
+        assert np.isclose(getattr(result, name), getattr(expected, name),
+                          rtol=1e-10)
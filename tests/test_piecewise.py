@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import numpy as np
+import pytest
+from apollo.product.payoff.basic_functions import FunctionBase, Ramp, Step
+
+X = np.array([0.5, 1.0, np.nextafter(1.0, 2), 1.5, 2.0, 2.5])
+
+
+def test_steps_with_different_inclusive_add():
+    total = Step(1, origin=1, inclusive=True) \
+        + Step(1, origin=1, inclusive=False)
+    np.testing.assert_array_equal(
+        total.formula(np.array([0.9, 1.0, 1.1])), [0., 1., 2.])
+
+
+def test_sum_matches_sum_of_formulas():
+    functions = [Step(origin=1, sign=1, level=1, inclusive=False),
+                 Step(origin=1, sign=-1, level=-1, inclusive=False),
+                 Step(origin=2, sign=1, level=-1, inclusive=False),
+                 Ramp(slope=0.5, origin=1.5, sign=-1)]
+    expected = sum(function.formula(X) for function in functions)
+    np.testing.assert_allclose(sum(functions).formula(X), expected,
+                               rtol=0, atol=1e-12)
+    np.testing.assert_allclose((- 2 * sum(functions)).formula(X),
+                               - 2 * expected, rtol=0, atol=1e-12)
+
+
+def test_step_formula_follows_attributes():
+    step = Step(level=1, origin=1)
+    assert step.formula(1.5) == 1
+    step.level = 3
+    assert step.formula(1.5) == 3
+
+
+def test_function_without_piecewise_form_rejected():
+    class Square(FunctionBase):
+        def formula(self, x):
+            return x * x
+
+    with pytest.raises(TypeError, match='to_piecewise'):
+        Square()
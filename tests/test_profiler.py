@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from apollo.product.template.snowball import SnowballProduct, SnowBallSimulate
+from apollo.simulation import PathGenerator
+from apollo.utils import Profiler
+
+
+def _shape(summary):
+    return summary['name'], summary['engine'], summary['num_of_path'], \
+        {name: (phase['calls'], phase['paths_per_sec'] is None)
+         for name, phase in summary['phases'].items()}
+
+
+def test_runs_from_threads_summarized_separately(parameters):
+    summaries = []
+    profiler = Profiler(summaries.append)
+    simulate = SnowBallSimulate(SnowballProduct, parameters,
+                                profiler=profiler)
+    simulate.path_pv(PathGenerator(), 2000, engine='array')
+    expected = _shape(summaries.pop())
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(
+            lambda seed: simulate.path_pv(PathGenerator(seed), 2000,
+                                          engine='array'), range(32)))
+    assert len(summaries) == 32
+    for summary in summaries:
+        assert _shape(summary) == expected
+
+
+def test_pickle():
+    profiler = pickle.loads(pickle.dumps(Profiler()))
+    with profiler.run('run'):
+        with profiler.phase('phase', 10):
+            pass
+    assert profiler.summary['phases']['phase']['calls'] == 1
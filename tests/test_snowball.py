@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import pickle
+import numpy as np
+import pytest
+from apollo.product.barrier.calendar import ObservationCalendar
+from apollo.product.template import snowball
+from apollo.product.template.snowball import (
+    SnowballProduct,
+    SnowBallSimulate,
+    matrix_chunk_size,
+)
+from apollo.simulation import PathGenerator
+
+
+@pytest.mark.parametrize('ki_monitoring', ['discrete', 'sample'])
+def test_calendar_compiles_once(ki_monitoring, parameters, monkeypatch):
+    simulate = SnowBallSimulate(SnowballProduct, parameters,
+                                ki_monitoring=ki_monitoring)
+    compiled = []
+    compile_calendar = ObservationCalendar.compile.__func__
+
+    def count(cls, *args, **kwargs):
+        compiled.append(args)
+        return compile_calendar(cls, *args, **kwargs)
+
+    monkeypatch.setattr(ObservationCalendar, 'compile', classmethod(count))
+    for engine in ['array', 'matrix', 'matrix']:
+        simulate.simulate(PathGenerator(seed=1), 1000, engine=engine)
+    assert len(compiled) == 1
+
+
+def test_pickles_after_simulation(parameters):
+    simulate = SnowBallSimulate(SnowballProduct, parameters)
+    pv = simulate.simulate(PathGenerator(seed=1), 1000, engine='matrix')
+    restored = pickle.loads(pickle.dumps(simulate))
+    assert restored.simulate(PathGenerator(seed=1), 1000,
+                             engine='matrix') == pv
+
+
+def test_array_matches_object(parameters):
+    simulate = SnowBallSimulate(SnowballProduct, parameters)
+    array = simulate.path_pv(PathGenerator(seed=1), 2000, engine='array')
+    obj = simulate.path_pv(PathGenerator(seed=1), 2000, engine='object')
+    np.testing.assert_allclose(array, obj, rtol=0, atol=1e-12)
+
+
+def test_first_hit_matches_date_loop(parameters, monkeypatch):
+    simulate = SnowBallSimulate(SnowballProduct, parameters)
+    calendar = simulate.observer().calendar(simulate.strike_date)
+    price = simulate.price_matrix(PathGenerator(seed=1), 2000,
+                                  calendar.year_fraction)
+    first_hit = simulate.evaluate_first_hit(calendar, price)
+    # the coarse date loop monitors discretely without knock-ins in between
+    monkeypatch.setattr(simulate, 'knock_in_between', lambda *args: None)
+    date_loop = simulate.evaluate_matrix(simulate.observer(), price,
+                                         coarse=True)
+    np.testing.assert_array_equal(first_hit.state, date_loop.state)
+    np.testing.assert_array_equal(first_hit.settle_index,
+                                  date_loop.settle_index)
+    np.testing.assert_allclose(first_hit.amount, date_loop.amount,
+                               rtol=0, atol=1e-12)
+    assert (first_hit.state == first_hit.knocked_out).any()
+    assert (first_hit.state == first_hit.knocked_in).any()
+
+
+@pytest.mark.parametrize('antithetic, control_variate',
+                         [(True, False), (False, True), (True, True)])
+def test_variance_reduction(antithetic, control_variate, parameters):
+    simulate = SnowBallSimulate(SnowballProduct, parameters)
+    plain = simulate.simulate_result(PathGenerator(seed=1), 20000)
+    reduced = simulate.simulate_result(PathGenerator(seed=2), 20000,
+                                       antithetic=antithetic,
+                                       control_variate=control_variate)
+    assert plain.variance_reduction == 1
+    assert reduced.variance_reduction > 1.5
+    assert reduced.std_error < plain.std_error
+    assert reduced.pv == pytest.approx(plain.pv, abs=4 * plain.std_error)
+
+
+@pytest.mark.parametrize('engine', ['array', 'matrix'])
+def test_float32_matches_float64(engine, parameters):
+    num_of_date = len(SnowBallSimulate(SnowballProduct, parameters)
+                      .observer().schedule)
+    budget = 2 ** 12 * num_of_date * 8
+    # half the budget for float32 so that both draw the same chunks
+    assert matrix_chunk_size(num_of_date, budget, 8) \
+        == matrix_chunk_size(num_of_date, budget // 2, 4)
+    pv = {dtype: SnowBallSimulate(SnowballProduct, parameters, dtype=dtype)
+          .path_pv(PathGenerator(seed=1), 20000, engine=engine,
+                   memory_budget=budget * np.dtype(dtype).itemsize // 8)
+          for dtype in [np.float64, np.float32]}
+    # prices differ by float32 rounding, no barrier decision does
+    np.testing.assert_allclose(pv[np.float32], pv[np.float64],
+                               rtol=0, atol=1e-5)
+    assert np.mean(pv[np.float32]) == pytest.approx(np.mean(pv[np.float64]),
+                                                    abs=1e-6)
+
+
+def test_smooth_pv_without_width_matches_pv(parameters):
+    simulate = SnowBallSimulate(SnowballProduct, parameters)
+    observer = simulate.observer()
+    calendar = observer.calendar(simulate.strike_date)
+    price = simulate.price_matrix(PathGenerator(seed=1), 2000,
+                                  calendar.year_fraction)
+    df = simulate.discount_factor(calendar.dates)
+    pv = simulate.calculate_pv_array(
+        simulate.evaluate_matrix(observer, price), calendar.dates, df)
+    np.testing.assert_allclose(simulate.smooth_pv(observer, price, df, 0),
+                               pv, rtol=0, atol=1e-12)
+
+
+def test_fused_falls_back_to_matrix(parameters, monkeypatch):
+    monkeypatch.setattr(snowball, 'HAS_NUMBA', False)
+    simulate = SnowBallSimulate(SnowballProduct, parameters)
+    assert simulate.fused_arguments(simulate.observer().schedule) is None
+    fused = simulate.path_pv(PathGenerator(seed=1), 2000, engine='fused')
+    matrix = simulate.path_pv(PathGenerator(seed=1), 2000, engine='matrix')
+    np.testing.assert_array_equal(fused, matrix)
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import warnings
+import numpy as np
+import pytest
+from apollo.product.template.snowball import (
+    SnowballProduct,
+    SnowBallSimulate,
+    matrix_chunk_size,
+)
+from apollo.simulation import PathGenerator, SobolPathGenerator
+
+pytest.importorskip('scipy')
+
+
+def _generator(simulate, coarse=False, seed=3):
+    calendar = simulate.observer(coarse).calendar(simulate.strike_date)
+    return SobolPathGenerator.from_schedule(calendar.dates,
+                                            simulate.strike_date, seed=seed)
+
+
+def test_chunks_keep_sobol_balance(parameters):
+    simulate = SnowBallSimulate(SnowballProduct, parameters)
+    generator = _generator(simulate)
+    num_of_date = len(generator.times)
+    chunk_size = matrix_chunk_size(num_of_date, 10 ** 6)
+    assert chunk_size == 341
+    assert matrix_chunk_size(num_of_date, 10 ** 6,
+                             path_generator=PathGenerator()) == chunk_size
+    assert matrix_chunk_size(num_of_date, 10 ** 6,
+                             path_generator=generator) == 256
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        for engine in ['matrix', 'fused']:
+            simulate.simulate(_generator(simulate), 2 ** 14, engine=engine,
+                              memory_budget=10 ** 6)
+
+
+def test_sample_knock_in_monitoring(parameters):
+    simulate = SnowBallSimulate(SnowballProduct, parameters,
+                                ki_monitoring='sample')
+    pv = [simulate.simulate(_generator(simulate, coarse=True), 4096,
+                            engine='matrix') for _ in range(2)]
+    assert pv[0] == pv[1]
+    reference = SnowBallSimulate(SnowballProduct, parameters)
+    assert np.isclose(pv[0], reference.simulate(PathGenerator(), 10 ** 5,
+                                                engine='matrix'), atol=0.01)
+
+
+def test_path_by_path_engines_rejected(parameters):
+    simulate = SnowBallSimulate(SnowballProduct, parameters)
+    for engine in ['object', 'array']:
+        with pytest.raises(AssertionError, match="'matrix' or 'fused'"):
+            simulate.path_pv(_generator(simulate), 1024, engine=engine)
+        with pytest.raises(AssertionError, match="'matrix' or 'fused'"):
+            simulate.cashflow_ledger(_generator(simulate), 1024,
+                                     engine=engine)
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import sys
+import datetime as dt
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from apollo.product.template import spec as spec_module
+from apollo.product.template.snowball import SnowballProduct, SnowBallSimulate
+from apollo.product.template.spec import ContractSpec, compile_spec
+
+
+def test_bytes_round_trip(parameters):
+    spec = ContractSpec.from_parameters(parameters)
+    restored = ContractSpec.from_bytes(spec.to_bytes())
+    assert restored == spec and restored.hash == spec.hash
+
+
+def test_cache_key_is_exact(parameters):
+    rebate = dict(parameters, KnockOutRebate=np.array([0.2] * 12))
+    close = dict(parameters, KnockOutRebate=np.array([0.2000000001] * 12))
+    assert compile_spec(rebate) is not compile_spec(close)
+    assert compile_spec(rebate) is compile_spec(
+        dict(rebate, KnockOutRebate=[0.2] * 12))
+    dates = dict(parameters, ObservationDate=[
+        dt.date.fromisoformat(d) for d in parameters['ObservationDate']])
+    assert compile_spec(dates) is compile_spec(parameters)
+
+
+def test_instances_do_not_share_objects(parameters):
+    first = SnowBallSimulate(SnowballProduct, parameters)
+    second = SnowBallSimulate(SnowballProduct, parameters)
+    assert first.spec is second.spec
+    first.ko_barrier.position = 2.0
+    first.ki_payoff.strike = 0.5
+    first.ko_payoff[first.ko_payoff.dates[0]].rate = 1.0
+    assert second.ko_barrier.position == first.spec.ko_barrier.position
+    assert second.ki_payoff.strike == first.spec.strike
+    assert second.ko_payoff[second.ko_payoff.dates[0]].rate \
+        == first.spec.ko_rebate[0]
+
+
+
+def test_cache_shared_by_threads(parameters, monkeypatch):
+    monkeypatch.setattr(spec_module, 'SPEC_CACHE_SIZE', 4)
+    variants = [dict(parameters, Strike=1.0 + i / 100) for i in range(16)]
+
+    def work(offset):
+        return [compile_spec(variants[(offset + i) % 16]).strike
+                for i in range(200)]
+
+    # switch threads often so they interleave inside compile_spec
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            result = list(executor.map(work, range(8)))
+    finally:
+        sys.setswitchinterval(interval)
+    for offset, strikes in enumerate(result):
+        assert strikes == [variants[(offset + i) % 16]['Strike']
+                           for i in range(200)]
+    assert len(spec_module._spec_cache) <= 4
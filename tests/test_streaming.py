@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""doc string"""
+
+import numpy as np
+import pytest
+from apollo.product.template.snowball import SnowballProduct, SnowBallSimulate
+from apollo.simulation import PathGenerator, StreamingSimulate
+
+
+def test_stops_at_target_std_error(parameters):
+    simulate = SnowBallSimulate(SnowballProduct, parameters)
+    batch_size, target = 2 ** 10, 0.002
+    result = StreamingSimulate(batch_size, target_std_error=target,
+                               min_num_of_path=batch_size).simulate(
+        simulate, PathGenerator(seed=1))
+    assert result.std_error <= target
+    assert result.num_of_path % batch_size == 0
+    # replay the batches on the shared generator
+    generator = PathGenerator(seed=1)
+    pv = np.concatenate([
+        simulate.path_pv(generator, batch_size, engine='array')
+        for _ in range(result.num_of_path // batch_size)])
+    assert result.pv == pytest.approx(np.mean(pv), abs=1e-12)
+    # one batch less misses the target
+    head = pv[:result.num_of_path - batch_size]
+    assert np.std(head, ddof=1) / np.sqrt(len(head)) > target
+
+
+def test_max_num_of_path_caps_target(parameters):
+    simulate = SnowBallSimulate(SnowballProduct, parameters)
+    result = StreamingSimulate(2 ** 10, target_std_error=1e-6,
+                               max_num_of_path=3000).simulate(
+        simulate, PathGenerator(seed=1))
+    assert result.num_of_path == 3000
+    assert result.std_error > 1e-6